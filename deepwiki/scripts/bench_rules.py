@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+検証ルール・Mermaid チェック・出典抽出の実行時間が入力サイズに対して線形に伸びるかを
+計測するベンチマーク兼ファズハーネス。
+
+モデルが生成したページには閉じ括弧のないラベルや同じ記号の長い連続が現れることがあり、
+バックトラッキングする正規表現では 1 ページの検証に数分かかることがある。
+ここでは閉じられない括弧・`<a` の連続・`Event` の連続などの敵対的な入力を複数サイズで生成し、
+validation_engine の各ルール（deepwiki / arch 両プロファイル）、fix_mermaid.check_violations（mermaid_parser）、
+fix_mermaid.autofix_content、source_index.extract_citations の実行時間を測って、サイズ比に対する時間比の指数を表示する
+（線形なら 1.0 前後、2 に近ければ二乗時間）。
+また scanners.py の各走査関数が置き換え前の正規表現と同じ判定を返すことを
+ランダム入力で照合し、mermaid_parser と fix_mermaid.autofix_block がランダム入力で
+例外を出さないこと、正しい Mermaid のサンプルで違反を出さないことも確認する。
+
+使用方法:
+  python bench_rules.py [--size N] [--scale K] [--repeat R] [--fuzz N] [--seed S] [--check]
+
+  --size N    最小サイズ（敵対パターンの繰り返し回数、既定 2000）
+  --scale K   最大サイズを最小サイズの K 倍にする（既定 8）
+  --repeat R  各計測の繰り返し回数。最小値を採用する（既定 3）
+  --fuzz N    ランダム入力による旧正規表現との照合件数（既定 2000、0 で省略）
+  --check     指数が閾値を超えた計測、または照合の不一致があれば終了コード 1 を返す（CI 用）
+"""
+import re
+import sys
+import math
+import time
+import random
+import argparse
+from typing import Callable, Dict, List, Tuple
+
+import fix_mermaid
+import mermaid_parser
+import source_index
+from scanners import (
+    find_delimited, find_unquoted_nested, find_unquoted_pipes, has_html_tag, has_hyphenated_node_id,
+    has_marked_path, has_pattern_on_same_line, is_table_row, is_table_separator,
+)
+from validation_engine import (
+    PROFILES, RULES, EVENT_RE, STREAMING_RE, ParsedDocument, RuleContext, ValidationResult,
+)
+
+# 時間比の指数がこれを超えたら線形でないとみなす（計測誤差を見込んで 1 より大きめ）
+MAX_GROWTH_EXPONENT = 1.5
+# 最大サイズでこれより速い計測は誤差が大きいため判定しない
+MIN_MEASURABLE_SECONDS = 0.005
+
+
+def _page(body: str, lang: str = 'mermaid') -> str:
+    """本文を Wiki ページらしい骨組み（見出し・コードブロック）に埋め込む"""
+    return f"# Bench\n\n## Overview\n\n```{lang}\ngraph TD\n{body}\n```\n\n{body}\n"
+
+
+# 敵対的な入力: 名前 → 繰り返し回数からページ本文を作る関数
+GENERATORS: Dict[str, Callable[[int], str]] = {
+    'unclosed_bracket_paren': lambda n: _page('A[' + '(x' * n),
+    'unclosed_paren_bracket': lambda n: _page('A(' + '[x' * n),
+    'unclosed_rhombus': lambda n: _page('{(' * n),
+    'bracket_paren_runs': lambda n: _page('[(' * n),
+    'pipe_runs': lambda n: _page('[|' * n),
+    'html_tag_runs': lambda n: _page('<a' * n),
+    'hyphen_id_runs': lambda n: _page('a-' * n + 'a'),
+    'event_runs': lambda n: _page('Event ' * n, lang='text'),
+    'comment_marker_runs': lambda n: _page('#' * n + '.t', lang='ts'),
+    'comment_path_runs': lambda n: _page('// a' * n, lang='ts'),
+    'file_link_runs': lambda n: _page('(file:///a' * n),
+    'table_pipe_runs': lambda n: _page('|' + ' |' * n + '\n|' + '-' * n + '|', lang='text'),
+    'quote_runs': lambda n: _page('"[' * n),
+    'quoted_edge_label_runs': lambda n: _page('A' + ' -->|"x | y"| A' * n),
+    'text_link_runs': lambda n: _page('A' + ' -- x' * n),
+    'flowchart_lines': lambda n: _page('\n'.join(f'    N{i}[x (y)] -->|l| N{i + 1}' for i in range(n // 10))),
+    'sequence_lines': lambda n: (
+        "```mermaid\nsequenceDiagram\n" + 'loop x\n    A->>B:\n' * (n // 10) + "```\n"
+    ),
+}
+
+# 置き換え前の正規表現（ファズ照合用）
+LEGACY = {
+    'bracket_label': re.compile(r'\[([^\]]+)\]'),
+    'quoted_label': re.compile(r'"([^"]+)"'),
+    'paren_in_bracket': re.compile(r'\[[^\]"]*\([^)]*\)[^\]"]*\]'),
+    'bracket_in_paren': re.compile(r'\([^)"]*\[[^\]]*\][^)"]*\)'),
+    'in_rhombus': re.compile(r'\{[^}"]*[(\[|][^}"]*\}'),
+    'pipe': re.compile(r'(?:\[|\()([^"()\[\]]*\|[^"()\[\]]*?)(?:\]|\))'),
+    'html': re.compile(r'<[a-zA-Z][^>]*>'),
+    'hyphen_id': re.compile(r'\b[A-Za-z][A-Za-z0-9]*(?:-[A-Za-z0-9]+)+\s*[\[\({"\'`]'),
+    'event_streaming': re.compile(r'\bEvent\b.*\bStreaming\b', re.IGNORECASE),
+    'deepwiki_citation': re.compile(
+        r'(?://|#)\s*\S+\.(ts|js|py|go|rs|java|tsx|jsx|vue|sh|rb|kt|swift|cs|cpp|c|h|php|scala|ex|exs|dart|lua|r)\s*[:\s]L\d+'
+    ),
+    'arch_config_citation': re.compile(r'(#|//|--)\s*\S+\.(ya?ml|tf|json|sql|conf|proto|toml)\s*[:\s]'),
+    'arch_code_citation': re.compile(r'//\s*\S+\.(ts|js|py|go|rs|java)\s*[:\s]L\d+'),
+    'table_row': re.compile(r'\s*\|.*\|.*\|'),
+    'table_separator': re.compile(r'\s*\|[\s\-:]+\|[\s\-:]+\|'),
+    'file_link': re.compile(r'\(file://(/[^#)\s]+)#L(\d+)(?:[-–]L?(\d+))?\)'),
+}
+
+# ファズ入力の部品。判定に関わる記号と、ルールが探す語を多めに含める
+FUZZ_TOKENS = [
+    '[', ']', '(', ')', '{', '}', '"', "'", '`', '|', '<', '>', '-', ':', '#', '//', '--',
+    ' ', ' ', '\n', '\t', 'a', 'Z', '0', 'x-y', 'A-b', '_', '.', '.ts', '.yml', '.py',
+    'L1', ':L12', 'Event', 'Streaming', 'event', '<a', '<br/>', 'file', '-:-',
+    '(file://', '(file:///a', '/', '#L1', '-L2', '–3', ')',
+    '-->', '->>', '-.', '==', '&', ';', ':::', 'end', 'subgraph ', 'loop ', 'else', 'participant ',
+    '-->|"a | b"|',
+]
+
+# mermaid_parser が違反なしと判定しなければならない正しい Mermaid ブロック
+VALID_MERMAID_SAMPLES = [
+    'flowchart TD\n    A["foo-bar (x)"] --> B',
+    'flowchart TD\n    A -->|label| B',
+    'flowchart TD\n    A -->|"a | b"| B',
+    'sequenceDiagram\n    participant A\n    A->>B: request',
+]
+
+
+def _targets() -> List[Tuple[str, Callable[[str], object]]]:
+    """計測対象: (名前, ページ本文を受け取って処理する関数)"""
+    targets = []
+    for profile in PROFILES.values():
+        reqs = profile.requirements['high']
+        for rule_id in profile.rules:
+            def run(text, profile=profile, reqs=reqs, rule_id=rule_id):
+                # ルールごとに新しい ParsedDocument を作り、解析のコストもそのルールに計上する
+                ctx = RuleContext(doc=ParsedDocument(text), profile=profile, importance='high',
+                                  reqs=reqs, source_roots=())
+                RULES[rule_id](ctx, ValidationResult(file='bench.md', importance='high'))
+            targets.append((f'{profile.name}:{rule_id}', run))
+
+    # check_violations はブロック単位でメモ化するため、計測ごとにメモを空にして解析のコストを測る
+    def check_blocks(text):
+        fix_mermaid._check_cache.clear()
+        return [fix_mermaid.check_violations(block) for block in fix_mermaid.extract_mermaid_blocks(text)]
+
+    def autofix(text):
+        fix_mermaid._check_cache.clear()
+        return fix_mermaid.autofix_content(text)
+
+    targets.append(('fix_mermaid.check_violations', check_blocks))
+    targets.append(('fix_mermaid.autofix_content', autofix))
+    targets.append(('source_index.extract_citations', source_index.extract_citations))
+    return targets
+
+
+def _measure(fn: Callable[[str], object], text: str, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(size: int, scale: int, repeat: int) -> List[dict]:
+    """各敵対入力 × 各計測対象について、最小・最大サイズでの時間と伸びの指数を返す"""
+    rows = []
+    targets = _targets()
+    for gen_name, gen in GENERATORS.items():
+        small, large = gen(size), gen(size * scale)
+        size_ratio = len(large) / len(small)
+        for target_name, fn in targets:
+            t_small = _measure(fn, small, repeat)
+            t_large = _measure(fn, large, repeat)
+            exponent = (
+                math.log(t_large / t_small) / math.log(size_ratio)
+                if t_small > 0 and t_large > 0 else 0.0
+            )
+            rows.append({
+                'input': gen_name, 'target': target_name, 'chars': len(large),
+                'small': t_small, 'large': t_large, 'exponent': exponent,
+                'superlinear': t_large >= MIN_MEASURABLE_SECONDS and exponent > MAX_GROWTH_EXPONENT,
+            })
+    return rows
+
+
+def _fuzz_text(rng: random.Random, max_tokens: int = 40) -> str:
+    return ''.join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randint(0, max_tokens)))
+
+
+def run_fuzz(cases: int, seed: int) -> List[str]:
+    """scanners の判定を置き換え前の正規表現と照合し、不一致の説明を返す。
+    正しい Mermaid のサンプルを mermaid_parser が誤検出しないことも確かめる。
+    """
+    rng = random.Random(seed)
+    deepwiki_cite = PROFILES['deepwiki'].snippet_citation_patterns[0]
+    arch_config_cite, arch_code_cite = PROFILES['arch'].snippet_citation_patterns
+    checks = [
+        ('find_delimited[]', lambda t: find_delimited(t, '[', ']'),
+         lambda t: LEGACY['bracket_label'].findall(t)),
+        ('find_delimited""', lambda t: find_delimited(t, '"', '"'),
+         lambda t: LEGACY['quoted_label'].findall(t)),
+        ('unquoted [(...)]', lambda t: bool(find_unquoted_nested(t, '[', ']', '(', ')')),
+         lambda t: bool(LEGACY['paren_in_bracket'].search(t))),
+        ('unquoted ([...])', lambda t: bool(find_unquoted_nested(t, '(', ')', '[', ']')),
+         lambda t: bool(LEGACY['bracket_in_paren'].search(t))),
+        ('unquoted {..}', lambda t: bool(find_unquoted_nested(t, '{', '}', '([|')),
+         lambda t: bool(LEGACY['in_rhombus'].search(t))),
+        ('unquoted pipe', lambda t: bool(find_unquoted_pipes(t)),
+         lambda t: bool(LEGACY['pipe'].search(t))),
+        ('html tag', has_html_tag, lambda t: bool(LEGACY['html'].search(t))),
+        ('hyphen id', has_hyphenated_node_id, lambda t: bool(LEGACY['hyphen_id'].search(t))),
+        ('Event..Streaming', lambda t: has_pattern_on_same_line(t, EVENT_RE, STREAMING_RE),
+         lambda t: bool(LEGACY['event_streaming'].search(t))),
+        ('deepwiki citation', lambda t: has_marked_path(t, *deepwiki_cite),
+         lambda t: bool(LEGACY['deepwiki_citation'].search(t))),
+        ('arch config citation', lambda t: has_marked_path(t, *arch_config_cite),
+         lambda t: bool(LEGACY['arch_config_citation'].search(t))),
+        ('arch code citation', lambda t: has_marked_path(t, *arch_code_cite),
+         lambda t: bool(LEGACY['arch_code_citation'].search(t))),
+        ('table row', is_table_row, lambda t: bool(LEGACY['table_row'].match(t))),
+        ('table separator', is_table_separator, lambda t: bool(LEGACY['table_separator'].match(t))),
+        ('file links', lambda t: list(source_index.iter_file_links(t)), lambda t: [
+            (m.group(1), int(m.group(2)), int(m.group(3) or m.group(2)), m.start())
+            for m in LEGACY['file_link'].finditer(t)
+        ]),
+    ]
+
+    mismatches = []
+    for sample in VALID_MERMAID_SAMPLES:
+        diagnostics = mermaid_parser.parse(sample).diagnostics
+        if diagnostics:
+            mismatches.append(f"mermaid_parser: 正しいブロックで違反を検出: {sample!r}: {diagnostics[0].message}")
+    for _ in range(cases):
+        text = _fuzz_text(rng)
+        for name, new, old in checks:
+            # 表の判定は1行単位で使うため、行に分けて照合する
+            samples = text.split('\n') if name.startswith('table') else [text]
+            for sample in samples:
+                if new(sample) != old(sample):
+                    mismatches.append(f"{name}: {sample!r}")
+        for header in ('graph TD\n', 'sequenceDiagram\n'):
+            try:
+                mermaid_parser.parse(header + text)
+                fix_mermaid.autofix_block(header + text)
+            except Exception as e:
+                mismatches.append(f"mermaid_parser / autofix: {type(e).__name__}: {e}: {header + text!r}")
+    return mismatches
+
+
+def format_rows(rows: List[dict], show_all: bool) -> str:
+    lines = [f"{'入力':<24} {'対象':<34} {'文字数':>8} {'最小(ms)':>9} {'最大(ms)':>9} {'指数':>5}"]
+    for row in rows:
+        if not show_all and not row['superlinear'] and row['large'] < MIN_MEASURABLE_SECONDS:
+            continue
+        mark = '  ← 線形でない' if row['superlinear'] else ''
+        lines.append(
+            f"{row['input']:<24} {row['target']:<34} {row['chars']:>8} "
+            f"{row['small'] * 1000:>9.2f} {row['large'] * 1000:>9.2f} {row['exponent']:>5.2f}{mark}"
+        )
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="検証ルールの実行時間の伸びとスキャナの等価性を確認する")
+    parser.add_argument('--size', type=int, default=2000, help="最小サイズ（敵対パターンの繰り返し回数）")
+    parser.add_argument('--scale', type=int, default=8, help="最大サイズ / 最小サイズ")
+    parser.add_argument('--repeat', type=int, default=3, help="各計測の繰り返し回数")
+    parser.add_argument('--fuzz', type=int, default=2000, help="ランダム照合の件数（0 で省略）")
+    parser.add_argument('--seed', type=int, default=0, help="ランダム照合のシード")
+    parser.add_argument('--all', action='store_true', help=f"{MIN_MEASURABLE_SECONDS * 1000:.0f}ms 未満の計測も表示する")
+    parser.add_argument('--check', action='store_true', help="線形でない計測や不一致があれば終了コード 1")
+    args = parser.parse_args()
+
+    failed = False
+    rows = run_benchmark(args.size, args.scale, args.repeat)
+    print(format_rows(rows, args.all))
+    superlinear = [row for row in rows if row['superlinear']]
+    print(f"\n計測: {len(rows)} 件 / 線形でない: {len(superlinear)} 件 (指数 > {MAX_GROWTH_EXPONENT})")
+    failed |= bool(superlinear)
+
+    if args.fuzz > 0:
+        mismatches = run_fuzz(args.fuzz, args.seed)
+        print(f"ファズ照合: {args.fuzz} 件 / 不一致: {len(mismatches)} 件")
+        for m in mismatches[:20]:
+            print(f"  ❌ {m}")
+        failed |= bool(mismatches)
+
+    if args.check and failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
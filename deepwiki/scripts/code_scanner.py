@@ -0,0 +1,665 @@
+#!/usr/bin/env python3
+"""
+コードベースを1パスで走査し、ファイルごとの import・シグネチャ・行数と言語別統計をまとめて集める。
+
+各ファイルは1回だけ読み、Python は ast.parse、JS/TS/Java は tree-sitter での解析も1回だけ行って
+import とシグネチャの両方をその結果から取り出す。結果は symbol_index.py の索引に保存し、
+内容が変わっていないファイルは読み直さない。
+
+analyze_dependencies.py（依存関係マップ）と extract_signatures.py（シグネチャ一覧）はこの走査結果の
+ビューで、collect_structure.sh は本スクリプトを1回呼んで依存関係マップ・行数 Top 20・シグネチャを出力する。
+
+使い方:
+  python code_scanner.py <target_directory> [--json] [--exclude-tests] [--jobs N] [--index PATH | --no-index]
+"""
+import sys
+import os
+import re
+import ast
+import json
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from symbol_index import cached_extract, open_index, script_version
+
+try:
+    import tree_sitter
+    import tree_sitter_javascript
+    import tree_sitter_typescript
+    import tree_sitter_java
+    
+    TS_LANG = tree_sitter.Language(tree_sitter_typescript.language_typescript(), "typescript")
+    JS_LANG = tree_sitter.Language(tree_sitter_javascript.language(), "javascript")
+    JAVA_LANG = tree_sitter.Language(tree_sitter_java.language(), "java")
+    
+    HAS_TREE_SITTER = True
+except ImportError:
+    HAS_TREE_SITTER = False
+
+TREE_SITTER_INSTALL_HINT = (
+    "    pip install tree-sitter==0.21.3 tree-sitter-javascript==0.21.4 "
+    "tree-sitter-typescript==0.21.2 tree-sitter-java==0.21.0"
+)
+
+# 行数を数える（ファイルサイズ Top 20 と言語別統計の対象になる）ソースファイルの拡張子と言語名
+LANGUAGES = {
+    '.ts': 'TypeScript', '.tsx': 'TypeScript', '.js': 'JavaScript', '.jsx': 'JavaScript',
+    '.py': 'Python', '.rs': 'Rust', '.go': 'Go', '.java': 'Java', '.rb': 'Ruby', '.cs': 'C#',
+    '.cpp': 'C++', '.c': 'C', '.swift': 'Swift', '.kt': 'Kotlin', '.vue': 'Vue', '.svelte': 'Svelte',
+    '.php': 'PHP', '.dart': 'Dart',
+}
+# import とシグネチャを解析する拡張子
+PARSED_EXTENSIONS = ('.py', '.js', '.jsx', '.ts', '.tsx', '.vue', '.java')
+# これを超えるファイルは行数だけ数えて解析はしない
+MAX_PARSE_BYTES = 500 * 1024
+
+# os.walk フォールバック時に降りないディレクトリ
+EXCLUDED_DIRS = (
+    '.git', 'node_modules', '__pycache__', '.next', '.nuxt', 'dist', 'build', 'out',
+    '.cache', '.tmp', '.temp', 'vendor', '.venv', 'venv', 'env', '.env',
+    '.idea', '.vscode', '.DS_Store', 'coverage', '.nyc_output',
+    '.terraform', '.serverless', '.aws-sam',
+    'target', 'Pods', '.run',
+)
+
+TEST_FILE_RE = re.compile(
+    r'/(tests?|spec|__tests__|e2e)/'
+    r'|\.(test|spec)\.(ts|tsx|js|jsx|py|go|rs|java|kt|rb|cs|swift|dart)$'
+    r'|/test_[^/]+\.(py|go)$'
+    r'|/[^/]+_test\.(py|go|rs)$'
+    r'|/[^/]+Test\.(java|kt)$'
+)
+
+# ES6 import / 動的 import() / require() / export ... from
+JS_IMPORT_RES = (
+    re.compile(r"import\s+(?:(?:.+?)\s+from\s+)?['\"]([^'\"]+)['\"]", re.MULTILINE),
+    re.compile(r"import\s*\(\s*['\"]([^'\"]+)['\"]\s*\)", re.MULTILINE),
+    re.compile(r"require\s*\(\s*['\"]([^'\"]+)['\"]\s*\)", re.MULTILINE),
+    re.compile(r"export\s+.*?\s+from\s+['\"]([^'\"]+)['\"]", re.MULTILINE),
+)
+JAVA_IMPORT_RE = re.compile(r"^\s*import\s+([\w\.]+)\s*;", re.MULTILINE)
+LOCAL_SUFFIX_RE = re.compile(r'\.(ts|tsx|js|jsx|py|java)$')
+
+# 言語ごとの tree_sitter.Parser。ファイルごとに作り直さず、プロセス内（並列時は各ワーカー内）で使い回す
+_PARSERS: Dict[int, Any] = {}
+
+
+def get_parser(lang):
+    parser = _PARSERS.get(id(lang))
+    if parser is None:
+        parser = tree_sitter.Parser()
+        parser.set_language(lang)
+        _PARSERS[id(lang)] = parser
+    return parser
+
+
+def init_worker() -> None:
+    """並列走査のワーカー初期化: 全言語のパーサーを最初に1回だけ作る"""
+    if HAS_TREE_SITTER:
+        for lang in (TS_LANG, JS_LANG, JAVA_LANG):
+            get_parser(lang)
+
+
+def python_imports(tree: ast.AST) -> Set[str]:
+    dependencies = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                dependencies.add(alias.name)
+        elif isinstance(node, ast.ImportFrom):
+            if node.module:
+                # module might be something like 'os.path', we now retain the full path
+                dependencies.add(node.module)
+    return dependencies
+
+
+def js_ts_imports(content: str) -> Set[str]:
+    dependencies = set()
+    for pattern in JS_IMPORT_RES:
+        dependencies.update(pattern.findall(content))
+    return dependencies
+
+
+def java_imports(content: str) -> Set[str]:
+    return set(JAVA_IMPORT_RE.findall(content))
+
+
+def python_signatures(tree: ast.AST) -> List[Dict[str, Any]]:
+    signatures = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            docstring = ast.get_docstring(node)
+            decorators = [('@' + (n.id if isinstance(n, ast.Name) else getattr(n, 'func', n).id)) for n in node.decorator_list if hasattr(n, 'id') or hasattr(getattr(n, 'func', n), 'id')]
+            signatures.append({
+                "type": "class",
+                "name": node.name,
+                "line": node.lineno,
+                "docstring": docstring.strip() if docstring else "",
+                "decorators": decorators
+            })
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if node.name.startswith('_') and node.name != '__init__':
+                continue
+                
+            docstring = ast.get_docstring(node)
+            decorators = []
+            for n in node.decorator_list:
+                if isinstance(n, ast.Name):
+                    decorators.append('@' + n.id)
+                elif isinstance(n, ast.Call) and isinstance(n.func, ast.Name):
+                    decorators.append('@' + n.func.id + '(...)')
+            
+            args = [arg.arg for arg in node.args.args]
+            if node.args.vararg:
+                args.append(f"*{node.args.vararg.arg}")
+            if node.args.kwarg:
+                args.append(f"**{node.args.kwarg.arg}")
+            
+            returns = ""
+            if node.returns:
+                if isinstance(node.returns, ast.Name):
+                    returns = node.returns.id
+                elif isinstance(node.returns, ast.Constant):
+                    returns = str(node.returns.value)
+                else:
+                    # Optional[str] / pkg.Type / X | None など。オブジェクトの repr にならないよう式として復元する
+                    returns = ast.unparse(node.returns)
+
+            signatures.append({
+                "type": "function",
+                "name": node.name,
+                "args": ", ".join(args),
+                "returns": returns,
+                "line": node.lineno,
+                "docstring": docstring.strip() if docstring else "",
+                "decorators": decorators
+            })
+    return signatures
+
+
+def extract_node_text(node, source_code: bytes) -> str:
+    if node is None: return ""
+    return source_code[node.start_byte:node.end_byte].decode('utf-8')
+
+def find_children_by_type(node, type_name: str):
+    return [n for n in node.children if n.type == type_name]
+
+def get_ts_decorators(node, source_code: bytes):
+    decorators = []
+    for child in node.children:
+        if child.type == 'decorator':
+            decorators.append(extract_node_text(child, source_code))
+            
+    curr = node.prev_named_sibling
+    while curr and curr.type == 'decorator':
+        decorators.insert(0, extract_node_text(curr, source_code))
+        curr = curr.prev_named_sibling
+        
+    if node.parent and node.parent.type == 'export_statement':
+        curr = node.parent.prev_named_sibling
+        while curr and curr.type == 'decorator':
+            decorators.insert(0, extract_node_text(curr, source_code))
+            curr = curr.prev_named_sibling
+            
+    return decorators
+
+def get_ts_docstring(node, source_code: bytes):
+    curr = node.prev_named_sibling
+    while curr and curr.type == 'decorator':
+        curr = curr.prev_named_sibling
+    if curr and curr.type == 'comment':
+        text = extract_node_text(curr, source_code)
+        if text.startswith('/**'):
+            return text.strip()
+            
+    if node.parent and node.parent.type == 'export_statement':
+        curr = node.parent.prev_named_sibling
+        while curr and curr.type == 'decorator':
+            curr = curr.prev_named_sibling
+        if curr and curr.type == 'comment':
+            text = extract_node_text(curr, source_code)
+            if text.startswith('/**'):
+                return text.strip()
+    return ""
+
+def js_ts_signatures(filepath: Path, source_code: bytes, lang) -> List[Dict[str, Any]]:
+    signatures = []
+    try:
+        tree = get_parser(lang).parse(source_code)
+        
+        def walk(node):
+            if node.type in ('class_declaration', 'function_declaration', 'method_definition', 'lexical_declaration'):
+                if node.type == 'lexical_declaration':
+                    # Check for exported arrow functions
+                    if node.parent and node.parent.type == 'export_statement':
+                        for dec in find_children_by_type(node, 'variable_declarator'):
+                            value = dec.child_by_field_name('value')
+                            if value and value.type == 'arrow_function':
+                                name_node = dec.child_by_field_name('name')
+                                params_node = value.child_by_field_name('parameters')
+                                return_type_node = value.child_by_field_name('return_type')
+                                signatures.append({
+                                    "type": "function",
+                                    "name": extract_node_text(name_node, source_code) if name_node else "",
+                                    "args": extract_node_text(params_node, source_code) if params_node else "()",
+                                    "returns": extract_node_text(return_type_node, source_code) if return_type_node else "Any",
+                                    "line": node.start_point[0] + 1,
+                                    "decorators": get_ts_decorators(node, source_code),
+                                    "docstring": get_ts_docstring(node, source_code)
+                                })
+                else:
+                    name_node = node.child_by_field_name('name')
+                    # allow empty name for default exports, except methods must have names
+                    name_text = extract_node_text(name_node, source_code) if name_node else ("default" if node.type != 'method_definition' else "")
+                    
+                    if name_text and name_text != 'constructor':
+                        if node.type == 'class_declaration':
+                            signatures.append({
+                                "type": "class",
+                                "name": name_text,
+                                "line": node.start_point[0] + 1,
+                                "decorators": get_ts_decorators(node, source_code),
+                                "docstring": get_ts_docstring(node, source_code)
+                            })
+                        else:
+                            params_node = node.child_by_field_name('parameters')
+                            return_type_node = node.child_by_field_name('return_type')
+                            signatures.append({
+                                "type": "function" if node.type == 'function_declaration' else "method",
+                                "name": name_text,
+                                "args": extract_node_text(params_node, source_code) if params_node else "()",
+                                "returns": extract_node_text(return_type_node, source_code) if return_type_node else "Any",
+                                "line": node.start_point[0] + 1,
+                                "decorators": get_ts_decorators(node, source_code),
+                                "docstring": get_ts_docstring(node, source_code)
+                            })
+            
+            for child in node.children:
+                walk(child)
+                
+        walk(tree.root_node)
+    except Exception as e:
+        print(f"Warning: Failed to parse JS/TS file {filepath}: {e}", file=sys.stderr)
+        
+    return sorted(signatures, key=lambda x: x["line"])
+
+def java_signatures(filepath: Path, source_code: bytes) -> List[Dict[str, Any]]:
+    signatures = []
+    try:
+        tree = get_parser(JAVA_LANG).parse(source_code)
+        
+        def walk(node):
+            if node.type in ('class_declaration', 'interface_declaration', 'enum_declaration'):
+                name_node = node.child_by_field_name('name')
+                if name_node:
+                    modifiers = next((c for c in node.children if c.type == 'modifiers'), None)
+                    decorators = []
+                    if modifiers:
+                        for mod in modifiers.children:
+                            if mod.type in ['annotation', 'marker_annotation']:
+                                decorators.append(extract_node_text(mod, source_code))
+                                
+                    signatures.append({
+                        "type": node.type.split('_')[0],
+                        "name": extract_node_text(name_node, source_code),
+                        "line": node.start_point[0] + 1,
+                        "decorators": decorators,
+                        "docstring": get_ts_docstring(node, source_code)
+                    })
+            elif node.type == 'method_declaration':
+                name_node = node.child_by_field_name('name')
+                if name_node:
+                    modifiers = next((c for c in node.children if c.type == 'modifiers'), None)
+                    decorators = []
+                    if modifiers:
+                        for mod in modifiers.children:
+                            if mod.type in ['annotation', 'marker_annotation']:
+                                decorators.append(extract_node_text(mod, source_code))
+                                
+                    params_node = node.child_by_field_name('parameters')
+                    type_node = node.child_by_field_name('type')
+                    
+                    signatures.append({
+                        "type": "method",
+                        "name": extract_node_text(name_node, source_code),
+                        "args": extract_node_text(params_node, source_code) if params_node else "()",
+                        "returns": extract_node_text(type_node, source_code) if type_node else "void",
+                        "line": node.start_point[0] + 1,
+                        "decorators": decorators,
+                        "docstring": get_ts_docstring(node, source_code)
+                    })
+            
+            for child in node.children:
+                walk(child)
+                
+        walk(tree.root_node)
+    except Exception as e:
+        print(f"Warning: Failed to parse Java file {filepath}: {e}", file=sys.stderr)
+        
+    return sorted(signatures, key=lambda x: x["line"])
+
+
+def is_test_file(path: str) -> bool:
+    return bool(TEST_FILE_RE.search(path.replace('\\', '/')))
+
+
+def get_git_files(target_dir: Path) -> Optional[List[Path]]:
+    """gitリポジトリなら git ls-files で .gitignore 考慮済みのファイルリストを返す。失敗時は None。"""
+    try:
+        result = subprocess.run(
+            ['git', '-C', str(target_dir), 'ls-files', '--cached', '--others', '--exclude-standard'],
+            capture_output=True, text=True, timeout=30
+        )
+        if result.returncode == 0:
+            return [target_dir / line for line in result.stdout.splitlines() if line]
+    except Exception:
+        pass
+    return None
+
+
+def iter_files(target_dir: Path):
+    """走査対象のファイルを列挙する（git 管理下なら .gitignore を考慮）"""
+    git_files = get_git_files(target_dir)
+    if git_files is not None:
+        # gitモード: .gitignore 考慮済みのリストをイテレート
+        yield from git_files
+        return
+    # フォールバック: os.walk + ハードコードリスト
+    for root, dirs, files in os.walk(target_dir):
+        dirs[:] = [d for d in dirs if d not in EXCLUDED_DIRS]
+        for file in files:
+            yield Path(root) / file
+
+
+def classify(filepath: Path, rel_path: str, exclude_tests: bool) -> Optional[str]:
+    """走査の種類を返す: 'parse'（import・シグネチャを解析）/ 'lines'（行数のみ）/ None（対象外）"""
+    file = filepath.name
+    if os.path.splitext(file)[1] not in LANGUAGES:
+        return None
+    if exclude_tests and is_test_file('/' + rel_path):
+        return None
+    # 生成物のバンドルは行数も数えない
+    if file.endswith('.min.js') or file.endswith('.bundle.js'):
+        return None
+    try:
+        size = filepath.stat().st_size
+    except OSError:
+        return None
+    # 巨大なファイルやバンドル済みのファイルは解析スキップ
+    if not file.endswith(PARSED_EXTENSIONS) or 'bundle' in filepath.parts or size > MAX_PARSE_BYTES:
+        return 'lines'
+    return 'parse'
+
+
+def count_file_lines(filepath: Path) -> Dict[str, Any]:
+    """解析しないファイルの行数（wc -l と同じく改行の数）"""
+    try:
+        with open(filepath, 'rb') as f:
+            return {"lines": f.read().count(b'\n')}
+    except OSError:
+        return {"lines": 0}
+
+
+def scan_file(filepath: Path) -> Dict[str, Any]:
+    """1ファイルを1回だけ読んで解析し、行数・import・シグネチャを返す（並列時はワーカープロセスで実行される）"""
+    file = filepath.name
+    record: Dict[str, Any] = {"lines": 0, "imports": [], "signatures": []}
+    try:
+        with open(filepath, 'rb') as f:
+            source_code = f.read()
+    except OSError as e:
+        print(f"Warning: Failed to read {filepath}: {e}", file=sys.stderr)
+        return record
+    record["lines"] = source_code.count(b'\n')
+
+    try:
+        # テキストモードで読んだ場合と同じく改行を \n にそろえる
+        content: Optional[str] = source_code.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+    except UnicodeDecodeError as e:
+        print(f"Warning: Failed to decode {filepath}: {e}", file=sys.stderr)
+        content = None
+
+    if file.endswith('.py'):
+        if content is None:
+            return record
+        try:
+            tree = ast.parse(content)
+        except Exception as e:
+            print(f"Warning: Failed to parse Python file {filepath}: {e}", file=sys.stderr)
+            return record
+        record["imports"] = sorted(python_imports(tree))
+        record["signatures"] = python_signatures(tree)
+    elif file.endswith('.java'):
+        if content is not None:
+            record["imports"] = sorted(java_imports(content))
+        if HAS_TREE_SITTER:
+            record["signatures"] = java_signatures(filepath, source_code)
+    else:
+        if content is not None:
+            record["imports"] = sorted(js_ts_imports(content))
+        if HAS_TREE_SITTER:
+            lang = JS_LANG if file.endswith(('.js', '.jsx')) else TS_LANG
+            record["signatures"] = js_ts_signatures(filepath, source_code, lang)
+    return record
+
+
+def scan(target_dir: Path, exclude_tests: bool, jobs: int = 1, argv: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """target_dir を走査して 相対パス → {"lines", "imports", "signatures"} をパス順で返す。
+    解析しないファイル（巨大・バンドル・対象外の言語）は "lines" だけを持つ。
+    argv の --index PATH / --no-index に従って索引を使い、内容が変わっていないファイルは読まない。
+    """
+    parse_targets: List[Tuple[str, Path]] = []
+    line_targets: List[Tuple[str, Path]] = []
+    for filepath in iter_files(target_dir):
+        rel_path = str(filepath.relative_to(target_dir))
+        kind = classify(filepath, rel_path, exclude_tests)
+        if kind == 'parse':
+            parse_targets.append((rel_path, filepath))
+        elif kind == 'lines':
+            line_targets.append((rel_path, filepath))
+    # 直列でも並列でも同じ出力になるよう、パス順に走査して結果を並べる
+    parse_targets.sort()
+    line_targets.sort()
+
+    def scan_all(paths: List[Path]) -> List[Dict[str, Any]]:
+        workers = jobs if jobs > 0 else (os.cpu_count() or 1)
+        workers = min(workers, len(paths))
+        if workers <= 1:
+            return [scan_file(filepath) for filepath in paths]
+        # 各ワーカーは initializer で言語・パーサーを1回だけ用意し、以後のファイルで使い回す
+        chunksize = max(1, len(paths) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            return list(executor.map(scan_file, paths, chunksize=chunksize))
+
+    # tree-sitter の有無で JS/TS/Java のシグネチャが変わるため、索引のバージョンを分ける
+    version = script_version(__file__) + ('+ts' if HAS_TREE_SITTER else '')
+    index = open_index(str(target_dir), argv or [])
+    try:
+        parsed = cached_extract(index, parse_targets, 'scan', version, scan_all)
+        counted = cached_extract(
+            index, line_targets, 'lines', version,
+            lambda paths: [count_file_lines(filepath) for filepath in paths],
+        )
+    finally:
+        if index is not None:
+            index.close()
+
+    records = dict(zip((rel for rel, _ in parse_targets), parsed))
+    records.update(zip((rel for rel, _ in line_targets), counted))
+    return {rel_path: records[rel_path] for rel_path in sorted(records)}
+
+
+def language_stats(records: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """言語 → {"files", "lines"}（行数の多い順）"""
+    stats: Dict[str, Dict[str, int]] = {}
+    for rel_path, record in records.items():
+        lang = LANGUAGES[os.path.splitext(rel_path)[1]]
+        entry = stats.setdefault(lang, {"files": 0, "lines": 0})
+        entry["files"] += 1
+        entry["lines"] += record["lines"]
+    return dict(sorted(stats.items(), key=lambda item: (-item[1]["lines"], item[0])))
+
+
+def dependency_map(records: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, List[str]]]:
+    """解析したファイルごとの imports と、ローカルファイルとして推測した imported_by"""
+    result_map: Dict[str, Dict[str, List[str]]] = {
+        rel_path: {"imports": record["imports"], "imported_by": []}
+        for rel_path, record in records.items() if "imports" in record
+    }
+
+    # Track which files are imported by which (reverse dependency map)
+    imported_by: Dict[str, Set[str]] = {}
+    for rel_path, data in result_map.items():
+        for dep in data["imports"]:
+            imported_by.setdefault(dep, set()).add(rel_path)
+
+    # Precompute normalized dependencies
+    precomputed_deps = [
+        (dep_target, dep_target.replace('.', '/'), importers)
+        for dep_target, importers in imported_by.items()
+    ]
+
+    # Populate imported_by for local files
+    for filepath_str, data in result_map.items():
+        matched_importers: Set[str] = set()
+        file_stem = Path(filepath_str).stem
+        normalized_path = LOCAL_SUFFIX_RE.sub('', filepath_str)
+        for dep_target, normalized_dep, importers in precomputed_deps:
+            if (
+                dep_target == file_stem or 
+                dep_target == filepath_str or
+                normalized_dep == normalized_path or
+                normalized_dep.startswith(normalized_path + '/') or
+                normalized_dep.endswith('/' + file_stem) or
+                normalized_path.endswith('/' + normalized_dep)
+            ):
+                matched_importers.update(importers)
+        data["imported_by"] = sorted(matched_importers)
+    return result_map
+
+
+def signature_map(records: Dict[str, Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """シグネチャが見つかったファイルだけの 相対パス → シグネチャ一覧"""
+    return {rel_path: record["signatures"] for rel_path, record in records.items() if record.get("signatures")}
+
+
+def print_dependency_map(result_map: Dict[str, Dict[str, List[str]]]) -> None:
+    print("# 依存関係マップ (Dependency Map)\n")
+    for file, data in result_map.items():
+        if not data["imports"] and not data["imported_by"]:
+            continue
+        print(f"### `{file}`")
+        if data["imports"]:
+            print("**Imports:**")
+            for dep in data["imports"]:
+                print(f"- `{dep}`")
+        if data["imported_by"]:
+            print("**Imported By (推測):**")
+            for importer in data["imported_by"]:
+                print(f"- `{importer}`")
+        print()
+
+
+def print_signatures(result_map: Dict[str, List[Dict[str, Any]]]) -> None:
+    print("# エクスポート／主要シグネチャ (Signatures)\n")
+    for filepath, signatures in result_map.items():
+        print(f"### `{filepath}`")
+        for sig in signatures:
+            sig_type = sig.get("type", "")
+            name = sig.get("name", "")
+            line = sig.get("line", "")
+            args = sig.get("args", "")
+            returns = sig.get("returns", "")
+            docstring = sig.get("docstring", "")
+            decorators = sig.get("decorators", [])
+            
+            # Format decorators
+            dec_str = " ".join(decorators) + " " if decorators else ""
+            
+            if sig_type == "class":
+                print(f"- **Class**: {dec_str}`{name}` (L{line})")
+            else:
+                ret_str = f" -> {returns}" if returns else ""
+                print(f"- **{sig_type.capitalize()}**: {dec_str}`{name}({args}){ret_str}` (L{line})")
+            
+            if docstring:
+                first_line = docstring.split('\n')[0].replace('/**', '').replace('*/', '').replace('"""', '').strip()
+                if first_line:
+                    print(f"  - *Doc*: {first_line[:100]}...")
+        print()
+
+
+def print_line_counts(records: Dict[str, Dict[str, Any]], top: int = 20) -> None:
+    """行数 Top N と言語別の行数"""
+    largest = sorted(records.items(), key=lambda item: (-item[1]["lines"], item[0]))[:top]
+    width = len(str(largest[0][1]["lines"])) if largest else 1
+    print('```')
+    for rel_path, record in largest:
+        print(f"{record['lines']:>{width}} {rel_path}")
+    print('```')
+    print()
+    print("### 言語別の行数")
+    print('```')
+    for lang, entry in language_stats(records).items():
+        print(f"{lang}: {entry['lines']} 行 / {entry['files']} ファイル")
+    print('```')
+
+
+def parse_args(argv: List[str], usage: str) -> Tuple[Path, bool, bool, int]:
+    """各 CLI 共通の引数: <target_directory> [--json] [--exclude-tests] [--jobs N]（索引の引数は scan が読む）"""
+    if len(argv) < 2:
+        print(usage, file=sys.stderr)
+        sys.exit(1)
+
+    target_dir = Path(argv[1]).resolve()
+    output_json = '--json' in argv[2:]
+    exclude_tests = '--exclude-tests' in argv[2:]
+    # --jobs N: N プロセスで並列に解析する（0 で CPU 数、既定は 1 = 直列）
+    jobs = 1
+    if '--jobs' in argv[2:]:
+        idx = argv.index('--jobs')
+        try:
+            jobs = int(argv[idx + 1])
+        except (IndexError, ValueError):
+            print("Error: --jobs には整数を指定してください", file=sys.stderr)
+            sys.exit(1)
+
+    if not target_dir.exists() or not target_dir.is_dir():
+        print(f"Error: Directory {target_dir} does not exist.", file=sys.stderr)
+        sys.exit(1)
+    return target_dir, output_json, exclude_tests, jobs
+
+
+def main():
+    target_dir, output_json, exclude_tests, jobs = parse_args(
+        sys.argv,
+        "Usage: python code_scanner.py <target_directory> [--json] [--exclude-tests] [--jobs N] [--index PATH | --no-index]",
+    )
+    if not HAS_TREE_SITTER:
+        print("Warning: tree-sitter が未インストールのため、JS/TS/Java のシグネチャは抽出しません。", file=sys.stderr)
+        print(TREE_SITTER_INSTALL_HINT, file=sys.stderr)
+
+    records = scan(target_dir, exclude_tests, jobs, sys.argv[2:])
+
+    if output_json:
+        print(json.dumps({
+            "files": records,
+            "languages": language_stats(records),
+            "dependencies": dependency_map(records),
+        }, indent=2, ensure_ascii=False))
+        return
+
+    # collect_structure.sh のセクション 4・5 をまとめて出力する
+    print("## 依存関係マップ (import/export)")
+    print_dependency_map(dependency_map(records))
+    print()
+    print("## ファイルサイズ Top 20（大きいファイル=重要度が高い可能性）")
+    print_line_counts(records)
+    print()
+    print("## 主要エクスポート・関数シグネチャ")
+    print_signatures(signature_map(records))
+
+if __name__ == '__main__':
+    main()
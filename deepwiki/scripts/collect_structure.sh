@@ -197,9 +197,9 @@ list_files | grep -E '(^|/)(README\.md|README)$' | head -3 | while read -r file;
 done
 echo '```'
 
-# --- セクション 4: 依存関係マップ ---
+# --- セクション 4・5: 依存関係マップ / ファイルサイズ Top 20 / エクスポート情報 ---
+# code_scanner.py が各ソースファイルを1回だけ読んで解析し、3つのセクションをまとめて出力する
 echo ""
-echo "## 依存関係マップ (import/export)"
 
 # 仮想環境のPythonがあれば優先して使用する
 PYTHON_CMD="python3"
@@ -209,24 +209,7 @@ fi
 
 PYTHON_EXTRA_ARGS=""
 $EXCLUDE_TESTS && PYTHON_EXTRA_ARGS="--exclude-tests"
-$PYTHON_CMD "$DEEPWIKI_DIR/scripts/analyze_dependencies.py" "$TARGET_DIR" $PYTHON_EXTRA_ARGS 2>/dev/null || true
-echo ""
-
-echo "## ファイルサイズ Top 20（大きいファイル=重要度が高い可能性）"
-echo '```'
-set +o pipefail
-list_files | filter_binary | filter_tests | \
-  grep -E '\.(ts|tsx|js|jsx|py|rs|go|java|rb|cs|cpp|c|swift|kt|vue|svelte|php|dart)$' | \
-  xargs wc -l 2>/dev/null | sort -rn | head -21 | \
-  (grep -v ' total$' || true) | \
-  sed "s|$TARGET_DIR/||" || echo "(集計に失敗しました)"
-set -o pipefail
-echo '```'
-
-# --- セクション 5: エクスポート情報 ---
-echo ""
-echo "## 主要エクスポート・関数シグネチャ"
-$PYTHON_CMD "$DEEPWIKI_DIR/scripts/extract_signatures.py" "$TARGET_DIR" $PYTHON_EXTRA_ARGS 2>/dev/null || true
+$PYTHON_CMD "$DEEPWIKI_DIR/scripts/code_scanner.py" "$TARGET_DIR" $PYTHON_EXTRA_ARGS --jobs 0 2>/dev/null || true
 
 echo ""
 echo "=== 分析完了 ==="
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Wiki 全体の出典カバレッジマップを作成するスクリプト。
+
+全ページの Sources 行の `(file:///path#Lx-Ly)` リンクとスニペット先頭の `path:Lx-Ly` 出典を
+source_index.extract_citations で集め、ソースファイルごとに行区間をマージして
+「Wiki がコードベースのどの行を説明しているか」を集計する。
+
+- ファイルごと / ディレクトリごとの行カバレッジ
+- outline.json のページごとの出典行数と、担当ファイル (filePaths) のカバレッジ
+- 行数の多いファイルのうち一度も引用されていないもの
+  （code_scanner.py の iter_files / classify で、collect_structure.sh の「ファイルサイズ Top 20」と同じファイルを対象にする）
+
+区間はファイルごとにソートして1回の走査でマージするため、出典数 k に対して O(k log k)、
+ファイル行数の集計はファイル数に対して線形で、数万ファイルのリポジトリでも数秒で終わる。
+fix_sources.py で file:/// リンクを変換する前のページに対して実行する。
+
+使用方法:
+    python3 scripts/coverage_map.py $OUTPUT_DIR/outline.json [--top N] [--depth N] [--exclude-tests] [--format text|json]
+"""
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from code_scanner import classify, iter_files
+from source_index import extract_citations, get_source_index, load_source_roots
+
+Interval = Tuple[int, int]
+
+
+def list_source_files(root: str, exclude_tests: bool) -> List[str]:
+    """root 以下のソースファイルを相対パスで返す。
+    列挙と対象の判定は code_scanner.py（collect_structure.sh の「ファイルサイズ Top 20」）と共通。
+    """
+    root_path = Path(root)
+    rel_paths = []
+    for filepath in iter_files(root_path):
+        rel_path = str(filepath.relative_to(root_path))
+        if classify(filepath, rel_path, exclude_tests) is not None:
+            rel_paths.append(rel_path)
+    return rel_paths
+
+
+def count_lines(abs_path: str) -> int:
+    """行数（末尾に改行のない最終行も1行と数える。source_index の行番号と同じ数え方）"""
+    lines = 0
+    last = b'\n'
+    try:
+        with open(abs_path, 'rb') as f:
+            while True:
+                chunk = f.read(1 << 20)
+                if not chunk:
+                    break
+                lines += chunk.count(b'\n')
+                last = chunk[-1:]
+    except OSError:
+        return 0
+    return lines + (0 if last == b'\n' else 1)
+
+
+def merge_intervals(intervals: List[Interval]) -> List[Interval]:
+    """閉区間 [start, end] のリストをソートして、重なる・隣接する区間をまとめる"""
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def covered_lines(merged: List[Interval]) -> int:
+    return sum(end - start + 1 for start, end in merged)
+
+
+def ratio(covered: int, total: int) -> float:
+    return round(covered / total * 100, 1) if total else 0.0
+
+
+class CoverageMap:
+    """ソースファイルごとの引用行区間と行数"""
+
+    def __init__(self, roots: List[str]):
+        self.roots = roots
+        self.index = get_source_index(tuple(roots))
+        self.intervals: Dict[str, List[Interval]] = {}  # 絶対パス → 引用区間（未マージ）
+        self.loc: Dict[str, int] = {}                    # 絶対パス → 行数
+        self.unresolved = 0
+
+    def display_path(self, abs_path: str) -> str:
+        """最初のルートからの相対パス。追加ルートのファイルはルート名を先頭に付ける"""
+        for i, root in enumerate(self.roots):
+            if abs_path.startswith(root + os.sep):
+                rel = abs_path[len(root) + 1:]
+                return rel if i == 0 else os.path.join(os.path.basename(root), rel)
+        return abs_path
+
+    def add_page(self, text: str) -> Dict[str, List[Interval]]:
+        """ページの出典を登録し、そのページ分の区間（ファイルごと・マージ済み）を返す"""
+        page: Dict[str, List[Interval]] = {}
+        for c in extract_citations(text):
+            abs_path = self.index.resolve(c.path)
+            if abs_path is None:
+                self.unresolved += 1
+                continue
+            if abs_path not in self.loc:
+                self.loc[abs_path] = self.index.line_count(abs_path)
+            total = self.loc[abs_path]
+            start, end = max(c.start, 1), min(c.end, total)
+            if start > end:
+                continue
+            page.setdefault(abs_path, []).append((start, end))
+            self.intervals.setdefault(abs_path, []).append((start, end))
+        return {path: merge_intervals(iv) for path, iv in page.items()}
+
+    def scan_sources(self, exclude_tests: bool) -> None:
+        """全ルートのソースファイルの行数を集計する。
+        ページの出典より先に呼び、引用されたファイルの行数を数え直さないようにする。
+        対象拡張子以外でも引用されたファイルは add_page で行数を追加する。
+        """
+        for root in self.roots:
+            for rel in list_source_files(root, exclude_tests):
+                abs_path = os.path.join(root, rel)
+                self.loc[abs_path] = count_lines(abs_path)
+
+    def file_rows(self) -> List[dict]:
+        rows = []
+        for abs_path, loc in self.loc.items():
+            merged = merge_intervals(self.intervals.get(abs_path, []))
+            covered = covered_lines(merged)
+            rows.append({
+                'path': self.display_path(abs_path),
+                'loc': loc,
+                'covered': covered,
+                'coverage': ratio(covered, loc),
+                'ranges': [f"L{s}-L{e}" for s, e in merged],
+            })
+        return sorted(rows, key=lambda r: r['path'])
+
+    @staticmethod
+    def directory_rows(files: List[dict], depth: int) -> List[dict]:
+        """ファイルの集計をディレクトリ（先頭から depth 階層まで）ごとに合算する"""
+        dirs: Dict[str, List[int]] = {}
+        for row in files:
+            parts = row['path'].split(os.sep)[:-1]
+            for level in range(0, min(depth, len(parts)) + 1):
+                key = os.sep.join(parts[:level]) or '.'
+                acc = dirs.setdefault(key, [0, 0, 0, 0])  # loc, covered, files, cited files
+                acc[0] += row['loc']
+                acc[1] += row['covered']
+                acc[2] += 1
+                acc[3] += 1 if row['covered'] else 0
+        return [
+            {'directory': d, 'loc': loc, 'covered': cov, 'coverage': ratio(cov, loc),
+             'files': n, 'cited_files': cited}
+            for d, (loc, cov, n, cited) in sorted(dirs.items())
+        ]
+
+
+def build_report(outline_path: str, top: int, depth: int, exclude_tests: bool) -> dict:
+    with open(outline_path, 'r', encoding='utf-8') as f:
+        outline = json.load(f)
+    wiki_dir = os.path.dirname(outline_path)
+    roots = list(load_source_roots(wiki_dir))
+    if not roots:
+        print("Error: outline.json の targetDir（対象リポジトリ）が見つかりません。")
+        sys.exit(1)
+
+    cmap = CoverageMap(roots)
+    cmap.scan_sources(exclude_tests)
+    pages = []
+    for page in outline.get('pages', []):
+        filename = page.get('filename')
+        file_path = os.path.join(wiki_dir, filename) if filename else None
+        if not file_path or not os.path.exists(file_path):
+            continue
+        with open(file_path, 'r', encoding='utf-8') as f:
+            page_intervals = cmap.add_page(f.read())
+        pages.append((page, page_intervals))
+
+    files = cmap.file_rows()
+
+    page_rows = []
+    for page, page_intervals in pages:
+        # 担当ファイル (filePaths) のうち、このページ自身が引用した行の割合
+        assigned_loc = assigned_covered = 0
+        for path in page.get('filePaths', []):
+            abs_path = cmap.index.resolve(path)
+            if abs_path is None:
+                continue
+            assigned_loc += cmap.loc.get(abs_path) or cmap.index.line_count(abs_path)
+            assigned_covered += covered_lines(page_intervals.get(abs_path, []))
+        page_rows.append({
+            'id': page.get('id'),
+            'title': page.get('title'),
+            'cited_files': len(page_intervals),
+            'cited_lines': sum(covered_lines(iv) for iv in page_intervals.values()),
+            'assigned_files': len(page.get('filePaths', [])),
+            'assigned_coverage': ratio(assigned_covered, assigned_loc),
+        })
+
+    total_loc = sum(r['loc'] for r in files)
+    total_covered = sum(r['covered'] for r in files)
+    uncovered = sorted((r for r in files if r['covered'] == 0 and r['loc'] > 0),
+                       key=lambda r: (-r['loc'], r['path']))
+    return {
+        'summary': {
+            'files': len(files),
+            'cited_files': sum(1 for r in files if r['covered']),
+            'loc': total_loc,
+            'covered': total_covered,
+            'coverage': ratio(total_covered, total_loc),
+            'pages': len(page_rows),
+            'unresolved_citations': cmap.unresolved,
+        },
+        'uncovered_large_files': [{'path': r['path'], 'loc': r['loc']} for r in uncovered[:top]],
+        'directories': CoverageMap.directory_rows(files, depth),
+        'pages': page_rows,
+        'files': [r for r in files if r['covered']],
+    }
+
+
+def format_report(report: dict, top: int) -> str:
+    s = report['summary']
+    lines = [
+        "=" * 60,
+        "📚 Wiki 出典カバレッジ",
+        "=" * 60,
+        f"ソースファイル: {s['files']} 件（引用あり {s['cited_files']} 件）",
+        f"行カバレッジ: {s['covered']}/{s['loc']} 行 ({s['coverage']}%)",
+        f"ページ: {s['pages']} 件 / 解決できない出典: {s['unresolved_citations']} 件",
+        "",
+        f"## 引用されていない大きなファイル (行数 Top {top})",
+    ]
+    for r in report['uncovered_large_files']:
+        lines.append(f"  {r['loc']:>7}  {r['path']}")
+    if not report['uncovered_large_files']:
+        lines.append("  (なし)")
+
+    lines += ["", "## ディレクトリ別", f"  {'カバー率':>7} {'引用行/行数':>15} {'ファイル':>9}  ディレクトリ"]
+    for r in report['directories']:
+        lines.append(
+            f"  {r['coverage']:>6}% {r['covered']:>7}/{r['loc']:<7} {r['cited_files']:>4}/{r['files']:<4}  {r['directory']}"
+        )
+
+    lines += ["", "## ページ別", f"  {'担当カバー率':>9} {'引用行':>7} {'引用ファイル':>9}  ページ"]
+    for r in report['pages']:
+        lines.append(
+            f"  {r['assigned_coverage']:>8}% {r['cited_lines']:>7} {r['cited_files']:>9}  [{r['id']}] {r['title']}"
+        )
+
+    lines += ["", "## ファイル別（引用ありのみ）"]
+    for r in sorted(report['files'], key=lambda r: (-r['coverage'], r['path'])):
+        ranges = ', '.join(r['ranges'][:6]) + (' ...' if len(r['ranges']) > 6 else '')
+        lines.append(f"  {r['coverage']:>6}% {r['covered']:>6}/{r['loc']:<6} {r['path']}  [{ranges}]")
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DeepWiki citation coverage map")
+    parser.add_argument("outline_json", help="Path to the outline.json file")
+    parser.add_argument("--top", type=int, default=20, help="引用されていない大きなファイルの表示件数（既定 20）")
+    parser.add_argument("--depth", type=int, default=2, help="ディレクトリ別集計の階層数（既定 2）")
+    parser.add_argument("--exclude-tests", action="store_true", help="テストファイルを集計から除外する")
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="出力形式")
+    args = parser.parse_args()
+
+    outline_path = os.path.abspath(args.outline_json)
+    if not os.path.exists(outline_path):
+        print(f"Error: outline.json not found at {outline_path}")
+        sys.exit(1)
+
+    report = build_report(outline_path, args.top, args.depth, args.exclude_tests)
+    if args.format == 'json':
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(report, args.top))
+
+
+if __name__ == "__main__":
+    main()
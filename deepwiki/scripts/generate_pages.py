@@ -226,9 +226,21 @@ def extract_critical_feedback(validation_output: str, max_issues: int = 3) -> st
     バリデーション出力から重要なフィードバックのみを抽出して返す。
     安価なモデルに渡す際、長い出力全体ではなく❌ / ⚠️ の指摘に絞ることで
     リトライ時の修正精度を高める。
+    バリデーターの --format json 出力であれば構造化された指摘の severity から選び、
+    それ以外（ファイル未生成時のメッセージ等）はテキスト行から拾う。
     """
-    critical = [l.strip() for l in validation_output.splitlines() if "❌" in l]
-    warnings = [l.strip() for l in validation_output.splitlines() if "⚠️" in l]
+    try:
+        # stderr が後ろに連結されている場合があるため raw_decode で先頭の JSON のみ読む
+        report, _ = json.JSONDecoder().raw_decode(validation_output.lstrip())
+    except ValueError:
+        report = None
+
+    if isinstance(report, dict) and isinstance(report.get("issues"), list):
+        critical = [f"❌ {i['message']}" for i in report["issues"] if i.get("severity") == "error"]
+        warnings = [f"⚠️  {i['message']}" for i in report["issues"] if i.get("severity") != "error"]
+    else:
+        critical = [l.strip() for l in validation_output.splitlines() if "❌" in l]
+        warnings = [l.strip() for l in validation_output.splitlines() if "⚠️" in l]
 
     selected = critical[:max_issues]
     if len(selected) < max_issues:
@@ -322,7 +334,8 @@ async def validate_page(page_file_path: str, importance: str, working_dir: str)
         sys.executable,  # generate_pages.py を呼んだPythonと同じ実行ファイル（.venv/bin/python）を使う
         validate_script,
         page_file_path,
-        "--importance", importance
+        "--importance", importance,
+        "--format", "json",
     ]
 
     try:
@@ -0,0 +1,509 @@
+r"""
+Wiki で使う Mermaid サブセットの字句・構文解析器。
+
+flowchart / graph と sequenceDiagram は文法に沿って1行ずつ解析し、ノード・エッジ・
+メッセージを組み立てながら、規約違反と Mermaid が描画できない構文エラーを
+ブロック内の行・列付きで報告する。それ以外の種類（classDiagram, stateDiagram, erDiagram,
+gantt, pie など）は種類の判定と HTML タグの検出のみ行う。
+
+正規表現で文字列全体を検索する方式と違い、クォートされたラベルの中身を解析対象から
+外せるため `A["foo-bar (x)"]` のような正しい記述を誤検出しない。一方で `A->>B` の
+ラベル欠落や閉じていない subgraph / alt のような、正規表現では拾えない構文エラーを検出できる。
+各行は先頭から1回だけ走査し、戻らないため入力長に対して線形時間で終わる。
+
+fix_mermaid.py と validation_engine.py から import して使う。
+このファイルは deepwiki/scripts と microservices-wiki/scripts に同一内容で置く。
+"""
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+# 先頭行のキーワード（小文字）→ 種類名。validation_engine.MERMAID_TYPES の種類を含む
+DIAGRAM_KEYWORDS = {
+    'graph': 'flowchart', 'flowchart': 'flowchart', 'flowchart-elk': 'flowchart',
+    'sequencediagram': 'sequenceDiagram', 'classdiagram': 'classDiagram',
+    'classdiagram-v2': 'classDiagram', 'statediagram': 'stateDiagram',
+    'statediagram-v2': 'stateDiagram', 'erdiagram': 'erDiagram', 'gantt': 'gantt', 'pie': 'pie',
+    'journey': 'journey', 'gitgraph': 'gitGraph', 'mindmap': 'mindmap', 'timeline': 'timeline',
+    'quadrantchart': 'quadrantChart', 'requirementdiagram': 'requirementDiagram',
+    'c4context': 'C4', 'c4container': 'C4', 'c4component': 'C4', 'c4dynamic': 'C4',
+    'c4deployment': 'C4', 'xychart-beta': 'xychart', 'sankey-beta': 'sankey',
+    'block-beta': 'block', 'packet-beta': 'packet', 'architecture-beta': 'architecture',
+}
+FLOWCHART_DIRECTIONS = {'TB', 'TD', 'BT', 'RL', 'LR'}
+
+# ノードのシェイプ: (開き, 閉じの候補, 規約で許可するか)。開きが長いものから照合する
+NODE_SHAPES = [
+    ('(((', (')))',), False), ('((', ('))',), False), ('([', ('])',), False),
+    ('[[', (']]',), False), ('[(', (')]',), False), ('[/', ('/]', '\\]'), False),
+    ('[\\', ('\\]', '/]'), False), ('{{', ('}}',), False),
+    ('[', (']',), True), ('(', (')',), True), ('{', ('}',), True), ('>', (']',), False),
+]
+SHAPE_OPENERS = '[({>'
+# クォートしていないラベルに含まれると Mermaid の字句解析を壊す文字
+LABEL_SPECIAL_CHARS = '()[]{}|"'
+
+NODE_ID_RE = re.compile(r'\w+(?:-\w+)*')
+CLASS_SUFFIX_RE = re.compile(r':::\w+')
+# 矢印（ラベルなし）: --> --- --x --o ==> === -.-> -.- ~~~ と、先頭の < （双方向）
+LINK_HEAD = r'(?:>|[xo](?!\w))'
+LINK_RE = re.compile(rf'<?(?:-{{2,}}{LINK_HEAD}?|={{2,}}{LINK_HEAD}?|-\.+-{LINK_HEAD}?|~{{3,}})')
+# ラベル付き矢印の開き (-- text -->, == text ==>, -. text .->) と、それぞれの閉じ
+TEXT_LINK_OPENERS = [
+    ('<--', re.compile(rf'-{{2,}}{LINK_HEAD}|-{{3,}}')), ('<==', re.compile(rf'={{2,}}{LINK_HEAD}|={{3,}}')),
+    ('--', re.compile(rf'-{{2,}}{LINK_HEAD}|-{{3,}}')), ('==', re.compile(rf'={{2,}}{LINK_HEAD}|={{3,}}')),
+    ('-.', re.compile(rf'\.+-{LINK_HEAD}?')),
+]
+FLOWCHART_SKIP_KEYWORDS = {'classDef', 'class', 'style', 'linkStyle', 'click', 'accTitle', 'accDescr'}
+
+SEQUENCE_ARROW_RE = re.compile(r'(?:<<)?-{1,2}(?:>>|>|\))')
+# -x / --x は参加者名の途中（db-x など）にも現れるため、他の矢印がない場合のみ使う
+SEQUENCE_CROSS_ARROW_RE = re.compile(r'-{1,2}x')
+SEQUENCE_BLOCK_KEYWORDS = {'loop', 'alt', 'opt', 'par', 'critical', 'break', 'rect', 'box'}
+SEQUENCE_BRANCH_KEYWORDS = {'else', 'and', 'option'}
+SEQUENCE_SKIP_KEYWORDS = {
+    'autonumber', 'activate', 'deactivate', 'destroy', 'title', 'accTitle', 'accDescr',
+    'link', 'links', 'properties', 'details',
+}
+NOTE_RE = re.compile(r'[Nn]ote\s+(?:left of|right of|over)\s+[^:]+:')
+HTML_TAG_START_RE = re.compile(r'</?[a-zA-Z]')  # 開きタグと閉じタグ
+
+
+@dataclass
+class Diagnostic:
+    """1件の違反。line / column はブロック内の 1 始まりの位置、end_column は違反箇所の直後の列"""
+    rule: str  # lr_layout / hyphen_id / unquoted_label / shape / html_tag /
+    #            sequence_pipe_label / sequence_empty_label / syntax
+    line: int
+    column: int
+    end_column: int
+    message: str
+    text: str = ""  # 違反箇所の原文
+
+
+@dataclass
+class Node:
+    id: str
+    line: int
+    column: int
+    shape: Optional[str] = None  # 開き括弧 ('[' など)。参照のみの場合は None
+    label: Optional[str] = None
+    quoted: bool = False
+
+
+@dataclass
+class Subgraph:
+    name: str
+    start_line: int
+    end_line: int = 0  # 対応する end の行。閉じていなければ 0
+
+
+@dataclass
+class MermaidDiagram:
+    """解析結果"""
+    kind: str  # flowchart / sequenceDiagram / classDiagram ... / unknown / empty
+    direction: Optional[str] = None
+    nodes: List[Node] = field(default_factory=list)
+    edges: List[Tuple[str, str]] = field(default_factory=list)
+    subgraphs: List[Subgraph] = field(default_factory=list)
+    participants: List[str] = field(default_factory=list)
+    messages: List[Tuple[str, str, str]] = field(default_factory=list)  # (送信元, 送信先, ラベル)
+    diagnostics: List[Diagnostic] = field(default_factory=list)
+
+
+class _LineError(Exception):
+    """行内の構文エラー。その行の残りは解析しない"""
+
+    def __init__(self, column: int, message: str, end_column: Optional[int] = None):
+        super().__init__(message)
+        self.column = column
+        self.end_column = end_column if end_column is not None else column + 1
+        self.message = message
+
+
+def _skip_spaces(s: str, i: int) -> int:
+    while i < len(s) and s[i] in ' \t':
+        i += 1
+    return i
+
+
+def _report(diagram: MermaidDiagram, rule: str, lineno: int, s: str, start: int, end: int,
+            message: str) -> None:
+    diagram.diagnostics.append(Diagnostic(
+        rule=rule, line=lineno, column=start + 1, end_column=end + 1, message=message, text=s[start:end],
+    ))
+
+
+# --- flowchart ---
+
+def _parse_shape(s: str, i: int, lineno: int, diagram: MermaidDiagram) -> Tuple[int, str, str, bool]:
+    """i の位置から始まるシェイプを解析し (終了位置, 開き, ラベル, クォート有無) を返す"""
+    for opener, closers, allowed in NODE_SHAPES:
+        if s.startswith(opener, i):
+            break
+    else:
+        raise _LineError(i + 1, "ノードのシェイプを解釈できません")
+
+    start = i
+    k = i + len(opener)
+    q = _skip_spaces(s, k)
+    if q < len(s) and s[q] == '"':
+        # クォートされたラベル: 次の " までがラベル。その後ろに閉じ括弧が必要
+        close_quote = s.find('"', q + 1)
+        if close_quote == -1:
+            raise _LineError(q + 1, "ラベルのダブルクォートが閉じられていません")
+        label = s[q + 1:close_quote]
+        k = _skip_spaces(s, close_quote + 1)
+        closer = next((c for c in closers if s.startswith(c, k)), None)
+        if closer is None:
+            raise _LineError(k + 1, f"クォートされたラベルの後に '{closers[0]}' が必要です")
+        end = k + len(closer)
+        quoted = True
+    else:
+        # クォートなし: 入れ子の括弧を数えながら、深さ 0 の閉じ括弧を探す
+        depth = 0
+        special = -1
+        p = k
+        closer = None
+        while p < len(s):
+            if depth == 0:
+                closer = next((c for c in closers if s.startswith(c, p)), None)
+                if closer is not None:
+                    break
+            ch = s[p]
+            if ch in '([{':
+                depth += 1
+            elif ch in ')]}' and depth > 0:
+                depth -= 1
+            if ch in LABEL_SPECIAL_CHARS and special == -1:
+                special = p
+            p += 1
+        if closer is None:
+            raise _LineError(start + 1, f"ノードの閉じ括弧 '{closers[0]}' がありません", len(s) + 1)
+        label = s[k:p]
+        end = p + len(closer)
+        quoted = False
+        if special != -1:
+            _report(diagram, 'unquoted_label', lineno, s, k, p,
+                    f"ノードラベル内に記号 {s[special]} が含まれているのにクォートされていません: "
+                    f"{s[start:end]}。必ず {opener}\"ラベル\"{closer} 形式を使用してください。")
+
+    if not allowed:
+        _report(diagram, 'shape', lineno, s, start, end,
+                f"使用禁止のノードシェイプ {opener}...{closer} が使われています: {s[start:end]}。"
+                "A[ラベル] / A(ラベル) / A{ラベル} のいずれかを使用してください。")
+    return end, opener, label, quoted
+
+
+def _parse_node(s: str, i: int, lineno: int, diagram: MermaidDiagram) -> Tuple[int, str]:
+    m = NODE_ID_RE.match(s, i)
+    if not m:
+        found = f"'{s[i]}' があります" if i < len(s) else "行が終わっています"
+        raise _LineError(i + 1, f"ノードIDが必要な位置で{found}")
+    node_id = m.group()
+    if '-' in node_id:
+        _report(diagram, 'hyphen_id', lineno, s, m.start(), m.end(),
+                f"ノードID {node_id} にハイフンが含まれています。"
+                f"アンダースコアに置き換えてください（例: {node_id} → {node_id.replace('-', '_')}）。")
+    node = Node(id=node_id, line=lineno, column=i + 1)
+    j = m.end()
+    k = _skip_spaces(s, j)
+    if k < len(s) and s[k] in SHAPE_OPENERS and not LINK_RE.match(s, k):
+        j, node.shape, node.label, node.quoted = _parse_shape(s, k, lineno, diagram)
+    c = CLASS_SUFFIX_RE.match(s, j)
+    if c:
+        j = c.end()
+    diagram.nodes.append(node)
+    return j, node_id
+
+
+def _parse_link(s: str, i: int) -> Optional[int]:
+    """i の位置の矢印（ラベル付きを含む）を読み、終了位置を返す。矢印でなければ None"""
+    m = LINK_RE.match(s, i)
+    plain_end = m.end() if m else i
+    for opener, closing in TEXT_LINK_OPENERS:
+        # "--" や "-." だけで矢じりが続かない場合はラベル付き矢印の開き
+        if s.startswith(opener, i) and plain_end <= i + len(opener):
+            closed = closing.search(s, i + len(opener))
+            if not closed:
+                raise _LineError(i + 1, f"ラベル付きの矢印 {opener} ... が閉じられていません")
+            return closed.end()
+    return plain_end if m else None
+
+
+def _parse_flowchart_statement(s: str, i: int, lineno: int, diagram: MermaidDiagram) -> int:
+    """ノード (& ノード)* (矢印 [|ラベル|] ノード (& ノード)*)* を読み、文の終了位置を返す"""
+    previous: List[str] = []
+    while True:
+        current = []
+        while True:
+            i, node_id = _parse_node(s, _skip_spaces(s, i), lineno, diagram)
+            current.append(node_id)
+            k = _skip_spaces(s, i)
+            if k < len(s) and s[k] == '&':
+                i = k + 1
+                continue
+            break
+        diagram.edges.extend((a, b) for a in previous for b in current)
+        previous = current
+
+        i = _skip_spaces(s, i)
+        if i >= len(s) or s[i] == ';' or s.startswith('%%', i):
+            return i
+        end = _parse_link(s, i)
+        if end is None:
+            raise _LineError(i + 1, f"矢印または行末が必要な位置に '{s[i]}' があります")
+        i = _skip_spaces(s, end)
+        if i < len(s) and s[i] == '|':
+            # クォートされたラベル（|"a | b"|）の中の | は区切りとみなさない
+            label = _skip_spaces(s, i + 1)
+            search_from = i + 1
+            if label < len(s) and s[label] == '"':
+                quote = s.find('"', label + 1)
+                if quote == -1:
+                    raise _LineError(label + 1, "エッジラベルのダブルクォートが閉じられていません")
+                search_from = quote + 1
+            close = s.find('|', search_from)
+            if close == -1:
+                raise _LineError(i + 1, "エッジラベルの | が閉じられていません")
+            i = close + 1
+        if _skip_spaces(s, i) >= len(s):
+            raise _LineError(i + 1, "矢印の後にノードが必要です")
+
+
+def _parse_flowchart_line(s: str, lineno: int, diagram: MermaidDiagram, subgraphs: List[int]) -> None:
+    i = 0
+    while True:
+        i = _skip_spaces(s, i)
+        if i >= len(s) or s.startswith('%%', i):
+            return
+        if s[i] == ';':
+            i += 1
+            continue
+        word = NODE_ID_RE.match(s, i)
+        keyword = word.group() if word else ''
+        after = word.end() if word else i
+        rest_starts = after >= len(s) or s[after] in ' \t;'
+        if keyword == 'subgraph' and rest_starts:
+            subgraphs.append(lineno)
+            subgraph = Subgraph(name=s[after:].strip(), start_line=lineno)
+            diagram.subgraphs.append(subgraph)
+            title = _skip_spaces(s, after)
+            if title < len(s) and s[title] not in ';':
+                # subgraph ID[タイトル] / subgraph "タイトル" / subgraph タイトル
+                if s[title] == '"':
+                    close = s.find('"', title + 1)
+                    if close == -1:
+                        raise _LineError(title + 1, "subgraph のタイトルのダブルクォートが閉じられていません")
+                    subgraph.name = s[title + 1:close]
+                else:
+                    m = NODE_ID_RE.match(s, title)
+                    bracket = _skip_spaces(s, m.end()) if m else len(s)
+                    if bracket < len(s) and s[bracket] in SHAPE_OPENERS:
+                        subgraph.name = _parse_shape(s, bracket, lineno, diagram)[2].strip('" ')
+            return
+        if keyword == 'end' and rest_starts:
+            if not subgraphs:
+                raise _LineError(i + 1, "対応する subgraph のない end があります", after + 1)
+            opened = subgraphs.pop()
+            for subgraph in reversed(diagram.subgraphs):
+                if subgraph.start_line == opened:
+                    subgraph.end_line = lineno
+                    break
+            i = after
+            continue
+        if keyword == 'direction' and rest_starts:
+            d = _skip_spaces(s, after)
+            m = NODE_ID_RE.match(s, d)
+            value = m.group() if m else ''
+            if value not in FLOWCHART_DIRECTIONS:
+                raise _LineError(d + 1, f"direction の値が不正です: {value or '(なし)'}")
+            if value == 'LR':
+                _report(diagram, 'lr_layout', lineno, s, d, m.end(),
+                        "subgraph で direction LR が使用されています。必ず TD を使用してください。")
+            i = m.end()
+            continue
+        if keyword in FLOWCHART_SKIP_KEYWORDS and rest_starts:
+            return
+        i = _parse_flowchart_statement(s, i, lineno, diagram)
+
+
+def _parse_flowchart_header(s: str, start: int, lineno: int, diagram: MermaidDiagram) -> None:
+    i = _skip_spaces(s, start)
+    if i >= len(s) or s[i] == ';':
+        return
+    m = NODE_ID_RE.match(s, i)
+    direction = m.group() if m else s[i]
+    if direction not in FLOWCHART_DIRECTIONS:
+        raise _LineError(i + 1, f"フローチャートの向きが不正です: {direction}")
+    diagram.direction = direction
+    if direction == 'LR':
+        _report(diagram, 'lr_layout', lineno, s, i, m.end(),
+                "LRレイアウトが使用されています（graph LR / flowchart LR）。必ず TD を使用してください。")
+
+
+# --- sequenceDiagram ---
+
+def find_sequence_arrow(s: str, start: int = 0) -> Optional[re.Match]:
+    """メッセージ行の矢印を返す。参加者名にコロンは含まれないため、最初のコロンより前だけを探す"""
+    colon = s.find(':', start)
+    end = colon if colon != -1 else len(s)
+    return SEQUENCE_ARROW_RE.search(s, start, end) or SEQUENCE_CROSS_ARROW_RE.search(s, start, end)
+
+
+def _parse_sequence_line(s: str, lineno: int, diagram: MermaidDiagram, blocks: List[int]) -> None:
+    i = _skip_spaces(s, 0)
+    stripped = s[i:].rstrip()
+    if not stripped or stripped.startswith('%%'):
+        return
+    word = NODE_ID_RE.match(s, i)
+    keyword = word.group() if word else ''
+    rest = s[word.end():].strip() if word else stripped
+
+    if keyword in ('participant', 'actor') or \
+       (keyword == 'create' and rest.split(' ', 1)[0] in ('participant', 'actor')):
+        if keyword == 'create':
+            rest = rest.split(' ', 1)[1].strip() if ' ' in rest else ''
+        name = rest.split(' as ', 1)[0].strip()
+        if not name:
+            raise _LineError(i + 1, f"{keyword} の後に参加者名が必要です", len(s) + 1)
+        if '-' in name:
+            start = s.index(name, i)
+            _report(diagram, 'hyphen_id', lineno, s, start, start + len(name),
+                    f"参加者名 {name} にハイフンが含まれています。"
+                    f"アンダースコアに置き換えてください（例: {name} → {name.replace('-', '_')}）。")
+        diagram.participants.append(name)
+        return
+    if keyword in SEQUENCE_BLOCK_KEYWORDS:
+        blocks.append(lineno)
+        return
+    if keyword in SEQUENCE_BRANCH_KEYWORDS:
+        if not blocks:
+            raise _LineError(i + 1, f"{keyword} が alt / par / critical の外にあります", word.end() + 1)
+        return
+    if keyword == 'end' and not rest:
+        if not blocks:
+            raise _LineError(i + 1, "対応する loop / alt / opt などのない end があります", word.end() + 1)
+        blocks.pop()
+        return
+    if keyword in SEQUENCE_SKIP_KEYWORDS:
+        return
+    if keyword.lower() == 'note':
+        if not NOTE_RE.match(s, i):
+            raise _LineError(i + 1, "Note は `Note right of A: テキスト` の形式で記述してください", len(s) + 1)
+        return
+
+    pipe = s.find('--|', i)
+    if pipe != -1:
+        close = s.find('|', pipe + 3)
+        end = close + 1 if close != -1 else len(s)
+        _report(diagram, 'sequence_pipe_label', lineno, s, pipe, end,
+                "シーケンス図でフローチャート風の記法 A--|label|-->B が使われています。"
+                "コロン記法（A->>B: label）を使用してください。")
+        return
+
+    arrow = find_sequence_arrow(s, i)
+    if not arrow:
+        raise _LineError(i + 1, f"シーケンス図の行として解釈できません: {stripped}", len(s) + 1)
+    sender = s[i:arrow.start()].strip()
+    if not sender:
+        raise _LineError(arrow.start() + 1, "メッセージの送信元がありません", arrow.end() + 1)
+    colon = s.find(':', arrow.end())
+    target_end = colon if colon != -1 else len(s)
+    target = s[arrow.end():target_end].strip().lstrip('+-').strip()
+    if not target:
+        raise _LineError(arrow.end() + 1, "メッセージの送信先がありません", target_end + 1)
+    for name in (sender, target):
+        if '-' in name:
+            start = s.index(name, i)
+            _report(diagram, 'hyphen_id', lineno, s, start, start + len(name),
+                    f"参加者名 {name} にハイフンが含まれています。"
+                    f"アンダースコアに置き換えてください（例: {name} → {name.replace('-', '_')}）。")
+    if colon == -1:
+        raise _LineError(len(s.rstrip()) + 1, "メッセージ行にはコロン（:）とラベルが必要です（例: A->>B: request）")
+    label = s[colon + 1:].strip()
+    if not label:
+        _report(diagram, 'sequence_empty_label', lineno, s, colon, colon + 1,
+                "シーケンス図のメッセージ行でコロン（:）の後のラベルが空です（例: `A->>B:`）。"
+                "パースエラーの原因になります。"
+                "戻り値がない場合は `void`、成功応答は `OK` または `完了` などを記載してください。")
+    diagram.messages.append((sender, target, label))
+
+
+# --- 共通 ---
+
+def _find_html_tags(s: str, lineno: int, diagram: MermaidDiagram) -> None:
+    """行内の <tag ...> と </tag> を報告する。'>' が見つからなければ以降の '<' も閉じないので打ち切る"""
+    pos = 0
+    while True:
+        m = HTML_TAG_START_RE.search(s, pos)
+        if not m:
+            return
+        close = s.find('>', m.end())
+        if close == -1:
+            return
+        _report(diagram, 'html_tag', lineno, s, m.start(), close + 1,
+                f"HTMLタグ {s[m.start():close + 1]} が使用されています（< > 記号）。"
+                "Mermaidでは使用不可のため削除してください。")
+        pos = close + 1
+
+
+def parse(block: str) -> MermaidDiagram:
+    """Mermaid ブロックのコード（```mermaid の内側）を解析する"""
+    lines = block.split('\n')
+    diagram = MermaidDiagram(kind='empty')
+    handler = None
+    open_scopes: List[int] = []  # 閉じていない subgraph / loop などの開始行
+    header_seen = False
+    in_frontmatter = False
+
+    for index, s in enumerate(lines):
+        lineno = index + 1
+        stripped = s.strip()
+        if not header_seen:
+            # 先頭の空行・コメント・%%{init}%% ディレクティブ・YAML フロントマターを飛ばす
+            if stripped == '---':
+                in_frontmatter = not in_frontmatter
+                continue
+            if in_frontmatter or not stripped or stripped.startswith('%%'):
+                continue
+            header_seen = True
+            i = len(s) - len(s.lstrip())
+            word = re.match(r'[\w-]+', stripped)
+            keyword = word.group() if word else ''
+            diagram.kind = DIAGRAM_KEYWORDS.get(keyword.lower(), 'unknown')
+            if diagram.kind == 'unknown':
+                _report(diagram, 'syntax', lineno, s, i, i + max(len(keyword), 1),
+                        f"Mermaid ダイアグラムの種類を判別できません: {keyword or stripped[:1]}")
+            try:
+                if diagram.kind == 'flowchart':
+                    _parse_flowchart_header(s, i + len(keyword), lineno, diagram)
+                    handler = _parse_flowchart_line
+                elif diagram.kind == 'sequenceDiagram':
+                    handler = _parse_sequence_line
+            except _LineError as e:
+                diagram.diagnostics.append(Diagnostic('syntax', lineno, e.column, e.end_column, e.message,
+                                                      s[e.column - 1:e.end_column - 1]))
+            _find_html_tags(s, lineno, diagram)
+            continue
+
+        if not stripped.startswith('%%'):
+            _find_html_tags(s, lineno, diagram)
+        if handler is None:
+            continue
+        try:
+            handler(s, lineno, diagram, open_scopes)
+        except _LineError as e:
+            diagram.diagnostics.append(Diagnostic(
+                'syntax', lineno, e.column, e.end_column, f"構文エラー: {e.message}",
+                s[e.column - 1:e.end_column - 1],
+            ))
+
+    if diagram.kind == 'empty':
+        _report(diagram, 'syntax', 1, '', 0, 0, "Mermaid ブロックが空です")
+    for opened in open_scopes:
+        scope = lines[opened - 1].strip().split(' ', 1)[0]
+        _report(diagram, 'syntax', opened, lines[opened - 1], 0, len(lines[opened - 1]),
+                f"構文エラー: {scope} に対応する end がありません")
+    diagram.diagnostics.sort(key=lambda d: (d.line, d.column))
+    return diagram
@@ -0,0 +1,296 @@
+"""
+Wiki ページ・セクション間の重複（ほぼ同じ説明やスニペットの繰り返し）を MinHash/LSH で検出する。
+
+各ページ（と `## ` 見出しごとのセクション）を次の shingle 集合に変換する。
+- 本文: 英単語・数字・日本語1文字をトークンとした連続 SHINGLE_TOKENS 個の並び
+- コードブロック: 空白を正規化した連続2行（出典コメント行は除く）
+shingle のハッシュ値の範囲を NUM_PERM 個のビンに分けて各ビンの最小値を取り
+（one permutation hashing。空のビンは隣のビンの値で埋める）、集合あたり1回の走査で
+MinHash 署名を作る。署名を LSH_ROWS 個ずつのバンドに分けて同じバケットに入った組だけを
+候補にするため、全組み合わせを比較せずページ数に対してほぼ線形で候補が得られる。
+候補は shingle 集合の正確な Jaccard 係数で確かめる。
+
+validate_page.py --dedupe から使う。
+"""
+import os
+import re
+import json
+import hashlib
+from typing import Dict, List, Optional, Set, Tuple
+
+from validation_engine import CODE_BLOCK_ANY_RE
+
+# MinHash の署名長と LSH のバンド分割（32 バンド × 4 行: Jaccard 0.5 の組を約 87% の確率で候補にする）
+NUM_PERM = 128
+LSH_ROWS = 4
+# 本文の shingle に使うトークン数
+SHINGLE_TOKENS = 5
+# これより shingle が少ないページ・セクション（関連ページの一覧など）は比較しない
+MIN_SHINGLES = 20
+# 既定の類似度のしきい値（Jaccard 係数）
+DEFAULT_THRESHOLD = 0.5
+
+TOKEN_RE = re.compile(r'[a-z0-9_]+|[\u3040-\u309F\u30A0-\u30FF\u3400-\u9FFF]')
+SOURCES_LINE_RE = re.compile(r'^\*\*Sources:\*\*.*$', re.MULTILINE)
+CITATION_COMMENT_RE = re.compile(r'^(?://|#|--)\s*\S+:\s*L\d+')
+
+# 64bit ハッシュの上位ビットをビン番号、残りをビン内の値として使う
+_BIN_SHIFT = 64 - (NUM_PERM - 1).bit_length()
+_VALUE_MASK = (1 << _BIN_SHIFT) - 1
+
+
+_HASH_MASK = (1 << 64) - 1
+_PROSE, _CODE = 1, 2
+_token_hashes: Dict[str, int] = {}
+
+
+def _token_hash(token: str) -> int:
+    """トークン（単語・コード行）の 64bit ハッシュ。同じトークンは1度だけ計算する"""
+    h = _token_hashes.get(token)
+    if h is None:
+        h = int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+        _token_hashes[token] = h
+    return h
+
+
+def _shingle_hashes(kind: int, tokens: List[str], k: int) -> Set[int]:
+    """連続 k トークンの shingle のハッシュ集合。
+    int のタプルの hash() は実行ごとに変わらないため、トークンのハッシュの組から求める。
+    """
+    hs = [_token_hash(t) for t in tokens]
+    return {
+        hash((kind,) + tuple(hs[i:i + k])) & _HASH_MASK
+        for i in range(max(len(hs) - k + 1, 1 if hs else 0))
+    }
+
+
+def shingles(text: str) -> Set[int]:
+    """本文とコードブロックの shingle のハッシュ集合"""
+    result = set()
+    for block in CODE_BLOCK_ANY_RE.findall(text):
+        lines = [' '.join(line.split()) for line in block.split('\n')[1:]]
+        lines = [line for line in lines if line and line != '```' and not CITATION_COMMENT_RE.match(line)]
+        result |= _shingle_hashes(_CODE, lines, 2)
+
+    prose = SOURCES_LINE_RE.sub('', CODE_BLOCK_ANY_RE.sub('', text))
+    result |= _shingle_hashes(_PROSE, TOKEN_RE.findall(prose.lower()), SHINGLE_TOKENS)
+    return result
+
+
+def minhash(hashes: Set[int]) -> Tuple[int, ...]:
+    """one permutation hashing による MinHash 署名（空のビンは右隣の空でないビンから埋める）"""
+    empty = _VALUE_MASK + 1
+    signature = [empty] * NUM_PERM
+    for h in hashes:
+        b = h >> _BIN_SHIFT
+        v = h & _VALUE_MASK
+        if v < signature[b]:
+            signature[b] = v
+    filled = [i for i, v in enumerate(signature) if v != empty]
+    if filled and len(filled) < NUM_PERM:
+        # 借りてきた値には距離を加え、別のビンの値と偶然一致しないようにする
+        nxt = filled[0] + NUM_PERM
+        for i in range(NUM_PERM - 1, -1, -1):
+            if signature[i] != empty:
+                nxt = i
+            elif signature[i] == empty:
+                signature[i] = (nxt - i) * empty + signature[nxt % NUM_PERM]
+    return tuple(signature)
+
+
+def split_sections(text: str) -> List[Tuple[Optional[str], str]]:
+    """`## ` 見出しごとに (見出し, 本文) に分ける（コードブロック内の行は見出しとみなさない）。
+    最初の見出しより前の部分は見出し None として先頭に置く。
+    """
+    sections = []
+    title, body = None, []
+    in_code = False
+    for line in text.split('\n'):
+        if line.startswith('```'):
+            in_code = not in_code
+        if not in_code and line.startswith('## '):
+            sections.append((title, '\n'.join(body)))
+            title, body = line[3:].strip(), []
+        else:
+            body.append(line)
+    sections.append((title, '\n'.join(body)))
+    return sections
+
+
+def find_similar_pairs(items: List[Set[int]], threshold: float,
+                       groups: Optional[List[str]] = None) -> Tuple[int, List[dict]]:
+    """LSH で候補を集め、Jaccard 係数が threshold 以上の組を返す。
+    groups を指定した場合、同じグループ（同じページのセクション同士）の組は除く。
+    Returns: (候補数, [{'a', 'b', 'jaccard', 'overlap', 'shared'}])
+    """
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+    for i, hashes in enumerate(items):
+        if len(hashes) < MIN_SHINGLES:
+            continue
+        signature = minhash(hashes)
+        for band in range(NUM_PERM // LSH_ROWS):
+            key = (band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS])
+            buckets.setdefault(key, []).append(i)
+
+    candidates = set()
+    for members in buckets.values():
+        for x in range(len(members)):
+            for y in range(x + 1, len(members)):
+                a, b = members[x], members[y]
+                if groups is None or groups[a] != groups[b]:
+                    candidates.add((a, b))
+
+    pairs = []
+    for a, b in sorted(candidates):
+        shared = len(items[a] & items[b])
+        jaccard = shared / len(items[a] | items[b])
+        if jaccard >= threshold:
+            pairs.append({
+                'a': a, 'b': b, 'jaccard': jaccard,
+                # 小さい側のうち、もう一方にも含まれる割合
+                'overlap': shared / min(len(items[a]), len(items[b])),
+                'shared': shared,
+            })
+    pairs.sort(key=lambda p: (-p['jaccard'], p['a'], p['b']))
+    return len(candidates), pairs
+
+
+def load_outline_pages(wiki_dir: str) -> Dict[str, dict]:
+    """outline.json のページ情報（ファイル名 → id / title / importance / 並び順）"""
+    try:
+        with open(os.path.join(wiki_dir, 'outline.json'), 'r', encoding='utf-8') as f:
+            outline = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    pages = {}
+    for order, page in enumerate(outline.get('pages', [])):
+        if page.get('filename'):
+            pages[page['filename']] = dict(page, order=order)
+    return pages
+
+
+def merge_suggestions(names: List[str], pairs: List[dict], outline: Dict[str, dict]) -> List[dict]:
+    """類似ページの組をつないだグループごとに、統合先（重要度が高く outline で先のページ）を選ぶ"""
+    parent = list(range(len(names)))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for p in pairs:
+        parent[find(p['a'])] = find(p['b'])
+
+    clusters: Dict[int, List[int]] = {}
+    for p in pairs:
+        for i in (p['a'], p['b']):
+            members = clusters.setdefault(find(i), [])
+            if i not in members:
+                members.append(i)
+
+    rank = {'high': 0, 'medium': 1, 'low': 2}
+
+    def priority(i: int):
+        page = outline.get(names[i], {})
+        return rank.get(page.get('importance'), 1), page.get('order', len(outline)), names[i]
+
+    suggestions = []
+    for members in clusters.values():
+        members.sort(key=priority)
+        suggestions.append({
+            'keep': names[members[0]],
+            'merge': [names[i] for i in members[1:]],
+        })
+    suggestions.sort(key=lambda s: priority(names.index(s['keep'])))
+    return suggestions
+
+
+def analyze(filepaths: List[str], threshold: float = DEFAULT_THRESHOLD) -> dict:
+    """ページ・セクション単位の重複を検出し、統合候補とともに返す"""
+    names = [os.path.basename(fp) for fp in filepaths]
+    page_sets = []
+    section_sets, section_keys = [], []
+    for fp, name in zip(filepaths, names):
+        with open(fp, 'r', encoding='utf-8') as f:
+            text = f.read()
+        # ページの shingle はセクションごとの shingle の和集合（見出しをまたぐ shingle は含めない）
+        page = set()
+        for title, body in split_sections(text):
+            hashes = shingles(body)
+            page |= hashes
+            if title is not None:
+                section_sets.append(hashes)
+                section_keys.append((name, title))
+        page_sets.append(page)
+
+    page_candidates, page_pairs = find_similar_pairs(page_sets, threshold)
+    section_candidates, section_pairs = find_similar_pairs(
+        section_sets, threshold, groups=[name for name, _ in section_keys]
+    )
+    outline = load_outline_pages(os.path.dirname(os.path.abspath(filepaths[0]))) if filepaths else {}
+
+    def pct(value: float) -> float:
+        return round(value * 100, 1)
+
+    return {
+        'threshold': threshold,
+        'pages': len(names),
+        'sections': len(section_keys),
+        'candidates': {'pages': page_candidates, 'sections': section_candidates},
+        'page_pairs': [
+            {'a': names[p['a']], 'b': names[p['b']], 'jaccard': pct(p['jaccard']),
+             'overlap': pct(p['overlap']), 'shared_shingles': p['shared']}
+            for p in page_pairs
+        ],
+        'section_pairs': [
+            {'a': section_keys[p['a']][0], 'a_section': section_keys[p['a']][1],
+             'b': section_keys[p['b']][0], 'b_section': section_keys[p['b']][1],
+             'jaccard': pct(p['jaccard']), 'overlap': pct(p['overlap']), 'shared_shingles': p['shared']}
+            for p in section_pairs
+        ],
+        'merge_suggestions': [
+            dict(s, keep_id=outline.get(s['keep'], {}).get('id'),
+                 merge_ids=[outline.get(n, {}).get('id') for n in s['merge']])
+            for s in merge_suggestions(names, page_pairs, outline)
+        ],
+    }
+
+
+def format_report(report: dict, limit: int = 30) -> str:
+    lines = [
+        "=" * 60,
+        "🔁 重複ページ検出 (MinHash/LSH)",
+        "=" * 60,
+        f"ページ: {report['pages']} 件 / セクション: {report['sections']} 件 / "
+        f"しきい値: Jaccard {report['threshold'] * 100:.0f}% 以上",
+        f"LSH 候補: ページ {report['candidates']['pages']} 組 / セクション {report['candidates']['sections']} 組",
+        "",
+        f"## 類似ページ ({len(report['page_pairs'])} 組)",
+    ]
+    for p in report['page_pairs'][:limit]:
+        lines.append(f"  Jaccard {p['jaccard']:>5}% / 重なり {p['overlap']:>5}%  {p['a']} ↔ {p['b']}")
+    if not report['page_pairs']:
+        lines.append("  (なし)")
+
+    lines += ["", f"## 類似セクション ({len(report['section_pairs'])} 組)"]
+    for p in report['section_pairs'][:limit]:
+        lines.append(
+            f"  Jaccard {p['jaccard']:>5}% / 重なり {p['overlap']:>5}%  "
+            f"{p['a']}「{p['a_section']}」 ↔ {p['b']}「{p['b_section']}」"
+        )
+    if not report['section_pairs']:
+        lines.append("  (なし)")
+    if len(report['section_pairs']) > limit:
+        lines.append(f"  ... 他 {len(report['section_pairs']) - limit} 組")
+
+    if report['merge_suggestions']:
+        lines += ["", "## outline.json の統合候補"]
+        for s in report['merge_suggestions']:
+            keep = f"[{s['keep_id']}] {s['keep']}" if s['keep_id'] else s['keep']
+            merged = ', '.join(
+                f"[{pid}] {name}" if pid else name for name, pid in zip(s['merge'], s['merge_ids'])
+            )
+            lines.append(f"  - {keep} ← {merged}")
+        lines.append("  統合元の説明・スニペットを統合先のページにまとめ、統合元を outline.json の pages から削除してください。")
+    return '\n'.join(lines)
@@ -0,0 +1,137 @@
+"""
+Wiki ディレクトリ内の Markdown ページの変更を監視する。
+
+Linux では inotify (ctypes 経由、追加依存なし) でファイルの書き込み完了・リネーム・削除を
+待ち受け、それ以外の環境や inotify が使えない場合は mtime/サイズのポーリングに切り替える。
+エディタの保存は「一時ファイルに書いてリネーム」や複数回の書き込みになることがあるため、
+最初のイベントから DEBOUNCE_SECONDS の間に届いたイベントはまとめて1回の変更として返す。
+
+validate_page.py --watch から使う。
+"""
+import os
+import select
+import struct
+import time
+import ctypes
+import ctypes.util
+from typing import Dict, Optional, Set, Tuple
+
+# 連続するイベントをまとめる時間
+DEBOUNCE_SECONDS = 0.05
+# ポーリング時の確認間隔
+POLL_INTERVAL = 0.3
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+class PollingWatcher:
+    """mtime とサイズの変化をポーリングで検出する"""
+
+    kind = 'polling'
+
+    def __init__(self, directory: str, suffix: str = '.md'):
+        self.directory = directory
+        self.suffix = suffix
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(self.suffix) and entry.is_file():
+                        st = entry.stat()
+                        snapshot[entry.name] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            pass
+        return snapshot
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """変更（追加・更新・削除）されたファイル名の集合を返す。timeout 経過時は空集合"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._scan()
+            changed = {
+                name for name in current.keys() | self._snapshot.keys()
+                if current.get(name) != self._snapshot.get(name)
+            }
+            self._snapshot = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(POLL_INTERVAL)
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """inotify でディレクトリ内のファイル変更イベントを受け取る"""
+
+    kind = 'inotify'
+
+    def __init__(self, directory: str, suffix: str = '.md'):
+        self.directory = directory
+        self.suffix = suffix
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 に失敗しました')
+        wd = libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(err, f'inotify_add_watch に失敗しました: {directory}')
+
+    def _read_events(self, names: Set[str]) -> None:
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        pos = 0
+        while pos + EVENT_HEADER.size <= len(data):
+            _, _, _, length = EVENT_HEADER.unpack_from(data, pos)
+            pos += EVENT_HEADER.size
+            name = data[pos:pos + length].rstrip(b'\0').decode('utf-8', 'replace')
+            pos += length
+            if name.endswith(self.suffix):
+                names.add(name)
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """変更（追加・更新・削除）されたファイル名の集合を返す。timeout 経過時は空集合"""
+        names: Set[str] = set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not names:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            if not ready:
+                return names
+            self._read_events(names)
+
+        # 保存直後に続くイベントをまとめて受け取る
+        while select.select([self._fd], [], [], DEBOUNCE_SECONDS)[0]:
+            self._read_events(names)
+        return names
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def open_watcher(directory: str, suffix: str = '.md', polling: bool = False):
+    """inotify が使えれば InotifyWatcher、使えなければ PollingWatcher を返す"""
+    if not polling and hasattr(os, 'uname') and os.uname().sysname == 'Linux':
+        try:
+            return InotifyWatcher(directory, suffix)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directory, suffix)
@@ -0,0 +1,332 @@
+"""
+Wiki ページの出典を対象リポジトリの実ファイルと照合するためのソース索引。
+
+- Sources 行などの `(file:///abs/path#L10-L20)` リンク
+- コードスニペット先頭の `// path/to/file.ts:L10-L20` / `# path/to/file.py:L10-L20` コメント
+
+を抽出し、ファイルの存在と行範囲がファイル内に収まっているかを検証する。
+さらにスニペット本文を出典の行範囲と照合し（空白の差は無視）、一致しない場合は
+ファイル全体の行 n-gram ハッシュ索引から本当の抜粋元を探して「行番号ずれ」か
+「ソースに存在しない（捏造）」かを判定する。
+各ソースファイルは初回参照時に mmap で開いて改行オフセット表を作り、
+行・n-gram 索引とともに同一プロセス内では使い回すため、数千件の出典でも高速に検証できる。
+
+validation_engine.py（validate_page.py / validate_arch_page.py の共通エンジン）から import して使う。
+"""
+import os
+import re
+import json
+import mmap
+import bisect
+from array import array
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+# (file:///abs/path#L10-L20) 形式のリンク。file:// の後の / をパスの先頭として含める。
+# 1つの正規表現にすると `(file:///a(file:///a...` のような閉じないリンクの連続で
+# 開始位置ごとに末尾まで走査し直す（二乗時間）ため、パス部分と #L 以降を分けて照合する。
+FILE_LINK_HEAD_RE = re.compile(r'\(file://(/[^#)\s]+)')
+FILE_LINK_TAIL_RE = re.compile(r'#L(\d+)(?:[-–]L?(\d+))?\)')
+
+# スニペット先頭の出典コメント: // path:L10-L20, # path:L10-L20, -- path:L10-L20
+SNIPPET_HEADER_RE = re.compile(
+    r'^\s*(?://|#|--)\s*([^\s:]+\.[A-Za-z0-9]+)\s*:\s*L(\d+)(?:\s*[-–]\s*L?(\d+))?'
+)
+
+CODE_BLOCK_RE = re.compile(r'```(\w+)\n([\s\S]*?)```')
+
+# スニペットの行がこの割合以上、出典の行範囲に含まれていれば本物とみなす
+SNIPPET_MATCH_RATIO = 0.8
+# 抜粋元の探索に使う行 n-gram の長さ
+SNIPPET_NGRAM = 3
+
+
+@dataclass
+class Citation:
+    """ページ内の1件の出典参照"""
+    kind: str  # link / snippet
+    path: str  # ページに書かれたパス（絶対 or リポジトリ相対）
+    start: int
+    end: int
+    page_line: int  # ページ内の行番号 (1始まり)
+    body: str = ""  # kind == snippet のとき、出典コメントを除いたスニペット本文
+
+
+def iter_file_links(text: str):
+    """(file:///path#L10-L20) リンクを (パス, 開始行, 終了行, リンクの位置) として順に返す。
+    パス部分は #・)・空白で必ず止まるため、#L 以降が続かなければ同じパスの途中から始まる
+    リンクも成立しない。そこでパスの後ろだけを確かめ、失敗してもパスの末尾から探索を続ける。
+    """
+    pos = 0
+    while True:
+        head = FILE_LINK_HEAD_RE.search(text, pos)
+        if not head:
+            return
+        tail = FILE_LINK_TAIL_RE.match(text, head.end())
+        if tail:
+            start = int(tail.group(1))
+            end = int(tail.group(2)) if tail.group(2) else start
+            yield head.group(1), start, end, head.start()
+            pos = tail.end()
+        else:
+            pos = head.end()
+
+
+def extract_citations(text: str) -> List[Citation]:
+    """ページ本文から file:/// リンクとスニペット出典コメントを抽出する"""
+    citations = []
+
+    for path, start, end, pos in iter_file_links(text):
+        citations.append(Citation(
+            kind='link', path=path, start=start, end=end,
+            page_line=text.count('\n', 0, pos) + 1,
+        ))
+
+    for m in CODE_BLOCK_RE.finditer(text):
+        if m.group(1) == 'mermaid':
+            continue
+        block = m.group(2)
+        lines = block.split('\n')
+        # 先頭の空行を飛ばした最初の行を出典コメントとして扱う
+        idx = next((i for i, line in enumerate(lines) if line.strip()), None)
+        if idx is None:
+            continue
+        header = SNIPPET_HEADER_RE.match(lines[idx])
+        if not header:
+            continue
+        start = int(header.group(2))
+        end = int(header.group(3)) if header.group(3) else start
+        citations.append(Citation(
+            kind='snippet', path=header.group(1), start=start, end=end,
+            page_line=text.count('\n', 0, m.start(2)) + idx + 1,
+            body='\n'.join(lines[idx + 1:]),
+        ))
+
+    return citations
+
+
+def resolve_outline_dirs(dirs: List[Optional[str]], wiki_dir: str) -> List[str]:
+    """outline.json の targetDir / additionalDirs の値を絶対パスにして返す。
+    相対パスは wiki ディレクトリ基準で解決し、空の値と存在しないディレクトリは除く。
+    """
+    resolved = []
+    for d in dirs:
+        if not d:
+            continue
+        d = os.path.abspath(os.path.join(wiki_dir, d))
+        if os.path.isdir(d):
+            resolved.append(d)
+    return resolved
+
+
+@lru_cache(maxsize=None)
+def load_source_roots(wiki_dir: str) -> Tuple[str, ...]:
+    """wiki ディレクトリの outline.json から targetDir と additionalDirs を絶対パスで返す。
+    outline.json がない・targetDir が未設定の場合は空。
+    """
+    outline_path = os.path.join(wiki_dir, 'outline.json')
+    try:
+        with open(outline_path, 'r', encoding='utf-8') as f:
+            outline = json.load(f)
+    except (OSError, ValueError):
+        return ()
+    dirs = [outline.get('targetDir')] + list(outline.get('additionalDirs', []))
+    return tuple(resolve_outline_dirs(dirs, wiki_dir))
+
+
+def normalize_line(line: str) -> str:
+    """空白の差を無視するため、連続する空白を1つにまとめて前後を除去する"""
+    return ' '.join(line.split())
+
+
+class SourceIndex:
+    """ソースファイルの解決と行オフセット表のキャッシュ"""
+
+    def __init__(self, roots: List[str]):
+        self.roots = [os.path.abspath(r) for r in roots]
+        self._resolved: Dict[str, Optional[str]] = {}
+        self._offsets: Dict[str, Optional[array]] = {}
+        self._lines: Dict[str, List[Tuple[int, str]]] = {}
+        self._ngrams: Dict[Tuple[str, int], Dict[int, List[int]]] = {}
+
+    def resolve(self, path: str) -> Optional[str]:
+        """ページ内のパスを実ファイルの絶対パスに解決する。見つからなければ None"""
+        if path in self._resolved:
+            return self._resolved[path]
+
+        resolved = None
+        if os.path.isabs(path):
+            if os.path.isfile(path):
+                resolved = path
+        else:
+            rel = path[2:] if path.startswith('./') else path
+            for root in self.roots:
+                candidate = os.path.join(root, rel)
+                if os.path.isfile(candidate):
+                    resolved = candidate
+                    break
+
+        self._resolved[path] = resolved
+        return resolved
+
+    def line_offsets(self, abs_path: str) -> Optional[array]:
+        """各行の先頭バイトオフセット表を返す（末尾に番兵としてファイルサイズを含む）"""
+        if abs_path in self._offsets:
+            return self._offsets[abs_path]
+
+        offsets = None
+        try:
+            with open(abs_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                offsets = array('Q', [0])
+                if size > 0:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        pos = mm.find(b'\n')
+                        while pos != -1:
+                            offsets.append(pos + 1)
+                            pos = mm.find(b'\n', pos + 1)
+                    if offsets[-1] != size:
+                        # 末尾に改行がない最終行
+                        offsets.append(size)
+        except OSError:
+            offsets = None
+
+        self._offsets[abs_path] = offsets
+        return offsets
+
+    def line_count(self, abs_path: str) -> int:
+        offsets = self.line_offsets(abs_path)
+        return len(offsets) - 1 if offsets else 0
+
+    def normalized_lines(self, abs_path: str) -> List[Tuple[int, str]]:
+        """空行を除いた (行番号, 空白を正規化した行) のリスト"""
+        if abs_path not in self._lines:
+            try:
+                with open(abs_path, 'r', encoding='utf-8', errors='replace') as f:
+                    text = f.read()
+            except OSError:
+                text = ''
+            self._lines[abs_path] = [
+                (no, norm) for no, norm in
+                ((i + 1, normalize_line(line)) for i, line in enumerate(text.split('\n')))
+                if norm
+            ]
+        return self._lines[abs_path]
+
+    def ngram_index(self, abs_path: str, n: int) -> Dict[int, List[int]]:
+        """連続する n 行（空行除く）のハッシュ → normalized_lines 上の開始位置"""
+        key = (abs_path, n)
+        if key not in self._ngrams:
+            norm = [line for _, line in self.normalized_lines(abs_path)]
+            index: Dict[int, List[int]] = {}
+            for pos in range(len(norm) - n + 1):
+                index.setdefault(hash(tuple(norm[pos:pos + n])), []).append(pos)
+            self._ngrams[key] = index
+        return self._ngrams[key]
+
+    def locate(self, abs_path: str, snippet: List[str]) -> Optional[Tuple[int, int, float]]:
+        """正規化済みスニペット行がファイルのどこから抜粋されたかを n-gram の投票で推定する。
+        Returns: (開始行, 終了行, 一致した n-gram の割合)。見つからなければ None
+        """
+        n = min(SNIPPET_NGRAM, len(snippet))
+        if n == 0:
+            return None
+        index = self.ngram_index(abs_path, n)
+        votes: Dict[int, int] = {}
+        grams = len(snippet) - n + 1
+        for offset in range(grams):
+            for pos in index.get(hash(tuple(snippet[offset:offset + n])), ()):
+                origin = pos - offset
+                votes[origin] = votes.get(origin, 0) + 1
+        if not votes:
+            return None
+
+        origin, count = max(votes.items(), key=lambda kv: (kv[1], -kv[0]))
+        lines = self.normalized_lines(abs_path)
+        first = max(origin, 0)
+        last = min(origin + len(snippet), len(lines)) - 1
+        return lines[first][0], lines[last][0], count / grams
+
+    def expected_path(self, path: str) -> str:
+        """解決できなかったパスが本来あるべき絶対パス（キャッシュの依存関係記録用）"""
+        if os.path.isabs(path) or not self.roots:
+            return path
+        return os.path.join(self.roots[0], path[2:] if path.startswith('./') else path)
+
+    def check(self, citation: Citation) -> Tuple[Optional[str], Optional[str]]:
+        """出典を検証し (解決済み絶対パス, 問題の説明 or None) を返す"""
+        abs_path = self.resolve(citation.path)
+        if abs_path is None:
+            return None, f"ファイルが存在しない: {citation.path}"
+        if citation.start < 1 or citation.end < citation.start:
+            return abs_path, f"行範囲が不正: {os.path.basename(citation.path)}:L{citation.start}-L{citation.end}"
+        total = self.line_count(abs_path)
+        if citation.end > total:
+            return abs_path, (
+                f"行範囲がファイル外: {os.path.basename(citation.path)}:L{citation.start}-L{citation.end}"
+                f" (ファイルは{total}行)"
+            )
+        return abs_path, None
+
+
+@lru_cache(maxsize=None)
+def get_source_index(roots: Tuple[str, ...]) -> SourceIndex:
+    """ルートの組ごとに1つの SourceIndex を返す（1プロセス内で共有）"""
+    return SourceIndex(list(roots))
+
+
+def verify_citations(text: str, index: SourceIndex) -> Tuple[int, List[str], List[str], List[str]]:
+    """ページ内の全出典を検証する。
+    Returns: (検証件数, 存在しないファイルの問題, 行範囲外の問題, 参照したファイルの絶対パス)
+    参照したファイルには存在しなかったファイルの想定パスも含む。
+    """
+    missing = []
+    out_of_range = []
+    files = set()
+    citations = extract_citations(text)
+    for c in citations:
+        abs_path, problem = index.check(c)
+        files.add(abs_path or index.expected_path(c.path))
+        if problem is None:
+            continue
+        if abs_path is None:
+            missing.append(f"L{c.page_line}: {problem}")
+        else:
+            out_of_range.append(f"L{c.page_line}: {problem}")
+    return len(citations), missing, out_of_range, sorted(files)
+
+
+def verify_snippets(text: str, index: SourceIndex) -> Tuple[int, List[str], List[str]]:
+    """出典コメント付きスニペットの本文を出典の行範囲と照合する。
+    Returns: (照合件数, 行番号ずれの説明, ソースに存在しないスニペットの説明)
+    出典ファイルが見つからない・行範囲が不正またはファイル外のスニペットは verify_citations 側で報告するため対象外。
+    """
+    checked = 0
+    drifted = []
+    fabricated = []
+    for c in extract_citations(text):
+        if c.kind != 'snippet':
+            continue
+        abs_path, problem = index.check(c)
+        snippet = [norm for norm in (normalize_line(line) for line in c.body.split('\n')) if norm]
+        if problem is not None or not snippet:
+            continue
+        checked += 1
+
+        lines = index.normalized_lines(abs_path)
+        lo = bisect.bisect_left(lines, (c.start, ''))
+        hi = bisect.bisect_left(lines, (c.end + 1, ''))
+        cited = {line for _, line in lines[lo:hi]}
+        matched = sum(1 for line in snippet if line in cited)
+        if matched >= len(snippet) * SNIPPET_MATCH_RATIO:
+            continue
+
+        name = os.path.basename(c.path)
+        found = index.locate(abs_path, snippet)
+        if found and found[2] >= 0.5:
+            start, end, _ = found
+            drifted.append(f"L{c.page_line}: {name}:L{c.start}-L{c.end} → 実際は L{start}-L{end}")
+        else:
+            fabricated.append(f"L{c.page_line}: {name}:L{c.start}-L{c.end}")
+    return checked, drifted, fabricated
@@ -0,0 +1,258 @@
+"""
+code_scanner.py（と、そのビューの extract_signatures.py / analyze_dependencies.py）が使う、ファイル単位の解析結果の永続索引 (SQLite)。
+
+解析結果（import・シグネチャ・行数）はファイル内容のハッシュをキーに保存し、次回以降は内容が
+変わったファイルだけを解析し直す。キーは git の blob SHA-1 で、
+
+- git 管理下で作業ツリーに変更のないファイル: `git ls-files -s` のインデックスの blob SHA（ファイルを読まない）
+- 変更中・未追跡のファイル、git 管理外のディレクトリ: 内容から同じ形式の blob SHA-1 を計算する。
+  パスごとの mtime とサイズを覚えておき、変わっていなければ前回のハッシュを使い回す
+
+とするため、同じ内容なら git の内外やパスの移動に関係なく同じキーになる。
+解析結果には抽出スクリプト自体のハッシュ（バージョン）を付けて保存し、スクリプトが変わると
+古い結果は使わずに削除する。
+
+索引は既定で `${XDG_CACHE_HOME:-~/.cache}/deepwiki/` の下に対象ディレクトリごとに作る。
+"""
+import os
+import sys
+import json
+import hashlib
+import subprocess
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import sqlite3
+
+    HAS_SQLITE = True
+except ImportError:
+    HAS_SQLITE = False
+
+SCHEMA_VERSION = 2
+# sqlite のプレースホルダ数の上限 (999) を超えないよう、IN 句はこの件数ごとに分けて問い合わせる
+QUERY_CHUNK = 500
+
+
+def default_index_path(target_dir: str) -> str:
+    """対象ディレクトリごとの索引ファイルのパス"""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    digest = hashlib.sha1(os.path.abspath(target_dir).encode('utf-8')).hexdigest()[:16]
+    name = os.path.basename(os.path.abspath(target_dir).rstrip(os.sep)) or 'root'
+    return os.path.join(cache_home, 'deepwiki', f"symbols-{name}-{digest}.sqlite")
+
+
+def script_version(path: str) -> str:
+    """抽出スクリプトのバージョン（ソースのハッシュ）。抽出ロジックが変わると別バージョンになる"""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+def blob_sha1(data: bytes) -> str:
+    """git hash-object と同じ blob SHA-1"""
+    h = hashlib.sha1(b'blob %d\0' % len(data))
+    h.update(data)
+    return h.hexdigest()
+
+
+def git_blob_keys(target_dir: str) -> Optional[Dict[str, str]]:
+    """作業ツリーに変更のない git 管理ファイルの 相対パス → blob SHA。git 管理外なら None。
+    パスは target_dir からの相対パス（git ls-files を target_dir で実行した出力と同じ）。
+    """
+    try:
+        staged = subprocess.run(
+            ['git', '-C', target_dir, 'ls-files', '-s', '-z'],
+            capture_output=True, timeout=60,
+        )
+        if staged.returncode != 0:
+            return None
+        modified = subprocess.run(
+            ['git', '-C', target_dir, 'ls-files', '-m', '-z'],
+            capture_output=True, timeout=60,
+        )
+        if modified.returncode != 0:
+            return None
+    except Exception:
+        return None
+
+    dirty = set(p.decode('utf-8', 'surrogateescape') for p in modified.stdout.split(b'\0') if p)
+    keys = {}
+    for entry in staged.stdout.split(b'\0'):
+        if not entry:
+            continue
+        # "<mode> <sha> <stage>\t<path>"。サブモジュール (160000) は blob ではないので除く
+        meta, _, path = entry.partition(b'\t')
+        mode, sha, stage = meta.split(b' ')
+        if mode == b'160000' or stage != b'0':
+            continue
+        rel_path = path.decode('utf-8', 'surrogateescape')
+        if rel_path not in dirty:
+            keys[rel_path] = sha.decode('ascii')
+    return keys
+
+
+class SymbolIndex:
+    """ファイル内容の blob SHA → 抽出結果 を保存する SQLite 索引"""
+
+    def __init__(self, db_path: str, target_dir: str):
+        self.db_path = db_path
+        self.target_dir = os.path.abspath(target_dir)
+        self.hits = 0
+        self.misses = 0
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT NOT NULL, extractor TEXT NOT NULL, version TEXT NOT NULL, data TEXT NOT NULL,
+                PRIMARY KEY (key, extractor)
+            );
+            CREATE TABLE IF NOT EXISTS file_stats (
+                path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, key TEXT NOT NULL
+            );
+        ''')
+        row = self.conn.execute("SELECT value FROM meta WHERE name = 'schema'").fetchone()
+        if row is None or row[0] != str(SCHEMA_VERSION):
+            self.conn.executescript('DELETE FROM results; DELETE FROM file_stats;')
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (str(SCHEMA_VERSION),))
+            self.conn.commit()
+
+    def file_keys(self, rel_paths: Iterable[str]) -> Dict[str, str]:
+        """相対パス → 内容の blob SHA。読めないファイルは含めない"""
+        rel_paths = list(rel_paths)
+        git_keys = git_blob_keys(self.target_dir) or {}
+        keys = {}
+        pending = []
+        for rel_path in rel_paths:
+            key = git_keys.get(rel_path)
+            if key:
+                keys[rel_path] = key
+            else:
+                pending.append(rel_path)
+        if not pending:
+            return keys
+
+        # 変更中・未追跡・git 管理外のファイル: mtime とサイズが前回と同じなら前回のハッシュを使う
+        stats = {}
+        for chunk in _chunks(pending):
+            stats.update((row[0], row[1:]) for row in self.conn.execute(
+                f"SELECT path, mtime_ns, size, key FROM file_stats WHERE path IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ))
+        updates = []
+        for rel_path in pending:
+            abs_path = os.path.join(self.target_dir, rel_path)
+            try:
+                st = os.stat(abs_path)
+                cached = stats.get(rel_path)
+                if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+                    keys[rel_path] = cached[2]
+                    continue
+                with open(abs_path, 'rb') as f:
+                    key = blob_sha1(f.read())
+            except OSError:
+                continue
+            keys[rel_path] = key
+            updates.append((rel_path, st.st_mtime_ns, st.st_size, key))
+        if updates:
+            self.conn.executemany("INSERT OR REPLACE INTO file_stats VALUES (?, ?, ?, ?)", updates)
+            self.conn.commit()
+        return keys
+
+    def get_many(self, keys: Iterable[str], extractor: str, version: str) -> Dict[str, Any]:
+        """保存済みの抽出結果を blob SHA → 結果 で返す（バージョンが違うものは含めない）"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        for chunk in _chunks(keys):
+            for key, data in self.conn.execute(
+                f"SELECT key, data FROM results WHERE extractor = ? AND version = ? "
+                f"AND key IN ({','.join('?' * len(chunk))})",
+                [extractor, version] + chunk,
+            ):
+                found[key] = json.loads(data)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, Any]], extractor: str, version: str) -> None:
+        """(blob SHA, 抽出結果) を保存し、同じ抽出器の古いバージョンの結果を削除する"""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+            ((key, extractor, version, json.dumps(data, ensure_ascii=False)) for key, data in items),
+        )
+        self.conn.execute("DELETE FROM results WHERE extractor = ? AND version != ?", (extractor, version))
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _chunks(items: List[str]) -> Iterable[List[str]]:
+    for i in range(0, len(items), QUERY_CHUNK):
+        yield items[i:i + QUERY_CHUNK]
+
+
+def open_index(target_dir: str, argv: List[str]) -> Optional[SymbolIndex]:
+    """CLI 引数（--no-index / --index PATH）に従って索引を開く。使わない・開けない場合は None"""
+    if '--no-index' in argv or not HAS_SQLITE:
+        return None
+    path = default_index_path(target_dir)
+    if '--index' in argv:
+        idx = argv.index('--index')
+        if idx + 1 < len(argv):
+            path = argv[idx + 1]
+    try:
+        return SymbolIndex(path, target_dir)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Warning: シンボル索引を開けないため索引なしで解析します ({path}): {e}", file=sys.stderr)
+        return None
+
+
+def cached_extract(
+    index: Optional[SymbolIndex],
+    candidates: List[Tuple[str, Any]],
+    extractor: str,
+    version: str,
+    compute,
+) -> List[Any]:
+    """candidates [(相対パス, ファイル)] の抽出結果を candidates の順に返す。
+    索引にある内容のファイルは解析せず、残りだけを compute(ファイルのリスト) -> 結果のリスト でまとめて解析する。
+    extractor には拡張子ごとに結果が変わる場合に備えて拡張子を付けて保存する。
+    """
+    if index is None:
+        return compute([f for _, f in candidates])
+
+    keys = index.file_keys(rel for rel, _ in candidates)
+
+    def slot(rel_path: str) -> str:
+        return f"{extractor}{os.path.splitext(rel_path)[1]}"
+
+    stored: Dict[Tuple[str, str], Any] = {}
+    by_slot: Dict[str, List[str]] = {}
+    for rel_path, _ in candidates:
+        if rel_path in keys:
+            by_slot.setdefault(slot(rel_path), []).append(keys[rel_path])
+    for name, slot_keys in by_slot.items():
+        stored.update(((name, k), v) for k, v in index.get_many(slot_keys, name, version).items())
+
+    results: List[Any] = [None] * len(candidates)
+    missing = []
+    for i, (rel_path, f) in enumerate(candidates):
+        lookup = (slot(rel_path), keys.get(rel_path))
+        if lookup in stored:
+            results[i] = stored[lookup]
+        else:
+            missing.append(i)
+
+    if missing:
+        fresh = compute([candidates[i][1] for i in missing])
+        new_items: Dict[str, List[Tuple[str, Any]]] = {}
+        for i, data in zip(missing, fresh):
+            results[i] = data
+            rel_path = candidates[i][0]
+            if rel_path in keys:
+                new_items.setdefault(slot(rel_path), []).append((keys[rel_path], data))
+        for name, items in new_items.items():
+            index.put_many(items, name, version)
+    return results
@@ -8,612 +8,82 @@ DeepWiki ページ品質バリデーター
 
 品質基準は、開発者がキャッチアップや既存機能の拡張検討に
 十分な網羅性・深度・ソース参照密度を備えているかを基準とする。
+ページ単位の検証ルールは validation_engine.py（microservices-wiki と共通）の
+deepwiki プロファイルで定義し、このスクリプトは Wiki 構造チェックと CLI を担う。
 
 使用方法:
   python validate_page.py <ページファイル.md> [--importance high|medium|low]
-  python validate_page.py <wikiディレクトリ> [--scale small|medium|large]
+  python validate_page.py <wikiディレクトリ> [--scale small|medium|large] [--jobs N] [--no-cache] [--format text|json] [--target-dir DIR] [--watch [--poll]] [--timings]
+  python validate_page.py <wikiディレクトリ> --dedupe [--dedupe-threshold T] [--format text|json]
+
+  --jobs N     ディレクトリ指定時に N プロセスで並列検証する（0 で CPU 数）。
+               出力順はファイル名順のまま変わらない。
+  --no-cache   ディレクトリ指定時の検証結果キャッシュ (.validate_cache.json) を使わない。
+  --format F   出力形式 text (既定) / json。json ではスコア・グレード・構造化された指摘
+               (rule, severity, measured, required) と Wiki 構造チェック結果を出力する。
+  --target-dir D  出典 (file:/// リンク・スニペットの path:L行番号) を照合する対象リポジトリ。
+               省略時はページと同じディレクトリの outline.json の targetDir を使う。
+  --watch      ディレクトリ指定時、初回検証の後もページの保存を監視し、変更されたページのみ
+               再検証してスコアの増減・増えた/解消した指摘と Wiki 構造スコアの変化を表示する。
+               Linux では inotify、それ以外はポーリング (--poll で強制) で検出する。
+  --timings    解析要素 (parse.*)・ルールごとの所要時間を計測する。text ではディレクトリ全体の
+               集計表（回数・合計・平均・最大・最も遅いページ）を、json では各ページの timings と
+               集計 (timings) を出力する。計測中はキャッシュを使わない。
+  --dedupe     品質検証の代わりに、ページ・セクション間のほぼ重複した説明やスニペットを
+               MinHash/LSH で検出し、重なりの割合と outline.json で統合すべきページを表示する。
+               --dedupe-threshold で類似とみなす Jaccard 係数を指定する（既定 0.5）。
 """
 
 import sys
 import re
 import os
 import json
+import time
 from pathlib import Path
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, asdict
 from typing import Optional
 
+import validation_engine
+from validation_engine import (
+    CACHE_FILENAME, PROFILES, ValidationResult, aggregate_timings, build_page_summary, format_result,
+    format_timings, get_source_index, timings_to_json,
+)
+from page_watcher import open_watcher
+import page_dedupe
 
-@dataclass
-class ValidationResult:
-    """1ページのバリデーション結果"""
-    file: str
-    importance: str  # high / medium / low / unknown
-    score: int = 0  # 0-100
-    max_score: int = 0
-    issues: list = field(default_factory=list)
-    passes: list = field(default_factory=list)
-
-    @property
-    def grade(self) -> str:
-        pct = (self.score / self.max_score * 100) if self.max_score > 0 else 0
-        if pct >= 90:
-            return "A"
-        elif pct >= 75:
-            return "B"
-        elif pct >= 60:
-            return "C"
-        elif pct >= 40:
-            return "D"
-        else:
-            return "F"
-
-    @property
-    def percentage(self) -> float:
-        return (self.score / self.max_score * 100) if self.max_score > 0 else 0
-
-
-# --- 品質基準定義（Claude Opus 版を標準） ---
-REQUIREMENTS = {
-    "high": {
-        "min_words": 1200,
-        "min_mermaid": 2,
-        "min_mermaid_types": 2,
-        "min_code_snippets": 5,
-        "min_sources_lines": 4,
-        "sources_need_line_numbers": True,
-        "min_sections": 4,
-        "min_tables": 1,
-    },
-    "medium": {
-        "min_words": 600,
-        "min_mermaid": 1,
-        "min_mermaid_types": 1,
-        "min_code_snippets": 3,
-        "min_sources_lines": 3,
-        "sources_need_line_numbers": True,
-        "min_sections": 3,
-        "min_tables": 0,
-    },
-    "low": {
-        "min_words": 300,
-        "min_mermaid": 1,
-        "min_mermaid_types": 1,
-        "min_code_snippets": 1,
-        "min_sources_lines": 2,
-        "sources_need_line_numbers": True,
-        "min_sections": 2,
-        "min_tables": 0,
-    },
-    "index": {
-        "min_words": 200,
-        "min_mermaid": 1,
-        "min_mermaid_types": 1,
-        "min_code_snippets": 0,
-        "min_sources_lines": 0,
-        "sources_need_line_numbers": False,
-        "min_sections": 2,
-        "min_tables": 0,
-    },
-}
-
-# Sources 行番号の精度しきい値（この行数以上の範囲は「不正確」）
-MAX_ACCEPTABLE_LINE_RANGE = 200
-
-
-def count_words(text: str) -> int:
-    """日本語+英語の混合テキストの語数を推定。
-    日本語: 文字数 ≒ 語数（助詞等含む）
-    英語: スペース区切り
-    """
-    # コードブロックと Mermaid を除外
-    cleaned = re.sub(r'```[\s\S]*?```', '', text)
-    # Markdown の見出しや記号を除外
-    cleaned = re.sub(r'[#|>\-*`\[\]()]', ' ', cleaned)
-
-    # 日本語文字をカウント
-    jp_chars = len(re.findall(r'[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF]', cleaned))
-    # 英語単語をカウント
-    en_words = len(re.findall(r'[a-zA-Z]+', cleaned))
-
-    return jp_chars + en_words
-
-
-def count_mermaid_diagrams(text: str) -> int:
-    return len(re.findall(r'```mermaid', text))
-
-
-def get_mermaid_types(text: str) -> set:
-    """使用されている Mermaid ダイアグラムの種類を返す"""
-    types = set()
-    mermaid_blocks = re.findall(r'```mermaid\n([\s\S]*?)```', text)
-    for block in mermaid_blocks:
-        first_line = block.strip().split('\n')[0].strip().lower()
-        if first_line.startswith('graph'):
-            types.add('graph')
-        elif first_line.startswith('flowchart'):
-            types.add('flowchart')
-        elif first_line.startswith('sequencediagram'):
-            types.add('sequenceDiagram')
-        elif first_line.startswith('classdiagram'):
-            types.add('classDiagram')
-        elif first_line.startswith('statediagram'):
-            types.add('stateDiagram')
-        elif first_line.startswith('erdiagram'):
-            types.add('erDiagram')
-        elif first_line.startswith('gantt'):
-            types.add('gantt')
-        elif first_line.startswith('pie'):
-            types.add('pie')
-        else:
-            types.add('other')
-    return types
-
-
-def count_code_snippets(text: str) -> int:
-    """Mermaid 以外のコードブロックをカウント"""
-    all_blocks = re.findall(r'```(\w*)', text)
-    return sum(1 for lang in all_blocks if lang and lang != 'mermaid')
-
-
-def count_snippet_citations(text: str) -> int:
-    """コードスニペット内の出典コメント (// path:L行番号 または # path:L行番号) をカウント。
-    // は TS/JS/Go/Rust/Java など、# は Python/Ruby/Shell/YAML など。
-    """
-    code_blocks = re.findall(r'```\w+\n([\s\S]*?)```', text)
-    citations = 0
-    for block in code_blocks:
-        # (?://|#) で // または # のどちらのコメント形式も受け入れる
-        if re.search(
-            r'(?://|#)\s*\S+\.(ts|js|py|go|rs|java|tsx|jsx|vue|sh|rb|kt|swift|cs|cpp|c|h|php|scala|ex|exs|dart|lua|r)\s*[:\s]L\d+',
-            block,
-        ):
-            citations += 1
-    return citations
-
-
-def count_tables(text: str) -> int:
-    """Markdown テーブルの数をカウント（ヘッダ行 + 区切り行のペアで判定）"""
-    # テーブルは | header | header | のような行の後に | --- | --- | が続く
-    lines = text.split('\n')
-    table_count = 0
-    for i in range(len(lines) - 1):
-        if re.match(r'\s*\|.*\|.*\|', lines[i]) and \
-           re.match(r'\s*\|[\s\-:]+\|[\s\-:]+\|', lines[i + 1]):
-            table_count += 1
-    return table_count
-
-
-def find_sources_lines(text: str) -> list:
-    """Sources: 行を全て抽出"""
-    return re.findall(r'^.*Sources?:.*$', text, re.MULTILINE)
-
-
-def check_line_numbers_in_sources(sources_lines: list) -> tuple:
-    """Sources 行に行番号 (L数字) が含まれているか。精度もチェック。"""
-    with_line_nums = 0
-    with_imprecise_line_nums = 0
-    without_line_nums = 0
-
-    for line in sources_lines:
-        ranges = re.findall(r'L(\d+)[-–]L?(\d+)', line)
-        if ranges:
-            precise = True
-            for start, end in ranges:
-                span = int(end) - int(start)
-                if span > MAX_ACCEPTABLE_LINE_RANGE:
-                    precise = False
-                    break
-            if precise:
-                with_line_nums += 1
-            else:
-                with_imprecise_line_nums += 1
-        elif re.search(r'L\d+', line):
-            with_line_nums += 1
-        else:
-            without_line_nums += 1
-
-    return with_line_nums, with_imprecise_line_nums, without_line_nums
-
-
-def count_sections(text: str) -> int:
-    """## レベルの見出し数をカウント"""
-    return len(re.findall(r'^## ', text, re.MULTILINE))
-
-
-def check_mermaid_has_real_names(text: str) -> tuple:
-    """Mermaid ダイアグラム内に具体的なクラス名が使われているか"""
-    mermaid_blocks = re.findall(r'```mermaid\n([\s\S]*?)```', text)
-    generic_names = {'Component', 'Module', 'Service', 'System', 'Client', 'Server',
-                     'Manager', 'Handler', 'Engine', 'Registry', 'Controller'}
-    has_specific = 0
-    has_generic = 0
-    for block in mermaid_blocks:
-        labels = re.findall(r'\[([^\]]+)\]', block)
-        for label in labels:
-            clean = label.strip('"').strip()
-            # 2語以上 or PascalCase なら具体的
-            if re.match(r'[A-Z][a-z]+[A-Z]', clean) or len(clean.split()) >= 2:
-                has_specific += 1
-            elif clean in generic_names:
-                has_generic += 1
-    return has_specific, has_generic
-
-
-def check_related_pages(text: str) -> bool:
-    """関連ページリンクがあるか"""
-    return bool(re.search(r'(関連ページ|Related|← 前|→ 次|参照)', text, re.IGNORECASE))
-
-
-def check_overview_paragraph(text: str) -> bool:
-    """冒頭に概要段落があるか（最初の ## の前にテキストがあるか）"""
-    lines = text.split('\n')
-    found_h1 = False
-    has_overview = False
-    for line in lines:
-        if line.startswith('# ') and not line.startswith('## '):
-            found_h1 = True
-            continue
-        if found_h1 and line.startswith('## '):
-            break
-        if found_h1 and line.strip() and not line.startswith('#') and not line.startswith('```') and not line.startswith('>'):
-            has_overview = True
-    return has_overview
+# 品質基準・ルール構成は validation_engine の deepwiki プロファイルで定義する
+PROFILE = PROFILES['deepwiki']
+REQUIREMENTS = PROFILE.requirements
 
 
 def detect_importance(filepath: str) -> str:
-    """ファイルパスからimportanceを推測（セクション番号ベース）"""
-    basename = os.path.basename(filepath)
-    if basename == 'index.md':
-        return 'index'
-
-    # x.y 形式の番号を抽出
-    match = re.match(r'(\d+)\.(\d+)', basename)
-    if match:
-        section = int(match.group(1))
-        # Overview (1.x), Core Systems (4.x) は high
-        if section in (1, 4):
-            return 'high'
-        # その他は medium
-        else:
-            return 'medium'
+    """ファイルパスからimportanceを推測（Overview (1.x), Core Systems (4.x) は high）"""
+    return validation_engine.detect_importance(filepath, PROFILE.name)
 
-    return 'medium'  # デフォルト
-
-
-def validate_page(filepath: str, importance: Optional[str] = None) -> ValidationResult:
-    """1ページを検証"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    if importance is None:
-        importance = detect_importance(filepath)
-
-    reqs = REQUIREMENTS.get(importance, REQUIREMENTS['medium'])
-    result = ValidationResult(file=filepath, importance=importance)
-
-    # --- 1. 語数チェック (15点) ---
-    result.max_score += 15
-    word_count = count_words(content)
-    min_words = reqs['min_words']
-    if word_count >= min_words:
-        result.score += 15
-        result.passes.append(f"✅ 語数: {word_count} (基準: {min_words}以上)")
-    elif word_count >= min_words * 0.7:
-        result.score += 8
-        result.issues.append(f"⚠️  語数不足: {word_count} (基準: {min_words}以上, 70%以上なので部分点)")
-    else:
-        result.issues.append(f"❌ 語数不足: {word_count} (基準: {min_words}以上)")
-
-    # --- 2. Mermaid ダイアグラム数 (10点) ---
-    result.max_score += 10
-    mermaid_count = count_mermaid_diagrams(content)
-    min_mermaid = reqs['min_mermaid']
-    if mermaid_count >= min_mermaid:
-        result.score += 10
-        result.passes.append(f"✅ Mermaid: {mermaid_count}個 (基準: {min_mermaid}以上)")
-    elif mermaid_count > 0:
-        result.score += 5
-        result.issues.append(f"⚠️  Mermaid不足: {mermaid_count}個 (基準: {min_mermaid}以上)")
-    else:
-        result.issues.append(f"❌ Mermaidなし (基準: {min_mermaid}以上)")
-
-    # --- 3. Mermaid 種類の多様性 (5点) ---
-    result.max_score += 5
-    mermaid_types = get_mermaid_types(content)
-    min_types = reqs['min_mermaid_types']
-    if len(mermaid_types) >= min_types:
-        result.score += 5
-        result.passes.append(f"✅ Mermaid種類: {', '.join(sorted(mermaid_types))} ({len(mermaid_types)}種類, 基準: {min_types}以上)")
-    elif len(mermaid_types) > 0:
-        result.score += 2
-        result.issues.append(f"⚠️  Mermaid種類不足: {', '.join(sorted(mermaid_types))} ({len(mermaid_types)}種類, 基準: {min_types}以上)")
-    else:
-        result.issues.append(f"❌ Mermaidなし")
-
-    # --- 4. コードスニペット数 (15点) ---
-    result.max_score += 15
-    snippet_count = count_code_snippets(content)
-    min_snippets = reqs['min_code_snippets']
-    if snippet_count >= min_snippets:
-        result.score += 15
-        result.passes.append(f"✅ コードスニペット: {snippet_count}個 (基準: {min_snippets}以上)")
-    elif snippet_count > 0 and min_snippets > 0:
-        # 割合に応じた部分点
-        partial = min(10, int(15 * snippet_count / min_snippets))
-        result.score += partial
-        result.issues.append(f"⚠️  コードスニペット不足: {snippet_count}個 (基準: {min_snippets}以上)")
-    elif min_snippets > 0:
-        result.issues.append(f"❌ コードスニペットなし (基準: {min_snippets}以上)")
-    else:
-        result.score += 15
-        result.passes.append(f"✅ コードスニペット: 不要 (importance: low)")
-
-    # --- 5. スニペット出典コメント (5点) ---
-    result.max_score += 5
-    if snippet_count > 0:
-        citation_count = count_snippet_citations(content)
-        if citation_count >= snippet_count * 0.6:
-            result.score += 5
-            result.passes.append(f"✅ スニペット出典: {citation_count}/{snippet_count}個に出典コメントあり")
-        elif citation_count > 0:
-            result.score += 2
-            result.issues.append(f"⚠️  スニペット出典不足: {citation_count}/{snippet_count}個のみ出典あり (60%以上が基準)")
-        else:
-            result.issues.append(f"❌ スニペット出典なし (// path/to/file.ts:L行番号 形式のコメントが必要)")
-    else:
-        result.score += 0  # スニペットがなければ出典もチェックしない
-
-    # --- 6. Sources 行存在 (10点) ---
-    result.max_score += 10
-    sources_lines = find_sources_lines(content)
-    min_sources = reqs['min_sources_lines']
-    if len(sources_lines) >= min_sources:
-        result.score += 10
-        result.passes.append(f"✅ Sources行: {len(sources_lines)}行 (基準: {min_sources}以上)")
-    elif len(sources_lines) > 0:
-        result.score += 5
-        result.issues.append(f"⚠️  Sources行不足: {len(sources_lines)}行 (基準: {min_sources}以上)")
-    else:
-        result.issues.append(f"❌ Sources行なし (基準: {min_sources}以上)")
-
-    # --- 7. Sources 行番号精度 (10点) ---
-    result.max_score += 10
-    if sources_lines and reqs['sources_need_line_numbers']:
-        precise, imprecise, no_ln = check_line_numbers_in_sources(sources_lines)
-        total_with_any = precise + imprecise
-        if precise > 0 and imprecise == 0 and no_ln == 0:
-            result.score += 10
-            result.passes.append(f"✅ Sources行番号: 全{precise}行に正確な行番号あり")
-        elif precise > 0:
-            result.score += 7
-            msg_parts = []
-            if imprecise > 0:
-                msg_parts.append(f"不正確{imprecise}行(範囲>{MAX_ACCEPTABLE_LINE_RANGE}行)")
-            if no_ln > 0:
-                msg_parts.append(f"行番号なし{no_ln}行")
-            result.issues.append(f"⚠️  Sources行番号: 正確{precise}行, {', '.join(msg_parts)}")
-        elif imprecise > 0:
-            result.score += 3
-            result.issues.append(f"⚠️  Sources行番号が不正確: {imprecise}行が{MAX_ACCEPTABLE_LINE_RANGE}行超の広範囲 (例: L1-L1000 は不可)")
-        else:
-            result.issues.append(f"❌ Sources行に行番号なし (例: [file.ts:L100-L200])")
-    elif sources_lines:
-        result.score += 5  # 行番号不要の場合の部分点
-
-    # --- 8. セクション数 (5点) ---
-    result.max_score += 5
-    section_count = count_sections(content)
-    min_sections = reqs['min_sections']
-    if section_count >= min_sections:
-        result.score += 5
-        result.passes.append(f"✅ セクション数: {section_count} (基準: {min_sections}以上)")
-    else:
-        result.issues.append(f"⚠️  セクション不足: {section_count} (基準: {min_sections}以上)")
-        result.score += 2 if section_count > 0 else 0
-
-    # --- 9. 概要段落 (5点) ---
-    result.max_score += 5
-    if check_overview_paragraph(content):
-        result.score += 5
-        result.passes.append("✅ 概要段落あり")
-    else:
-        result.issues.append("❌ 概要段落なし (# 見出しの直後にスコープ説明が必要)")
-
-    # --- 10. ダイアグラムの具体性 (5点) ---
-    result.max_score += 5
-    if mermaid_count > 0:
-        specific, generic = check_mermaid_has_real_names(content)
-        if specific > 0:
-            result.score += 5
-            result.passes.append(f"✅ Mermaid内に具体的な名前: {specific}個")
-        elif generic > 0:
-            result.score += 2
-            result.issues.append(f"⚠️  Mermaid内が汎用名のみ ({generic}個) → 実際のクラス名を使用")
-    else:
-        result.score += 0
-
-    # --- 11. 関連ページリンク (5点) ---
-    result.max_score += 5
-    if check_related_pages(content):
-        result.score += 5
-        result.passes.append("✅ 関連ページリンクあり")
-    else:
-        result.issues.append("⚠️  関連ページリンクなし")
-
-    # --- 12. Mermaid構文静的チェック (5点) ---
-    result.max_score += 5
-    mermaid_blocks_raw = re.findall(r'```mermaid\n([\s\S]*?)```', content)
-    mermaid_syntax_errors = []
-    for block in mermaid_blocks_raw:
-        # LRレイアウト
-        if re.search(r'\b(?:graph|flowchart)\s+LR\b', block):
-            mermaid_syntax_errors.append("LRレイアウト (graph LR / flowchart LR) が使用されています")
-        # []内に()が含まれてクォートされていない
-        unquoted_bp = re.findall(r'\[[^\]"]*\([^)]*\)[^\]"]*\]', block)
-        if unquoted_bp:
-            mermaid_syntax_errors.append(f"ノード [] 内に括弧 () が含まれているのにクォートされていません: {unquoted_bp[:1]}")
-        # ()内に[]が含まれてクォートされていない
-        unquoted_pb = re.findall(r'\([^)"]*\[[^\]]*\][^)"]*\)', block)
-        if unquoted_pb:
-            mermaid_syntax_errors.append(f"ノード () 内に角括弧 [] が含まれているのにクォートされていません: {unquoted_pb[:1]}")
-        # {}内に括弧や|が含まれてクォートされていない
-        unquoted_bs = re.findall(r'\{[^}"]*[(\[|][^}"]*\}', block)
-        if unquoted_bs:
-            mermaid_syntax_errors.append(f"ひし形ノード {{}} 内に括弧や | が含まれているのにクォートされていません: {unquoted_bs[:1]}")
-        # フローチャートのノードラベル内に|パイプが含まれてクォートされていない
-        if re.search(r'\b(?:graph|flowchart)\b', block):
-            unquoted_pipe = re.findall(r'(?:\[|\()([^"()\[\]]*\|[^"()\[\]]*?)(?:\]|\))', block)
-            if unquoted_pipe:
-                mermaid_syntax_errors.append(f"ノードラベル内に | パイプ文字が含まれているのにクォートされていません: {unquoted_pipe[:1]}")
-        # HTMLタグ
-        if re.search(r'<[a-zA-Z][^>]*>', block):
-            mermaid_syntax_errors.append("Mermaid内にHTMLタグが使用されています")
-        # シーケンス図固有チェック
-        if 'sequenceDiagram' in block:
-            # フローチャート風記法
-            if re.search(r'--\|[^|]*\|-->', block):
-                mermaid_syntax_errors.append("シーケンス図でフローチャート風記法 A--|label|-->B が使われています")
-            # コロン後が空のラベル
-            if re.search(r'(?:->>[+\-]?|-->>[+\-]?|-\)[+\-]?)\s*[\w]+\s*:\s*$', block, re.MULTILINE):
-                mermaid_syntax_errors.append("シーケンス図のメッセージ行でコロン（:）後のラベルが空です（例: A->>B:）")
-
-    if not mermaid_syntax_errors:
-        result.score += 5
-        if mermaid_count > 0:
-            result.passes.append("✅ Mermaid構文: 静的チェックOK")
-        else:
-            result.passes.append("✅ Mermaid構文: ブロックなし（チェック対象なし）")
-    else:
-        for err in mermaid_syntax_errors[:3]:
-            result.issues.append(f"❌ Mermaid構文エラー: {err}")
-
-    # --- 13. テーブル (5点) ---
-    result.max_score += 5
-    table_count = count_tables(content)
-    min_tables = reqs['min_tables']
-    if min_tables > 0:
-        if table_count >= min_tables:
-            result.score += 5
-            result.passes.append(f"✅ テーブル: {table_count}個 (基準: {min_tables}以上)")
-        elif table_count > 0:
-            result.score += 2
-            result.issues.append(f"⚠️  テーブル不足: {table_count}個 (基準: {min_tables}以上)")
-        else:
-            result.issues.append(f"❌ テーブルなし (基準: {min_tables}以上, 列挙型・定数・カテゴリをテーブルで整理)")
-    else:
-        if table_count > 0:
-            result.score += 5
-            result.passes.append(f"✅ テーブル: {table_count}個 (推奨)")
-        else:
-            result.score += 3  # medium/low ではテーブルなしでも許容
-            result.passes.append(f"✅ テーブル: 任意 (importance: {importance})")
-
-    return result
-
-
-def format_result(result: ValidationResult) -> str:
-    """結果のフォーマット"""
-    lines = []
-    basename = os.path.basename(result.file)
-    lines.append(f"{'='*60}")
-    lines.append(f"📄 {basename}")
-    lines.append(f"   Importance: {result.importance}  |  Grade: {result.grade}  |  Score: {result.score}/{result.max_score} ({result.percentage:.0f}%)")
-    lines.append(f"{'='*60}")
-
-    if result.issues:
-        lines.append("")
-        lines.append("  改善が必要:")
-        for issue in result.issues:
-            lines.append(f"    {issue}")
 
-    if result.passes:
-        lines.append("")
-        lines.append("  合格項目:")
-        for p in result.passes:
-            lines.append(f"    {p}")
+def validate_page(filepath: str, importance: Optional[str] = None,
+                  source_roots: Optional[tuple] = None, timed: bool = False) -> ValidationResult:
+    """1ページを deepwiki プロファイルで検証"""
+    return validation_engine.validate_page(filepath, importance, source_roots, PROFILE.name, timed)
 
-    if getattr(result, 'mermaid_validation_errors', None):
-        lines.append("")
-        lines.append("  ❌ Mermaid構文エラー:")
-        for err in result.mermaid_validation_errors:
-            indented_err = "\n".join([f"    > {line}" for line in err.split("\n")])
-            lines.append(indented_err)
 
-    lines.append("")
-    return '\n'.join(lines)
+def validate_pages(filepaths: list, importance: Optional[str] = None, jobs: int = 1,
+                   cache_path: Optional[str] = None, source_roots: Optional[tuple] = None,
+                   timed: bool = False) -> list:
+    """複数ページを deepwiki プロファイルで検証し、入力順に結果を返す"""
+    return validation_engine.validate_pages(filepaths, importance, jobs, cache_path, source_roots,
+                                            PROFILE.name, timed)
 
 
 def format_summary(results: list) -> str:
     """全体サマリーのフォーマット"""
-    lines = []
-    lines.append(f"\n{'#'*60}")
-    lines.append(f"  DeepWiki 品質レポート")
-    lines.append(f"{'#'*60}\n")
-
-    total_score = sum(r.score for r in results)
-    total_max = sum(r.max_score for r in results)
-    avg_pct = (total_score / total_max * 100) if total_max > 0 else 0
-
-    # グレード分布
-    grades = {}
-    for r in results:
-        g = r.grade
-        grades[g] = grades.get(g, 0) + 1
-
-    lines.append(f"  総合スコア: {total_score}/{total_max} ({avg_pct:.0f}%)")
-    lines.append(f"  ページ数: {len(results)}")
-    lines.append(f"  グレード分布: {', '.join(f'{g}={c}' for g, c in sorted(grades.items()))}")
-    lines.append("")
-
-    # ページ別サマリー表
-    lines.append(f"  {'ページ':<45} {'Grade':>5}  {'Score':>10}")
-    lines.append(f"  {'-'*45} {'-'*5}  {'-'*10}")
-    for r in results:
-        basename = os.path.basename(r.file)
-        lines.append(f"  {basename:<45} {r.grade:>5}  {r.score:>3}/{r.max_score:<3} ({r.percentage:.0f}%)")
-
-    # 不合格ページ
-    failing = [r for r in results if r.grade in ('D', 'F')]
-    if failing:
-        lines.append(f"\n  ⚠️  要改善ページ ({len(failing)}件):")
-        for r in failing:
-            basename = os.path.basename(r.file)
-            top_issues = [i for i in r.issues if i.startswith('❌')][:3]
-            lines.append(f"    - {basename}: {', '.join(top_issues)}")
-
-    lines.append("")
-    return '\n'.join(lines)
+    return validation_engine.format_summary(results, PROFILE.name)
 
 
 # --- Wiki 全体構造バリデーション ---
 
 # 規模別ガイドライン（SKILL.md Phase 2 と同期）
-SCALE_GUIDELINES = {
-    "small": {
-        "label": "小規模",
-        "file_count": "<30",
-        "min_sections": 3,
-        "max_sections": 4,
-        "min_pages": 8,
-        "max_pages": 15,
-    },
-    "medium": {
-        "label": "中規模",
-        "file_count": "30-200",
-        "min_sections": 4,
-        "max_sections": 6,
-        "min_pages": 15,
-        "max_pages": 30,
-    },
-    "large": {
-        "label": "大規模",
-        "file_count": ">200",
-        "min_sections": 6,
-        "max_sections": 8,
-        "min_pages": 30,
-        "max_pages": 50,
-    },
-}
+SCALE_GUIDELINES = PROFILE.scale_guidelines
 
 # 必須セクション（SKILL.md のセクション構成テンプレートに基づく）
 SECTION_DEFINITIONS = {
@@ -913,12 +383,26 @@ def generate_ai_corrections(results: list, ws: Optional[WikiStructureResult] = N
                 action_parts.append(
                     "テーブルを追加してください。対象: 列挙型の値一覧、定数グループ、コンポーネントの役割分担、設定パラメータ等。"
                 )
+            elif 'ソースに存在しないスニペット' in issue:
+                action_parts.append(
+                    f"実際のソースに存在しないスニペットがあります: {issue}\n"
+                    "          疑似コードや推測で書いたコードは削除し、対象ファイルから該当行をそのままコピーしてください。"
+                )
+            elif '出典ファイル' in issue or '出典の行範囲' in issue:
+                action_parts.append(
+                    f"出典のパス・行番号が実ファイルと一致しません: {issue}\n"
+                    "          ファイル閲覧ツール等で対象ファイルを開き、実在するパスと実際の行範囲に修正してください。"
+                )
 
         for issue in warning_issues:
             if 'Mermaid種類が単一' in issue or 'Mermaid内が汎用名' in issue:
                 action_parts.append(
                     "Mermaidダイアグラムの種類を増やしてください。graph TD だけでなく sequenceDiagram や stateDiagram-v2 も使い分けてください。"
                 )
+            elif 'スニペットの行番号ずれ' in issue:
+                action_parts.append(
+                    f"スニペットの出典コメントの行番号を実際の位置に修正してください: {issue}"
+                )
             elif '行番号が不正確' in issue or '行番号なし' in issue:
                 action_parts.append(
                     "Sources行の行番号を正確にしてください。L1-L1000 のような広範囲は不可。参照した関数・クラスの実際の行範囲を200行以内で記載してください。"
@@ -955,6 +439,94 @@ def generate_ai_corrections(results: list, ws: Optional[WikiStructureResult] = N
     return '\n'.join(lines)
 
 
+def build_json_report(results: list, ws: WikiStructureResult, sections: dict,
+                      timings: Optional[list] = None) -> dict:
+    """ディレクトリ検証結果を JSON 出力用の辞書にまとめる"""
+    report = {
+        "summary": build_page_summary(results),
+        "pages": [r.to_dict() for r in results],
+        "structure": {
+            **asdict(ws),
+            "percentage": round(ws.score / ws.max_score * 100, 1) if ws.max_score > 0 else 0,
+            "sections": {str(k): v for k, v in sorted(sections.items())},
+        },
+    }
+    if timings is not None:
+        report["timings"] = timings_to_json(timings)
+    return report
+
+
+def format_page_diff(name: str, before: Optional[ValidationResult],
+                     after: Optional[ValidationResult]) -> list:
+    """1ページの再検証前後のスコア変化と、増えた・解消した指摘を短く表す"""
+    if after is None:
+        return [f"  🗑  {name}: 削除"]
+    score = f"{after.grade} {after.score}/{after.max_score} ({after.percentage:.0f}%)"
+    if before is None:
+        return [f"  ➕ {name}: {score}"]
+
+    delta = after.score - before.score
+    if delta == 0 and before.max_score == after.max_score:
+        line = f"  ・ {name}: {score} (スコア変化なし)"
+    else:
+        line = (f"  {'⬆' if delta >= 0 else '⬇'}  {name}: {before.grade} {before.score}/{before.max_score}"
+                f" → {score} ({delta:+d})")
+    lines = [line]
+    lines += [f"      + {i}" for i in after.issues if i not in before.issues]
+    lines += [f"      - {i}" for i in before.issues if i not in after.issues]
+    return lines
+
+
+def watch_directory(target: str, results: list, importance: Optional[str], scale: Optional[str],
+                    source_roots: Optional[tuple], polling: bool = False) -> None:
+    """Wiki ディレクトリを監視し、保存されたページだけを再検証してスコアの変化を表示する。
+    ページ結果はメモリ上に保持し、Wiki 構造チェックはその結果から再計算する（ファイルは読み直さない）。
+    """
+    pages = {os.path.basename(r.file): r for r in results}
+    ws = validate_wiki_structure([pages[n] for n in sorted(pages)], scale)
+    watcher = open_watcher(target, polling=polling)
+    print(f"👀 {target} を監視中 ({watcher.kind}) — Ctrl+C で終了\n", flush=True)
+
+    try:
+        while True:
+            changed = watcher.wait()
+            started = time.perf_counter()
+            # 出典ファイルも編集されている可能性があるため、ソース索引は毎回作り直す
+            get_source_index.cache_clear()
+
+            lines = []
+            for name in sorted(changed):
+                path = os.path.join(target, name)
+                before = pages.get(name)
+                after = None
+                if os.path.isfile(path):
+                    try:
+                        after = validate_page(path, importance, source_roots)
+                    except (OSError, UnicodeDecodeError) as e:
+                        lines.append(f"  ⚠️  {name}: 読み込めません ({e})")
+                        continue
+                    pages[name] = after
+                elif pages.pop(name, None) is None:
+                    continue
+                lines.extend(format_page_diff(name, before, after))
+            if not lines:
+                continue
+
+            new_ws = validate_wiki_structure([pages[n] for n in sorted(pages)], scale)
+            if (new_ws.score, new_ws.max_score) != (ws.score, ws.max_score):
+                lines.append(f"  📊 Wiki 構造: {ws.score}/{ws.max_score} → {new_ws.score}/{new_ws.max_score}"
+                             f" ({new_ws.score - ws.score:+d})")
+            ws = new_ws
+
+            elapsed = time.perf_counter() - started
+            print(f"[{time.strftime('%H:%M:%S')}] {len(changed)}ページ再検証 ({elapsed:.2f}秒)")
+            print('\n'.join(lines) + '\n', flush=True)
+    except KeyboardInterrupt:
+        print("\n監視を終了しました")
+    finally:
+        watcher.close()
+
+
 def main():
     if len(sys.argv) < 2:
         print(__doc__)
@@ -963,6 +535,14 @@ def main():
     target = sys.argv[1]
     importance_override = None
     scale_override = None
+    jobs = 1
+    use_cache = '--no-cache' not in sys.argv
+    watch = '--watch' in sys.argv
+    dedupe = '--dedupe' in sys.argv
+    timed = '--timings' in sys.argv
+    dedupe_threshold = page_dedupe.DEFAULT_THRESHOLD
+    output_format = 'text'
+    source_roots = None
 
     if '--importance' in sys.argv:
         idx = sys.argv.index('--importance')
@@ -974,14 +554,71 @@ def main():
         if idx + 1 < len(sys.argv):
             scale_override = sys.argv[idx + 1]
 
+    if '--jobs' in sys.argv:
+        idx = sys.argv.index('--jobs')
+        if idx + 1 < len(sys.argv):
+            try:
+                jobs = int(sys.argv[idx + 1])
+            except ValueError:
+                print(f"ERROR: --jobs には整数を指定してください: {sys.argv[idx + 1]}")
+                sys.exit(1)
+
+    if '--format' in sys.argv:
+        idx = sys.argv.index('--format')
+        if idx + 1 < len(sys.argv):
+            output_format = sys.argv[idx + 1]
+        if output_format not in ('text', 'json'):
+            print(f"ERROR: --format は text または json を指定してください: {output_format}")
+            sys.exit(1)
+
+    if '--target-dir' in sys.argv:
+        idx = sys.argv.index('--target-dir')
+        if idx + 1 < len(sys.argv):
+            if not os.path.isdir(sys.argv[idx + 1]):
+                print(f"ERROR: --target-dir が見つかりません: {sys.argv[idx + 1]}")
+                sys.exit(1)
+            source_roots = (os.path.abspath(sys.argv[idx + 1]),)
+
+    if '--dedupe-threshold' in sys.argv:
+        idx = sys.argv.index('--dedupe-threshold')
+        if idx + 1 < len(sys.argv):
+            try:
+                dedupe_threshold = float(sys.argv[idx + 1])
+            except ValueError:
+                dedupe_threshold = -1.0
+            if not 0.0 < dedupe_threshold <= 1.0:
+                print(f"ERROR: --dedupe-threshold には 0 より大きく 1 以下の数値を指定してください: {sys.argv[idx + 1]}")
+                sys.exit(1)
+
+    if dedupe:
+        if not os.path.isdir(target):
+            print("ERROR: --dedupe は Wiki ディレクトリに対してのみ使用できます")
+            sys.exit(1)
+        md_files = sorted(Path(target).glob('*.md'))
+        report = page_dedupe.analyze([str(f) for f in md_files], dedupe_threshold)
+        if output_format == 'json':
+            print(json.dumps(report, ensure_ascii=False, indent=2))
+        else:
+            print(page_dedupe.format_report(report))
+        sys.exit(0)
+
+    if watch and (output_format != 'text' or not os.path.isdir(target)):
+        print("ERROR: --watch は Wiki ディレクトリの text 出力でのみ使用できます")
+        sys.exit(1)
+
     # 単一ファイル or ディレクトリ
     if os.path.isfile(target):
-        result = validate_page(target, importance_override)
-        print(format_result(result))
+        result = validate_page(target, importance_override, source_roots, timed)
+        if output_format == 'json':
+            print(json.dumps(result.to_dict(), ensure_ascii=False, indent=2))
+        else:
+            print(format_result(result))
+            if timed:
+                print(format_timings(aggregate_timings([result])))
 
-        # ページ単体でもAI修正指示を出す
-        if result.grade in ('C', 'D', 'F'):
-            print(generate_ai_corrections([result]))
+            # ページ単体でもAI修正指示を出す
+            if result.grade in ('C', 'D', 'F'):
+                print(generate_ai_corrections([result]))
 
         # 終了コード: Grade B以上が合格
         sys.exit(0 if result.grade in ('A', 'B') else 1)
@@ -992,26 +629,37 @@ def main():
             print(f"ERROR: {target} に .md ファイルがありません")
             sys.exit(1)
 
-        results = []
-        for md_file in md_files:
-            result = validate_page(str(md_file), importance_override)
-            results.append(result)
-
-        # Now we can safely print the outputs
-        for result in results:
-            print(format_result(result))
-
-        print(format_summary(results))
+        cache_path = os.path.join(target, CACHE_FILENAME) if use_cache else None
+        results = validate_pages([str(f) for f in md_files], importance_override, jobs, cache_path,
+                                 source_roots, timed)
 
         # Wiki 構造チェック
+        started = time.perf_counter()
         ws = validate_wiki_structure(results, scale_override)
         sections, _ = analyze_sections(results)
-        print(format_structure_result(ws, sections))
+        timings = aggregate_timings(results, {'structure': time.perf_counter() - started}) if timed else None
+
+        if output_format == 'json':
+            print(json.dumps(build_json_report(results, ws, sections, timings), ensure_ascii=False, indent=2))
+        else:
+            for result in results:
+                print(format_result(result))
+
+            print(format_summary(results))
+            print(format_structure_result(ws, sections))
+
+            # AI 修正指示
+            problem_pages = [r for r in results if r.grade in ('C', 'D', 'F')]
+            if problem_pages or ws.issues:
+                print(generate_ai_corrections(results, ws))
+
+            if timings is not None:
+                print(format_timings(timings))
 
-        # AI 修正指示
-        problem_pages = [r for r in results if r.grade in ('C', 'D', 'F')]
-        if problem_pages or ws.issues:
-            print(generate_ai_corrections(results, ws))
+        if watch:
+            watch_directory(target, results, importance_override, scale_override, source_roots,
+                            polling='--poll' in sys.argv)
+            sys.exit(0)
 
         # 全ページ B以上なら成功
         failing = [r for r in results if r.grade in ('C', 'D', 'F')]
@@ -0,0 +1,1132 @@
+"""
+Wiki ページ品質バリデーターの共通エンジン。
+
+deepwiki の validate_page.py と microservices-wiki の validate_arch_page.py が共有する。
+検証ルールは RULES に1度だけ登録し、正規表現もモジュール読み込み時に1度だけコンパイルする。
+各 Wiki 種別はプロファイル (PROFILES) として、使うルールの組・品質基準・規模ガイドライン・
+指摘メッセージの例示を選ぶ。ページ本文は ParsedDocument として1度だけ解析し、
+Mermaid ブロックや Sources 行などの解析結果を全ルールで使い回す。
+
+プロファイル名を渡せば1プロセスで両方の Wiki を検証できる:
+  validate_pages(deepwiki_pages, profile='deepwiki')
+  validate_pages(arch_pages, profile='arch')
+
+このファイルは deepwiki/scripts と microservices-wiki/scripts に同一内容で置く。
+"""
+import os
+import re
+import sys
+import json
+import math
+import hashlib
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from functools import cached_property
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import mermaid_complexity
+import mermaid_parser
+import scanners
+import source_index
+from scanners import (
+    find_delimited, has_marked_path, has_pattern_on_same_line, is_table_row, is_table_separator,
+)
+from source_index import get_source_index, load_source_roots, verify_citations, verify_snippets
+
+
+@dataclass
+class ValidationResult:
+    """1ページのバリデーション結果"""
+    file: str
+    importance: str  # high / medium / low / index
+    score: int = 0  # 0-100
+    max_score: int = 0
+    issues: list = field(default_factory=list)
+    passes: list = field(default_factory=list)
+    findings: list = field(default_factory=list)  # issues の構造化版 (JSON 出力用)
+    source_files: list = field(default_factory=list)  # 出典として参照したソースファイル
+    timings: dict = field(default_factory=dict)  # 計測時のみ: 解析要素・ルールごとの所要秒数
+
+    def add_issue(self, rule: str, severity: str, message: str, measured=None, required=None) -> None:
+        """指摘を追加する。issues には表示用の文字列、findings には構造化データを記録する。
+        severity: error (❌) / warning (⚠️)
+        """
+        mark = '❌' if severity == 'error' else '⚠️ '
+        self.issues.append(f"{mark} {message}")
+        self.findings.append({
+            "rule": rule,
+            "severity": severity,
+            "message": message,
+            "measured": measured,
+            "required": required,
+        })
+
+    def to_dict(self) -> dict:
+        """JSON 出力用の辞書を返す"""
+        return {
+            "file": self.file,
+            "importance": self.importance,
+            "score": self.score,
+            "max_score": self.max_score,
+            "percentage": round(self.percentage, 1),
+            "grade": self.grade,
+            "issues": self.findings,
+            "passes": self.passes,
+            **({"timings": {k: round(v, 6) for k, v in self.timings.items()}} if self.timings else {}),
+        }
+
+    @property
+    def grade(self) -> str:
+        pct = (self.score / self.max_score * 100) if self.max_score > 0 else 0
+        if pct >= 90:
+            return "A"
+        elif pct >= 75:
+            return "B"
+        elif pct >= 60:
+            return "C"
+        elif pct >= 40:
+            return "D"
+        else:
+            return "F"
+
+    @property
+    def percentage(self) -> float:
+        return (self.score / self.max_score * 100) if self.max_score > 0 else 0
+
+
+# Sources 行番号の精度しきい値（この行数以上の範囲は「不正確」）
+MAX_ACCEPTABLE_LINE_RANGE = 200
+
+# --- 正規表現（モジュール読み込み時に1度だけコンパイル） ---
+# 生成テキストに対して開始位置ごとの再走査（バックトラッキング）が起きうる判定は
+# 正規表現ではなく scanners.py の線形時間の走査関数で行う。
+CODE_BLOCK_ANY_RE = re.compile(r'```[\s\S]*?```')
+FENCE_LANG_RE = re.compile(r'```(\w*)')
+LANG_BLOCK_RE = re.compile(r'```\w+\n([\s\S]*?)```')
+MERMAID_BLOCK_RE = re.compile(r'```mermaid\n([\s\S]*?)```')
+MARKDOWN_SYMBOL_RE = re.compile(r'[#|>\-*`\[\]()]')
+JP_CHAR_RE = re.compile(r'[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FFF]')
+EN_WORD_RE = re.compile(r'[a-zA-Z]+')
+SOURCES_LINE_RE = re.compile(r'^.*Sources?:.*$', re.MULTILINE)
+LINE_RANGE_RE = re.compile(r'L(\d+)[-–]L?(\d+)')
+LINE_NUMBER_RE = re.compile(r'L\d+')
+SECTION_RE = re.compile(r'^## ', re.MULTILINE)
+RELATED_PAGES_RE = re.compile(r'(関連ページ|Related|← 前|→ 次|参照)', re.IGNORECASE)
+PASCAL_CASE_RE = re.compile(r'[A-Z][a-z]+[A-Z]')
+KEBAB_NAME_RE = re.compile(r'[a-zA-Z][a-zA-Z0-9_-]+-[a-zA-Z]')
+SECTION_NUMBER_RE = re.compile(r'(\d+)\.(\d+)')
+
+# 通信プロトコル (表示名, パターン)
+PROTOCOL_PATTERNS = [
+    (name, re.compile(pattern, re.IGNORECASE)) for name, pattern in [
+        ('REST', r'\bREST\b'), ('gRPC', r'\bgRPC\b'), ('HTTP', r'\bHTTP\b'), ('HTTPS', r'\bHTTPS\b'),
+        ('Kafka', r'\bKafka\b'), ('RabbitMQ', r'\bRabbitMQ\b'), ('NATS', r'\bNATS\b'), ('SQS', r'\bSQS\b'),
+        ('WebSocket', r'\bWebSocket\b'), ('GraphQL', r'\bGraphQL\b'),
+    ]
+]
+# 'Event ... Streaming' は同じ行内の2語の組み合わせとして scanners で判定する
+EVENT_RE = re.compile(r'\bEvent\b', re.IGNORECASE)
+STREAMING_RE = re.compile(r'\bStreaming\b', re.IGNORECASE)
+
+# Mermaid の先頭行 → 種類名
+MERMAID_TYPES = [
+    ('graph', 'graph'), ('flowchart', 'flowchart'), ('sequencediagram', 'sequenceDiagram'),
+    ('classdiagram', 'classDiagram'), ('statediagram', 'stateDiagram'), ('erdiagram', 'erDiagram'),
+    ('gantt', 'gantt'), ('pie', 'pie'),
+]
+
+
+class ParsedDocument:
+    """ページ本文の解析結果。各要素は初回参照時に1度だけ計算し、全ルールで共有する"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    @cached_property
+    def lines(self) -> list:
+        return self.text.split('\n')
+
+    @cached_property
+    def prose(self) -> str:
+        """コードブロックと Mermaid を除いた本文"""
+        return CODE_BLOCK_ANY_RE.sub('', self.text)
+
+    @cached_property
+    def fence_langs(self) -> list:
+        """``` の直後の言語名（閉じフェンスは空文字）"""
+        return FENCE_LANG_RE.findall(self.text)
+
+    @cached_property
+    def code_snippet_count(self) -> int:
+        """Mermaid 以外のコードブロック数"""
+        return sum(1 for lang in self.fence_langs if lang and lang != 'mermaid')
+
+    @cached_property
+    def lang_blocks(self) -> list:
+        """言語名付きコードブロックの本文"""
+        return LANG_BLOCK_RE.findall(self.text)
+
+    @cached_property
+    def mermaid_blocks(self) -> list:
+        return MERMAID_BLOCK_RE.findall(self.text)
+
+    @cached_property
+    def mermaid_diagrams(self) -> list:
+        """Mermaid ブロックの mermaid_parser による解析結果"""
+        return [mermaid_parser.parse(block) for block in self.mermaid_blocks]
+
+    @cached_property
+    def mermaid_count(self) -> int:
+        return self.text.count('```mermaid')
+
+    @cached_property
+    def sources_lines(self) -> list:
+        return SOURCES_LINE_RE.findall(self.text)
+
+    @cached_property
+    def section_count(self) -> int:
+        """## レベルの見出し数"""
+        return len(SECTION_RE.findall(self.text))
+
+
+# 計測時に先に解析して所要時間を個別に記録する ParsedDocument の要素
+PARSED_FIELDS = tuple(name for name, value in vars(ParsedDocument).items() if isinstance(value, cached_property))
+
+
+# --- 解析ヘルパー ---
+
+def count_words(doc: ParsedDocument) -> int:
+    """日本語+英語の混合テキストの語数を推定。
+    日本語: 文字数 ≒ 語数（助詞等含む）
+    英語: スペース区切り
+    """
+    cleaned = MARKDOWN_SYMBOL_RE.sub(' ', doc.prose)
+    return len(JP_CHAR_RE.findall(cleaned)) + len(EN_WORD_RE.findall(cleaned))
+
+
+def get_mermaid_types(doc: ParsedDocument) -> set:
+    """使用されている Mermaid ダイアグラムの種類を返す"""
+    types = set()
+    for block in doc.mermaid_blocks:
+        first_line = block.strip().split('\n')[0].strip().lower()
+        for prefix, name in MERMAID_TYPES:
+            if first_line.startswith(prefix):
+                types.add(name)
+                break
+        else:
+            types.add('other')
+    return types
+
+
+def count_tables(doc: ParsedDocument) -> int:
+    """Markdown テーブルの数をカウント（ヘッダ行 + 区切り行のペアで判定）"""
+    lines = doc.lines
+    return sum(
+        1 for i in range(len(lines) - 1)
+        if is_table_row(lines[i]) and is_table_separator(lines[i + 1])
+    )
+
+
+def check_line_numbers_in_sources(sources_lines: list) -> tuple:
+    """Sources 行に行番号 (L数字) が含まれているか。精度もチェック。
+    Returns: (正確な行数, 範囲が広すぎる行数, 行番号なしの行数)
+    """
+    with_line_nums = 0
+    with_imprecise_line_nums = 0
+    without_line_nums = 0
+
+    for line in sources_lines:
+        ranges = LINE_RANGE_RE.findall(line)
+        if ranges:
+            if all(int(end) - int(start) <= MAX_ACCEPTABLE_LINE_RANGE for start, end in ranges):
+                with_line_nums += 1
+            else:
+                with_imprecise_line_nums += 1
+        elif LINE_NUMBER_RE.search(line):
+            with_line_nums += 1
+        else:
+            without_line_nums += 1
+
+    return with_line_nums, with_imprecise_line_nums, without_line_nums
+
+
+def check_overview_paragraph(doc: ParsedDocument) -> bool:
+    """冒頭に概要段落があるか（# 見出しと最初の ## の間にテキストがあるか）"""
+    found_h1 = False
+    for line in doc.lines:
+        if line.startswith('# '):
+            found_h1 = True
+            continue
+        if found_h1 and line.startswith('## '):
+            break
+        if found_h1 and line.strip() and not line.startswith('#') and \
+           not line.startswith('```') and not line.startswith('>'):
+            return True
+    return False
+
+
+# --- プロファイル ---
+
+@dataclass(frozen=True)
+class Profile:
+    """Wiki 種別ごとのルール構成と品質基準"""
+    name: str
+    title: str  # サマリーの見出し
+    rules: tuple  # 実行するルール ID（この順に採点・出力する）
+    requirements: dict  # importance → 品質基準
+    scale_guidelines: dict  # 規模 → ページ数・セクション数の目安
+    high_sections: tuple  # importance を high とみなすセクション番号
+    snippet_citation_patterns: tuple  # スニペット出典コメントとみなす (コメント記号, パス末尾のパターン)（いずれか一致）
+    generic_names: frozenset  # Mermaid ラベルとして汎用的すぎる名前
+    examples: dict  # 指摘メッセージに添える記法の例
+
+
+def _requirements(index_min_tables: int) -> dict:
+    requirements = {
+        "high": {
+            "min_words": 1200,
+            "min_mermaid": 2,
+            "min_mermaid_types": 2,
+            "min_code_snippets": 5,
+            "min_sources_lines": 4,
+            "sources_need_line_numbers": True,
+            "min_sections": 4,
+            "min_tables": 1,
+        },
+        "medium": {
+            "min_words": 600,
+            "min_mermaid": 1,
+            "min_mermaid_types": 1,
+            "min_code_snippets": 3,
+            "min_sources_lines": 3,
+            "sources_need_line_numbers": True,
+            "min_sections": 3,
+            "min_tables": 0,
+        },
+        "low": {
+            "min_words": 300,
+            "min_mermaid": 1,
+            "min_mermaid_types": 1,
+            "min_code_snippets": 1,
+            "min_sources_lines": 2,
+            "sources_need_line_numbers": True,
+            "min_sections": 2,
+            "min_tables": 0,
+        },
+        "index": {
+            "min_words": 200,
+            "min_mermaid": 1,
+            "min_mermaid_types": 1,
+            "min_code_snippets": 0,
+            "min_sources_lines": 0,
+            "sources_need_line_numbers": False,
+            "min_sections": 2,
+            "min_tables": index_min_tables,
+        },
+    }
+    # Mermaid 図1つあたりの規模の予算（超過は警告のみで採点しない）
+    for reqs in requirements.values():
+        reqs["mermaid_budgets"] = dict(mermaid_complexity.MERMAID_BUDGETS)
+    return requirements
+
+
+PROFILES: Dict[str, Profile] = {
+    # 品質基準は Claude Opus 版を標準とする
+    'deepwiki': Profile(
+        name='deepwiki',
+        title='DeepWiki 品質レポート',
+        rules=(
+            'words', 'mermaid_count', 'mermaid_types', 'code_snippets', 'snippet_citations',
+            'sources_lines', 'sources_line_numbers', 'sections', 'overview', 'mermaid_names',
+            'related_pages', 'mermaid_syntax', 'mermaid_complexity', 'tables', 'source_citations',
+            'snippet_authenticity',
+        ),
+        requirements=_requirements(index_min_tables=0),
+        # SKILL.md Phase 2 と同期
+        scale_guidelines={
+            "small": {"label": "小規模", "file_count": "<30",
+                      "min_sections": 3, "max_sections": 4, "min_pages": 8, "max_pages": 15},
+            "medium": {"label": "中規模", "file_count": "30-200",
+                       "min_sections": 4, "max_sections": 6, "min_pages": 15, "max_pages": 30},
+            "large": {"label": "大規模", "file_count": ">200",
+                      "min_sections": 6, "max_sections": 8, "min_pages": 30, "max_pages": 50},
+        },
+        # Overview (1.x), Core Systems (4.x)
+        high_sections=(1, 4),
+        # // は TS/JS/Go/Rust/Java など、# は Python/Ruby/Shell/YAML など
+        snippet_citation_patterns=(
+            (('//', '#'), re.compile(
+                r'\.(ts|js|py|go|rs|java|tsx|jsx|vue|sh|rb|kt|swift|cs|cpp|c|h|php|scala|ex|exs|dart|lua|r)\s*[:\s]L\d+'
+            )),
+        ),
+        generic_names=frozenset({
+            'Component', 'Module', 'Service', 'System', 'Client', 'Server',
+            'Manager', 'Handler', 'Engine', 'Registry', 'Controller',
+        }),
+        examples={
+            'snippet_citation': '// path/to/file.ts:L行番号 形式のコメントが必要',
+            'sources_line_numbers': '例: [file.ts:L100-L200]',
+            'code_snippets': '',
+            'tables': '列挙型・定数・カテゴリをテーブルで整理',
+        },
+    ),
+    'arch': Profile(
+        name='arch',
+        title='microservices-wiki 品質レポート',
+        rules=(
+            'words', 'mermaid_count', 'mermaid_types', 'code_snippets', 'snippet_citations',
+            'sources_lines', 'sources_line_numbers', 'sections', 'overview', 'related_pages',
+            'mermaid_complexity', 'tables', 'arch_service_names', 'arch_protocols', 'source_citations', 'snippet_authenticity',
+        ),
+        requirements=_requirements(index_min_tables=1),
+        scale_guidelines={
+            "small": {"label": "小規模 (3-5サービス)",
+                      "min_pages": 10, "max_pages": 18, "min_sections": 3, "max_sections": 5},
+            "medium": {"label": "中規模 (6-15サービス)",
+                       "min_pages": 18, "max_pages": 30, "min_sections": 4, "max_sections": 6},
+            "large": {"label": "大規模 (16サービス以上)",
+                      "min_pages": 30, "max_pages": 50, "min_sections": 5, "max_sections": 8},
+        },
+        # System Overview (1.x), Service Communication (2.x)
+        high_sections=(1, 2),
+        # インフラ定義ファイルはファイル名のみ、コードは path:L行番号 形式
+        snippet_citation_patterns=(
+            (('#', '//', '--'), re.compile(r'\.(ya?ml|tf|json|sql|conf|proto|toml)\s*[:\s]')),
+            (('//',), re.compile(r'\.(ts|js|py|go|rs|java)\s*[:\s]L\d+')),
+        ),
+        generic_names=frozenset({
+            'ServiceA', 'ServiceB', 'ServiceC',
+            'service-a', 'service-b', 'service-c',
+            'Service', 'Microservice', 'Backend', 'Frontend',
+            'API', 'Client', 'Server', 'Database', 'Cache',
+            'Component', 'Module', 'System',
+        }),
+        examples={
+            'snippet_citation': '# path/to/file.yml 形式のコメントが必要',
+            'sources_line_numbers': '例: [docker-compose.yml:L1-L45]',
+            'code_snippets': ', インフラ定義ファイルから引用',
+            'tables': 'サービス一覧・API一覧等をテーブルで整理',
+        },
+    ),
+}
+
+
+def get_profile(profile) -> Profile:
+    """プロファイル名または Profile を Profile に解決する"""
+    return profile if isinstance(profile, Profile) else PROFILES[profile]
+
+
+def detect_importance(filepath: str, profile='deepwiki') -> str:
+    """ファイルパスから importance を推測（セクション番号ベース）"""
+    basename = os.path.basename(filepath)
+    if basename == 'index.md':
+        return 'index'
+
+    # x.y 形式の番号を抽出
+    match = SECTION_NUMBER_RE.match(basename)
+    if match:
+        return 'high' if int(match.group(1)) in get_profile(profile).high_sections else 'medium'
+
+    return 'medium'  # デフォルト
+
+
+# --- ルール登録 ---
+
+@dataclass
+class RuleContext:
+    """ルールに渡す検証対象と設定"""
+    doc: ParsedDocument
+    profile: Profile
+    importance: str
+    reqs: dict
+    source_roots: tuple
+
+    @cached_property
+    def source_index(self):
+        return get_source_index(tuple(self.source_roots))
+
+
+RULES: Dict[str, Callable[[RuleContext, ValidationResult], None]] = {}
+
+
+def rule(rule_id: str):
+    """検証ルールを RULES に登録するデコレーター。rule_id は指摘の rule にも使う"""
+    def register(func):
+        RULES[rule_id] = func
+        return func
+    return register
+
+
+@rule('words')
+def rule_words(ctx: RuleContext, result: ValidationResult) -> None:
+    """語数 (15点)"""
+    result.max_score += 15
+    word_count = count_words(ctx.doc)
+    min_words = ctx.reqs['min_words']
+    if word_count >= min_words:
+        result.score += 15
+        result.passes.append(f"✅ 語数: {word_count} (基準: {min_words}以上)")
+    elif word_count >= min_words * 0.7:
+        result.score += 8
+        result.add_issue('words', 'warning', f"語数不足: {word_count} (基準: {min_words}以上, 70%以上なので部分点)", measured=word_count, required=min_words)
+    else:
+        result.add_issue('words', 'error', f"語数不足: {word_count} (基準: {min_words}以上)", measured=word_count, required=min_words)
+
+
+@rule('mermaid_count')
+def rule_mermaid_count(ctx: RuleContext, result: ValidationResult) -> None:
+    """Mermaid ダイアグラム数 (10点)"""
+    result.max_score += 10
+    mermaid_count = ctx.doc.mermaid_count
+    min_mermaid = ctx.reqs['min_mermaid']
+    if mermaid_count >= min_mermaid:
+        result.score += 10
+        result.passes.append(f"✅ Mermaid: {mermaid_count}個 (基準: {min_mermaid}以上)")
+    elif mermaid_count > 0:
+        result.score += 5
+        result.add_issue('mermaid_count', 'warning', f"Mermaid不足: {mermaid_count}個 (基準: {min_mermaid}以上)", measured=mermaid_count, required=min_mermaid)
+    else:
+        result.add_issue('mermaid_count', 'error', f"Mermaidなし (基準: {min_mermaid}以上)", measured=mermaid_count, required=min_mermaid)
+
+
+@rule('mermaid_types')
+def rule_mermaid_types(ctx: RuleContext, result: ValidationResult) -> None:
+    """Mermaid 種類の多様性 (5点)"""
+    result.max_score += 5
+    mermaid_types = get_mermaid_types(ctx.doc)
+    min_types = ctx.reqs['min_mermaid_types']
+    if len(mermaid_types) >= min_types:
+        result.score += 5
+        result.passes.append(f"✅ Mermaid種類: {', '.join(sorted(mermaid_types))} ({len(mermaid_types)}種類, 基準: {min_types}以上)")
+    elif len(mermaid_types) > 0:
+        result.score += 2
+        result.add_issue('mermaid_types', 'warning', f"Mermaid種類不足: {', '.join(sorted(mermaid_types))} ({len(mermaid_types)}種類, 基準: {min_types}以上)", measured=len(mermaid_types), required=min_types)
+    else:
+        result.add_issue('mermaid_types', 'error', "Mermaidなし", measured=0, required=min_types)
+
+
+@rule('code_snippets')
+def rule_code_snippets(ctx: RuleContext, result: ValidationResult) -> None:
+    """コードスニペット数 (15点)"""
+    result.max_score += 15
+    snippet_count = ctx.doc.code_snippet_count
+    min_snippets = ctx.reqs['min_code_snippets']
+    if snippet_count >= min_snippets:
+        result.score += 15
+        result.passes.append(f"✅ コードスニペット: {snippet_count}個 (基準: {min_snippets}以上)")
+    elif snippet_count > 0 and min_snippets > 0:
+        # 割合に応じた部分点
+        partial = min(10, int(15 * snippet_count / min_snippets))
+        result.score += partial
+        result.add_issue('code_snippets', 'warning', f"コードスニペット不足: {snippet_count}個 (基準: {min_snippets}以上)", measured=snippet_count, required=min_snippets)
+    elif min_snippets > 0:
+        result.add_issue('code_snippets', 'error', f"コードスニペットなし (基準: {min_snippets}以上{ctx.profile.examples['code_snippets']})", measured=snippet_count, required=min_snippets)
+    else:
+        result.score += 15
+        result.passes.append(f"✅ コードスニペット: 不要 (importance: {ctx.importance})")
+
+
+@rule('snippet_citations')
+def rule_snippet_citations(ctx: RuleContext, result: ValidationResult) -> None:
+    """スニペット出典コメント (5点)。スニペットがなければ出典もチェックしない"""
+    result.max_score += 5
+    snippet_count = ctx.doc.code_snippet_count
+    if snippet_count == 0:
+        return
+    patterns = ctx.profile.snippet_citation_patterns
+    citation_count = sum(
+        1 for block in ctx.doc.lang_blocks
+        if any(has_marked_path(block, markers, tail) for markers, tail in patterns)
+    )
+    required = math.ceil(snippet_count * 0.6)
+    if citation_count >= snippet_count * 0.6:
+        result.score += 5
+        result.passes.append(f"✅ スニペット出典: {citation_count}/{snippet_count}個に出典コメントあり")
+    elif citation_count > 0:
+        result.score += 2
+        result.add_issue('snippet_citations', 'warning', f"スニペット出典不足: {citation_count}/{snippet_count}個のみ出典あり (60%以上が基準)", measured=citation_count, required=required)
+    else:
+        result.add_issue('snippet_citations', 'error', f"スニペット出典なし ({ctx.profile.examples['snippet_citation']})", measured=citation_count, required=required)
+
+
+@rule('sources_lines')
+def rule_sources_lines(ctx: RuleContext, result: ValidationResult) -> None:
+    """Sources 行の存在 (10点)"""
+    result.max_score += 10
+    count = len(ctx.doc.sources_lines)
+    min_sources = ctx.reqs['min_sources_lines']
+    if count >= min_sources:
+        result.score += 10
+        result.passes.append(f"✅ Sources行: {count}行 (基準: {min_sources}以上)")
+    elif count > 0:
+        result.score += 5
+        result.add_issue('sources_lines', 'warning', f"Sources行不足: {count}行 (基準: {min_sources}以上)", measured=count, required=min_sources)
+    else:
+        result.add_issue('sources_lines', 'error', f"Sources行なし (基準: {min_sources}以上)", measured=count, required=min_sources)
+
+
+@rule('sources_line_numbers')
+def rule_sources_line_numbers(ctx: RuleContext, result: ValidationResult) -> None:
+    """Sources 行番号の精度 (10点)"""
+    result.max_score += 10
+    sources_lines = ctx.doc.sources_lines
+    if not sources_lines:
+        return
+    if not ctx.reqs['sources_need_line_numbers']:
+        result.score += 5  # 行番号不要の場合の部分点
+        return
+
+    precise, imprecise, no_ln = check_line_numbers_in_sources(sources_lines)
+    line_number_counts = {'precise': precise, 'imprecise': imprecise, 'without': no_ln}
+    if precise > 0 and imprecise == 0 and no_ln == 0:
+        result.score += 10
+        result.passes.append(f"✅ Sources行番号: 全{precise}行に正確な行番号あり")
+    elif precise > 0:
+        result.score += 7
+        msg_parts = []
+        if imprecise > 0:
+            msg_parts.append(f"不正確{imprecise}行(範囲>{MAX_ACCEPTABLE_LINE_RANGE}行)")
+        if no_ln > 0:
+            msg_parts.append(f"行番号なし{no_ln}行")
+        result.add_issue('sources_line_numbers', 'warning', f"Sources行番号: 正確{precise}行, {', '.join(msg_parts)}", measured=line_number_counts, required=MAX_ACCEPTABLE_LINE_RANGE)
+    elif imprecise > 0:
+        result.score += 3
+        result.add_issue('sources_line_numbers', 'warning', f"Sources行番号が不正確: {imprecise}行が{MAX_ACCEPTABLE_LINE_RANGE}行超の広範囲 (例: L1-L1000 は不可)", measured=line_number_counts, required=MAX_ACCEPTABLE_LINE_RANGE)
+    else:
+        result.add_issue('sources_line_numbers', 'error', f"Sources行に行番号なし ({ctx.profile.examples['sources_line_numbers']})", measured=line_number_counts, required=MAX_ACCEPTABLE_LINE_RANGE)
+
+
+@rule('sections')
+def rule_sections(ctx: RuleContext, result: ValidationResult) -> None:
+    """## 見出しの数 (5点)"""
+    result.max_score += 5
+    section_count = ctx.doc.section_count
+    min_sections = ctx.reqs['min_sections']
+    if section_count >= min_sections:
+        result.score += 5
+        result.passes.append(f"✅ セクション数: {section_count} (基準: {min_sections}以上)")
+    else:
+        result.add_issue('sections', 'warning', f"セクション不足: {section_count} (基準: {min_sections}以上)", measured=section_count, required=min_sections)
+        result.score += 2 if section_count > 0 else 0
+
+
+@rule('overview')
+def rule_overview(ctx: RuleContext, result: ValidationResult) -> None:
+    """概要段落 (5点)"""
+    result.max_score += 5
+    if check_overview_paragraph(ctx.doc):
+        result.score += 5
+        result.passes.append("✅ 概要段落あり")
+    else:
+        result.add_issue('overview', 'error', "概要段落なし (# 見出しの直後にスコープ説明が必要)")
+
+
+@rule('mermaid_names')
+def rule_mermaid_names(ctx: RuleContext, result: ValidationResult) -> None:
+    """Mermaid 内に具体的なクラス名が使われているか (5点)"""
+    result.max_score += 5
+    if ctx.doc.mermaid_count == 0:
+        return
+    specific = 0
+    generic = 0
+    for block in ctx.doc.mermaid_blocks:
+        for label in find_delimited(block, '[', ']'):
+            clean = label.strip('"').strip()
+            # 2語以上 or PascalCase なら具体的
+            if PASCAL_CASE_RE.match(clean) or len(clean.split()) >= 2:
+                specific += 1
+            elif clean in ctx.profile.generic_names:
+                generic += 1
+    if specific > 0:
+        result.score += 5
+        result.passes.append(f"✅ Mermaid内に具体的な名前: {specific}個")
+    elif generic > 0:
+        result.score += 2
+        result.add_issue('mermaid_names', 'warning', f"Mermaid内が汎用名のみ ({generic}個) → 実際のクラス名を使用", measured=generic)
+
+
+@rule('related_pages')
+def rule_related_pages(ctx: RuleContext, result: ValidationResult) -> None:
+    """関連ページリンク (5点)"""
+    result.max_score += 5
+    if RELATED_PAGES_RE.search(ctx.doc.text):
+        result.score += 5
+        result.passes.append("✅ 関連ページリンクあり")
+    else:
+        result.add_issue('related_pages', 'warning', "関連ページリンクなし")
+
+
+def find_mermaid_syntax_errors(diagram: mermaid_parser.MermaidDiagram) -> list:
+    """Mermaid ブロックの静的構文チェック。エラーの説明のリストを返す。
+    fix_mermaid.py と同じ mermaid_parser の診断を使うため、ここで OK のブロックは fix_mermaid.py でも書き換えられない。
+    """
+    return [f"{d.line}行{d.column}列: {d.message}" for d in diagram.diagnostics]
+
+
+@rule('mermaid_syntax')
+def rule_mermaid_syntax(ctx: RuleContext, result: ValidationResult) -> None:
+    """Mermaid 構文の静的チェック (5点)"""
+    result.max_score += 5
+    errors = []
+    for diagram in ctx.doc.mermaid_diagrams:
+        errors.extend(find_mermaid_syntax_errors(diagram))
+
+    if not errors:
+        result.score += 5
+        if ctx.doc.mermaid_count > 0:
+            result.passes.append("✅ Mermaid構文: 静的チェックOK")
+        else:
+            result.passes.append("✅ Mermaid構文: ブロックなし（チェック対象なし）")
+    else:
+        for err in errors[:3]:
+            result.add_issue('mermaid_syntax', 'error', f"Mermaid構文エラー: {err}", measured=len(errors), required=0)
+
+
+@rule('mermaid_complexity')
+def rule_mermaid_complexity(ctx: RuleContext, result: ValidationResult) -> None:
+    """Mermaid 図の規模・描画コスト (採点なし): 予算を超えた図を分割案付きで警告する"""
+    budgets = ctx.reqs.get('mermaid_budgets')
+    if not budgets or ctx.doc.mermaid_count == 0:
+        return
+    over = []
+    largest = 0
+    for index, block in enumerate(ctx.doc.mermaid_blocks, 1):
+        metrics = mermaid_complexity.analyze_block(block, index, budgets)
+        largest = max(largest, metrics.nodes, metrics.participants)
+        if metrics.over_budget:
+            over.append(metrics)
+    if not over:
+        result.passes.append(f"✅ Mermaid図の規模: すべて予算内 (最大 {largest} ノード/参加者)")
+        return
+    for metrics in over[:3]:
+        suggestion = ' / '.join(metrics.suggestions[:2])
+        result.add_issue(
+            'mermaid_complexity', 'warning',
+            f"Mermaid図{metrics.index} ({metrics.kind}) が規模の予算を超過: "
+            f"{mermaid_complexity.describe_overage(metrics)} → {suggestion}",
+            measured={budget: value for budget, (value, _) in metrics.over_budget.items()},
+            required={budget: limit for budget, (_, limit) in metrics.over_budget.items()},
+        )
+
+
+@rule('tables')
+def rule_tables(ctx: RuleContext, result: ValidationResult) -> None:
+    """テーブル (5点)"""
+    result.max_score += 5
+    table_count = count_tables(ctx.doc)
+    min_tables = ctx.reqs['min_tables']
+    if min_tables > 0:
+        if table_count >= min_tables:
+            result.score += 5
+            result.passes.append(f"✅ テーブル: {table_count}個 (基準: {min_tables}以上)")
+        elif table_count > 0:
+            result.score += 2
+            result.add_issue('tables', 'warning', f"テーブル不足: {table_count}個 (基準: {min_tables}以上)", measured=table_count, required=min_tables)
+        else:
+            result.add_issue('tables', 'error', f"テーブルなし (基準: {min_tables}以上, {ctx.profile.examples['tables']})", measured=table_count, required=min_tables)
+    elif table_count > 0:
+        result.score += 5
+        result.passes.append(f"✅ テーブル: {table_count}個 (推奨)")
+    else:
+        result.score += 3  # テーブル必須でない importance ではテーブルなしでも許容
+        result.passes.append(f"✅ テーブル: 任意 (importance: {ctx.importance})")
+
+
+@rule('arch_service_names')
+def rule_arch_service_names(ctx: RuleContext, result: ValidationResult) -> None:
+    """Mermaid 内のサービス名が汎用名でなく具体的か (5点)"""
+    result.max_score += 5
+    generic_count = 0
+    specific_count = 0
+    for block in ctx.doc.mermaid_blocks:
+        # ノードラベルを抽出
+        labels = find_delimited(block, '[', ']') + find_delimited(block, '"', '"')
+        for label in labels:
+            clean = label.strip('"').strip()
+            if clean in ctx.profile.generic_names:
+                generic_count += 1
+            elif KEBAB_NAME_RE.match(clean) or PASCAL_CASE_RE.match(clean) or len(clean.split()) >= 2:
+                specific_count += 1
+
+    if specific_count > 0 and generic_count == 0:
+        result.score += 5
+        result.passes.append(f"✅ Mermaid内のサービス名が具体的: {specific_count}個")
+    elif specific_count > 0:
+        result.score += 3
+        result.add_issue('arch_service_names', 'warning', f"Mermaid内に汎用名が混在: 具体的{specific_count}個, 汎用{generic_count}個", measured=generic_count, required=0)
+    elif generic_count > 0:
+        result.add_issue('arch_service_names', 'error', f"Mermaid内のサービス名が汎用的: {generic_count}個 (実際のサービス名を使用してください)", measured=generic_count, required=0)
+    else:
+        result.score += 3  # Mermaidがない場合は中間点
+        result.passes.append("✅ Mermaid内のラベルチェック: 対象外")
+
+
+@rule('arch_protocols')
+def rule_arch_protocols(ctx: RuleContext, result: ValidationResult) -> None:
+    """通信プロトコルが明記されているか (5点)"""
+    result.max_score += 5
+    found_protocols = [name for name, pattern in PROTOCOL_PATTERNS if pattern.search(ctx.doc.text)]
+    if has_pattern_on_same_line(ctx.doc.text, EVENT_RE, STREAMING_RE):
+        found_protocols.append('Event.*Streaming')
+    if len(found_protocols) >= 2:
+        result.score += 5
+        result.passes.append(f"✅ 通信プロトコルが明記されている: {', '.join(found_protocols[:3])} 等")
+    elif len(found_protocols) == 1:
+        result.score += 3
+        result.passes.append(f"✅ 通信プロトコルの言及あり: {found_protocols[0]}")
+    else:
+        result.add_issue('arch_protocols', 'warning', "通信プロトコル（REST/gRPC/Kafka等）の明記がない", measured=0, required=1)
+
+
+@rule('source_citations')
+def rule_source_citations(ctx: RuleContext, result: ValidationResult) -> None:
+    """出典の実在確認 (5点, 対象リポジトリが分かり出典がある場合のみ)"""
+    if not ctx.source_roots:
+        return
+    checked, missing, out_of_range, source_files = verify_citations(ctx.doc.text, ctx.source_index)
+    result.source_files = source_files
+    if checked == 0:
+        return
+    result.max_score += 5
+    broken = len(missing) + len(out_of_range)
+    if broken == 0:
+        result.score += 5
+        result.passes.append(f"✅ 出典の実在確認: {checked}件すべて実ファイルの行範囲内")
+        return
+    result.score += 2 if broken <= checked * 0.2 else 0
+    if missing:
+        result.add_issue('source_citations', 'error', f"出典ファイルが存在しない: {len(missing)}件 ({'; '.join(missing[:3])})", measured=len(missing), required=0)
+    if out_of_range:
+        result.add_issue('source_citations', 'error', f"出典の行範囲がファイル外: {len(out_of_range)}件 ({'; '.join(out_of_range[:3])})", measured=len(out_of_range), required=0)
+
+
+@rule('snippet_authenticity')
+def rule_snippet_authenticity(ctx: RuleContext, result: ValidationResult) -> None:
+    """スニペットの真正性 (5点): 本文が出典の行範囲と一致するか"""
+    if not ctx.source_roots:
+        return
+    checked, drifted, fabricated = verify_snippets(ctx.doc.text, ctx.source_index)
+    if checked == 0:
+        return
+    result.max_score += 5
+    if not drifted and not fabricated:
+        result.score += 5
+        result.passes.append(f"✅ スニペット真正性: {checked}件すべて出典の行範囲と一致")
+        return
+    if fabricated:
+        result.add_issue('snippet_authenticity', 'error', f"ソースに存在しないスニペット: {len(fabricated)}件 ({'; '.join(fabricated[:3])})", measured=len(fabricated), required=0)
+    else:
+        result.score += 3
+    if drifted:
+        result.add_issue('snippet_authenticity', 'warning', f"スニペットの行番号ずれ: {len(drifted)}件 ({'; '.join(drifted[:3])})", measured=len(drifted), required=0)
+
+
+# --- ページ検証 ---
+
+def validate_text(text: str, filepath: str, importance: Optional[str] = None,
+                  source_roots: tuple = (), profile='deepwiki', timed: bool = False) -> ValidationResult:
+    """本文を1度だけ解析し、プロファイルのルールを順に適用する。
+    timed=True の場合、ParsedDocument の各要素を先に解析して 'parse.<要素名>' として、
+    各ルールを 'ルールID' として所要時間を result.timings に記録する
+    （遅いページで解析とルールのどちらが原因かを切り分けるため）。
+    """
+    profile = get_profile(profile)
+    if importance is None:
+        importance = detect_importance(filepath, profile)
+    ctx = RuleContext(
+        doc=ParsedDocument(text),
+        profile=profile,
+        importance=importance,
+        reqs=profile.requirements.get(importance, profile.requirements['medium']),
+        source_roots=tuple(source_roots),
+    )
+    result = ValidationResult(file=filepath, importance=importance)
+    if not timed:
+        for rule_id in profile.rules:
+            RULES[rule_id](ctx, result)
+        return result
+
+    for name in PARSED_FIELDS:
+        started = time.perf_counter()
+        getattr(ctx.doc, name)
+        result.timings[f'parse.{name}'] = time.perf_counter() - started
+    for rule_id in profile.rules:
+        started = time.perf_counter()
+        RULES[rule_id](ctx, result)
+        result.timings[rule_id] = time.perf_counter() - started
+    return result
+
+
+def validate_page(filepath: str, importance: Optional[str] = None,
+                  source_roots: Optional[tuple] = None, profile='deepwiki',
+                  timed: bool = False) -> ValidationResult:
+    """1ページを検証。
+    source_roots: 出典を解決する対象リポジトリのルート。None なら同じディレクトリの
+    outline.json (targetDir / additionalDirs) から推定する。
+    timed: 解析要素・ルールごとの所要時間を result.timings に記録する。
+    """
+    with open(filepath, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if source_roots is None:
+        source_roots = load_source_roots(os.path.dirname(os.path.abspath(filepath)))
+    return validate_text(content, filepath, importance, source_roots, profile, timed)
+
+
+# --- 検証結果キャッシュ ---
+# ディレクトリ検証時、ページ内容・importance・ルールのバージョンが変わっていなければ
+# 前回の ValidationResult を再利用する。
+CACHE_FILENAME = '.validate_cache.json'
+
+
+def rules_version(profile='deepwiki') -> str:
+    """プロファイルの品質基準と検証ルールのソースからバージョンハッシュを計算"""
+    profile = get_profile(profile)
+    h = hashlib.sha256()
+    h.update(json.dumps([profile.name, profile.rules, profile.requirements], sort_keys=True).encode('utf-8'))
+    for rule_source in (__file__, source_index.__file__, scanners.__file__,
+                        mermaid_complexity.__file__, mermaid_parser.__file__):
+        h.update(Path(rule_source).read_bytes())
+    return h.hexdigest()[:16]
+
+
+def page_cache_key(filepath: str, importance: str, source_roots: tuple) -> str:
+    """ページ内容・importance・出典の解決先からキャッシュキーを計算"""
+    with open(filepath, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return f"{digest}:{importance}:{'|'.join(source_roots)}"
+
+
+def source_fingerprint(paths: list) -> dict:
+    """出典ファイルの (mtime, size)。存在しないファイルは None"""
+    fingerprint = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+            fingerprint[path] = [st.st_mtime_ns, st.st_size]
+        except OSError:
+            fingerprint[path] = None
+    return fingerprint
+
+
+def load_cache(cache_path: str, profile='deepwiki') -> dict:
+    """キャッシュファイルを読み込む。ルールのバージョンが異なる・壊れている場合は空を返す"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get('version') != rules_version(profile):
+        return {}
+    return data.get('pages', {})
+
+
+def save_cache(cache_path: str, entries: dict, profile='deepwiki') -> None:
+    """キャッシュファイルを一時ファイル経由でアトミックに書き込む"""
+    data = {'version': rules_version(profile), 'pages': entries}
+    cache_dir = os.path.dirname(os.path.abspath(cache_path))
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix='.validate_cache.', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"WARNING: キャッシュを書き込めませんでした: {e}", file=sys.stderr)
+
+
+def validate_pages(filepaths: list, importance: Optional[str] = None, jobs: int = 1,
+                   cache_path: Optional[str] = None, source_roots: Optional[tuple] = None,
+                   profile='deepwiki', timed: bool = False) -> list:
+    """複数ページを検証し、入力順に ValidationResult のリストを返す。
+    jobs > 1 の場合はプロセスプールで並列実行する（0 以下は CPU 数）。
+    cache_path を指定すると、変更のないページはキャッシュから結果を返し、
+    変更されたページ（または出典ファイルが変わったページ）のみを再検証する。
+    timed=True の場合は全ページを実際に検証して所要時間を記録するため、キャッシュを使わない。
+    """
+    profile_name = get_profile(profile).name
+    if timed:
+        cache_path = None
+    cache = load_cache(cache_path, profile_name) if cache_path else {}
+    entries = {}
+    results = {}
+    pending = []
+    for fp in filepaths:
+        if not cache_path:
+            pending.append((fp, None))
+            continue
+        basename = os.path.basename(fp)
+        roots = source_roots
+        if roots is None:
+            roots = load_source_roots(os.path.dirname(os.path.abspath(fp)))
+        key = page_cache_key(fp, importance or detect_importance(fp, profile_name), tuple(roots))
+        cached = cache.get(basename)
+        if cached and cached.get('key') == key and \
+           source_fingerprint(list(cached.get('sources', {}))) == cached.get('sources', {}):
+            results[fp] = ValidationResult(**{**cached['result'], 'file': fp})
+            entries[basename] = cached
+        else:
+            pending.append((fp, key))
+
+    pending_paths = [fp for fp, _ in pending]
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    jobs = min(jobs, len(pending_paths))
+    if jobs <= 1:
+        fresh = [validate_page(fp, importance, source_roots, profile_name, timed) for fp in pending_paths]
+    else:
+        # executor.map は入力順に結果を返すため、出力順は直列実行と同一になる
+        n = len(pending_paths)
+        chunksize = max(1, n // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            fresh = list(executor.map(
+                validate_page, pending_paths, [importance] * n, [source_roots] * n,
+                [profile_name] * n, [timed] * n, chunksize=chunksize
+            ))
+
+    for (fp, key), result in zip(pending, fresh):
+        results[fp] = result
+        if not cache_path:
+            continue
+        entries[os.path.basename(fp)] = {
+            'key': key,
+            'result': asdict(result),
+            'sources': source_fingerprint(result.source_files),
+        }
+
+    if cache_path and (pending or len(entries) != len(cache)):
+        save_cache(cache_path, entries, profile_name)
+
+    return [results[fp] for fp in filepaths]
+
+
+# --- 出力 ---
+
+def format_result(result: ValidationResult) -> str:
+    """1ページの結果のフォーマット"""
+    lines = []
+    basename = os.path.basename(result.file)
+    lines.append(f"{'='*60}")
+    lines.append(f"📄 {basename}")
+    lines.append(f"   Importance: {result.importance}  |  Grade: {result.grade}  |  Score: {result.score}/{result.max_score} ({result.percentage:.0f}%)")
+    lines.append(f"{'='*60}")
+
+    if result.issues:
+        lines.append("")
+        lines.append("  改善が必要:")
+        for issue in result.issues:
+            lines.append(f"    {issue}")
+
+    if result.passes:
+        lines.append("")
+        lines.append("  合格項目:")
+        for p in result.passes:
+            lines.append(f"    {p}")
+
+    lines.append("")
+    return '\n'.join(lines)
+
+
+def format_summary(results: list, profile='deepwiki') -> str:
+    """全体サマリーのフォーマット"""
+    lines = []
+    lines.append(f"\n{'#'*60}")
+    lines.append(f"  {get_profile(profile).title}")
+    lines.append(f"{'#'*60}\n")
+
+    total_score = sum(r.score for r in results)
+    total_max = sum(r.max_score for r in results)
+    avg_pct = (total_score / total_max * 100) if total_max > 0 else 0
+
+    # グレード分布
+    grades = {}
+    for r in results:
+        grades[r.grade] = grades.get(r.grade, 0) + 1
+
+    lines.append(f"  総合スコア: {total_score}/{total_max} ({avg_pct:.0f}%)")
+    lines.append(f"  ページ数: {len(results)}")
+    lines.append(f"  グレード分布: {', '.join(f'{g}={c}' for g, c in sorted(grades.items()))}")
+    lines.append("")
+
+    # ページ別サマリー表
+    lines.append(f"  {'ページ':<45} {'Grade':>5}  {'Score':>10}")
+    lines.append(f"  {'-'*45} {'-'*5}  {'-'*10}")
+    for r in results:
+        basename = os.path.basename(r.file)
+        lines.append(f"  {basename:<45} {r.grade:>5}  {r.score:>3}/{r.max_score:<3} ({r.percentage:.0f}%)")
+
+    # 不合格ページ
+    failing = [r for r in results if r.grade in ('D', 'F')]
+    if failing:
+        lines.append(f"\n  ⚠️  要改善ページ ({len(failing)}件):")
+        for r in failing:
+            basename = os.path.basename(r.file)
+            top_issues = [i for i in r.issues if i.startswith('❌')][:3]
+            lines.append(f"    - {basename}: {', '.join(top_issues)}")
+
+    lines.append("")
+    return '\n'.join(lines)
+
+
+def aggregate_timings(results: list, extra: Optional[dict] = None) -> list:
+    """ページごとの timings を項目別に集計する。
+    extra: ページ単位でない計測（Wiki 構造チェックなど）の {名前: 秒}。
+    Returns: 合計時間の降順の [{'name', 'calls', 'total', 'mean', 'max', 'slowest'}]
+    """
+    rows: Dict[str, dict] = {}
+    samples = [(r.timings, os.path.basename(r.file)) for r in results]
+    if extra:
+        samples.append((extra, '(wiki)'))
+    for timings, page in samples:
+        for name, seconds in timings.items():
+            row = rows.setdefault(name, {'name': name, 'calls': 0, 'total': 0.0, 'max': 0.0, 'slowest': page})
+            row['calls'] += 1
+            row['total'] += seconds
+            if seconds >= row['max']:
+                row['max'], row['slowest'] = seconds, page
+    for row in rows.values():
+        row['mean'] = row['total'] / row['calls']
+    return sorted(rows.values(), key=lambda row: (-row['total'], row['name']))
+
+
+def format_timings(rows: list) -> str:
+    """aggregate_timings の結果を表にする"""
+    grand_total = sum(row['total'] for row in rows) or 1.0
+    lines = [
+        f"\n{'='*60}",
+        "  ⏱  解析・ルール別の所要時間",
+        f"{'='*60}",
+        f"  {'項目':<30} {'回数':>5} {'合計(ms)':>10} {'割合':>6} {'平均(ms)':>9} {'最大(ms)':>9}  最も遅いページ",
+    ]
+    for row in rows:
+        lines.append(
+            f"  {row['name']:<30} {row['calls']:>5} {row['total'] * 1000:>10.2f} "
+            f"{row['total'] / grand_total * 100:>5.1f}% {row['mean'] * 1000:>9.2f} {row['max'] * 1000:>9.2f}  {row['slowest']}"
+        )
+    lines.append("")
+    return '\n'.join(lines)
+
+
+def timings_to_json(rows: list) -> list:
+    """aggregate_timings の結果を JSON 出力用に丸める"""
+    return [
+        {**row, **{k: round(row[k], 6) for k in ('total', 'mean', 'max')}}
+        for row in rows
+    ]
+
+
+def build_page_summary(results: list) -> dict:
+    """JSON 出力用のスコア・グレード分布のまとめ"""
+    total_score = sum(r.score for r in results)
+    total_max = sum(r.max_score for r in results)
+    grades = {}
+    for r in results:
+        grades[r.grade] = grades.get(r.grade, 0) + 1
+    return {
+        "score": total_score,
+        "max_score": total_max,
+        "percentage": round(total_score / total_max * 100, 1) if total_max > 0 else 0,
+        "page_count": len(results),
+        "grades": dict(sorted(grades.items())),
+    }
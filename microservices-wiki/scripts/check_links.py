@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+生成済み Wiki ページのリンク切れ・行範囲ずれを一括で検出するスクリプト。
+
+Wiki ディレクトリの全 Markdown ページにある次のリンクを、1回の走査で検証する。
+
+- ページ間リンク `./4.2-foo.md`、`./4.2-foo.md#見出し`、同一ページ内の `#見出し`
+  → ファイルの存在、outline.json で未生成（status が done 以外）のページでないか、見出しアンカーの存在
+- `file:///abs/path#Lx-Ly` / `vscode://file//abs/path:LINE`
+  → 対象リポジトリのファイルの存在と、行番号がファイルの行数に収まっているか
+- fix_sources.py で変換済みの GitHub/GitLab URL（`.../blob/<ref>/path#Lx-Ly`）
+  → targetDir / additionalDirs の git remote と一致するものをローカルのファイルに戻して同様に検証
+    （ローカルの作業ツリーと照合するため、古いコミットに固定したリンクは現在の内容で判定される）
+
+Wiki のファイル名・outline.json のページ ID と状態・各ページの見出しアンカーを索引にし、
+ソースファイルは source_index.SourceIndex で初回参照時に行数を数えて使い回すため、
+ページ生成のたびの後処理として実行できる速さで終わる。外部サイトへの URL は検証しない。
+
+使用方法:
+    python3 scripts/check_links.py $OUTPUT_DIR/outline.json [--format text|json]
+
+リンク切れが1件でもあれば終了コード 1 を返す。
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from urllib.parse import unquote
+
+from source_index import Citation, get_source_index, load_source_roots
+
+# リンク先 URL の終わり（閉じ括弧または空白）
+LINK_END_RE = re.compile(r'[)\s]')
+HEADING_RE = re.compile(r'^#{1,6}\s+(.+?)\s*#*\s*$')
+HTML_ANCHOR_RE = re.compile(r'<a\s+(?:id|name)="([^"]+)"')
+# GitHub の見出しアンカーで除去される文字（英数字・アンダースコア・ハイフン・空白以外）
+SLUG_STRIP_RE = re.compile(r'[^\w\- ]')
+# #L10-L20（GitHub）/ #L10-20（GitLab）/ #L10
+LINE_ANCHOR_RE = re.compile(r'^L(\d+)(?:-L?(\d+))?$')
+# vscode://file//abs/path:LINE[:COL]
+VSCODE_LINE_RE = re.compile(r'^(.*?)(?::(\d+))?(?::\d+)?$')
+URL_SCHEME_RE = re.compile(r'^[A-Za-z][A-Za-z0-9+.\-]*:')
+FENCE_PREFIXES = ('```', '~~~')
+BACKTICK_RUN_RE = re.compile(r'`+')
+
+
+@dataclass
+class BrokenLink:
+    """検出したリンク切れ1件"""
+    line: int  # ページ内の行番号 (1始まり)
+    url: str
+    reason: str
+
+
+def blank_code_spans(line: str) -> str:
+    """行内のコードスパン（同じ長さのバッククォートの組で囲まれた部分）を空白に置き換える。
+    閉じる組のないバッククォートはそのまま残す。各長さの次の出現位置を先に求めるため行の長さに対して線形。
+    """
+    runs = [(m.start(), m.end()) for m in BACKTICK_RUN_RE.finditer(line)]
+    if len(runs) < 2:
+        return line
+    next_same: List[Optional[int]] = [None] * len(runs)
+    last_by_len: Dict[int, int] = {}
+    for k in range(len(runs) - 1, -1, -1):
+        length = runs[k][1] - runs[k][0]
+        next_same[k] = last_by_len.get(length)
+        last_by_len[length] = k
+
+    parts = []
+    pos = 0
+    k = 0
+    while k < len(runs):
+        close = next_same[k]
+        if close is None:
+            k += 1
+            continue
+        start, end = runs[k][0], runs[close][1]
+        parts.append(line[pos:start])
+        parts.append(' ' * (end - start))
+        pos = end
+        k = close + 1
+    parts.append(line[pos:])
+    return ''.join(parts)
+
+
+def iter_page_links(text: str) -> Iterator[Tuple[int, str]]:
+    """ページ内の Markdown リンク `](url)` を (行番号, url) として順に返す。コードブロックとコードスパン内は対象外。
+    閉じない `](` が続く行でも、直近に見つけた終端位置を使い回して行の長さに対して線形で走査する。
+    """
+    in_fence = False
+    for line_no, line in enumerate(text.split('\n'), 1):
+        if line.lstrip().startswith(FENCE_PREFIXES):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+        line = blank_code_spans(line)
+
+        end = -1
+        pos = line.find('](')
+        while pos != -1:
+            start = pos + 2
+            if end < start:
+                m = LINK_END_RE.search(line, start)
+                end = m.start() if m else len(line)
+            if end > start and end < len(line) and line[end] == ')':
+                yield line_no, line[start:end]
+            pos = line.find('](', start)
+
+
+def heading_anchors(text: str) -> Tuple[Set[str], Set[str]]:
+    """ページの見出しから GitHub 形式のアンカー（小文字、重複は -1, -2 ...）の集合と、
+    <a id/name> の集合（書かれたままの大文字小文字）を作る
+    """
+    anchors: Set[str] = set()
+    html_anchors: Set[str] = set()
+    seen: Dict[str, int] = {}
+    in_fence = False
+    for line in text.split('\n'):
+        if line.lstrip().startswith(FENCE_PREFIXES):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+        html_anchors.update(HTML_ANCHOR_RE.findall(line))
+        m = HEADING_RE.match(line)
+        if not m:
+            continue
+        slug = SLUG_STRIP_RE.sub('', m.group(1).strip().lower()).replace(' ', '-')
+        count = seen.get(slug, 0)
+        seen[slug] = count + 1
+        anchors.add(slug if count == 0 else f"{slug}-{count}")
+    return anchors, html_anchors
+
+
+@dataclass
+class RemoteRoot:
+    """変換済み GitHub/GitLab URL をローカルのファイルに戻すための、リモートURL とリポジトリの対応"""
+    remote_url: str
+    toplevel: str  # ローカルのリポジトリルート
+    refs: Tuple[str, ...]  # ローカルのブランチ名とコミット SHA（URL の ref 部分の判定に使う）
+
+
+class LinkIndex:
+    """Wiki ページ・outline のページ状態・見出しアンカー・ソースファイルの索引"""
+
+    def __init__(self, wiki_dir: str, outline: dict):
+        self.wiki_dir = wiki_dir
+        self.pages: Set[str] = set()
+        for current, dirs, files in os.walk(wiki_dir):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for name in files:
+                if name.endswith('.md'):
+                    self.pages.add(os.path.normpath(os.path.join(current, name)))
+        # outline.json のページ: ファイルの絶対パス → (ページ ID, 状態)
+        self.outline_pages: Dict[str, Tuple[str, str]] = {}
+        for page in outline.get('pages', []):
+            if page.get('filename'):
+                path = os.path.normpath(os.path.join(wiki_dir, page['filename']))
+                self.outline_pages[path] = (str(page.get('id', '?')), page.get('status', ''))
+        self.roots = list(load_source_roots(wiki_dir))
+        self.sources = get_source_index(tuple(self.roots))
+        self._anchors: Dict[str, Tuple[Set[str], Set[str]]] = {}
+        self._remotes: Optional[List[RemoteRoot]] = None
+
+    def anchors(self, page_path: str, text: Optional[str] = None) -> Tuple[Set[str], Set[str]]:
+        """ページの (見出しアンカー, <a id/name> アンカー)。初回参照時に1度だけ作る"""
+        if page_path not in self._anchors:
+            if text is None:
+                try:
+                    with open(page_path, 'r', encoding='utf-8') as f:
+                        text = f.read()
+                except OSError:
+                    text = ''
+            self._anchors[page_path] = heading_anchors(text)
+        return self._anchors[page_path]
+
+    def has_anchor(self, page_path: str, fragment: str) -> bool:
+        """見出しアンカーは大文字小文字を区別せず、<a id/name> は書かれたとおりに照合する"""
+        headings, html_anchors = self.anchors(page_path)
+        return fragment.lower() in headings or fragment in html_anchors
+
+    def remotes(self) -> List[RemoteRoot]:
+        """targetDir / additionalDirs の git remote（GitHub/GitLab URL が初めて出てきたときに1回だけ求める）"""
+        if self._remotes is None:
+            from fix_sources import get_git_head, get_git_remote_url
+
+            self._remotes = []
+            for root in self.roots:
+                remote_url = get_git_remote_url(root)
+                if not remote_url:
+                    continue
+                branch, sha, prefix = get_git_head(root)
+                toplevel = root[:-len(prefix.rstrip('/'))].rstrip('/') if prefix else root
+                refs = tuple(ref for ref in (sha, branch) if ref)
+                self._remotes.append(RemoteRoot(remote_url.rstrip('/'), toplevel, refs))
+        return self._remotes
+
+    def check_source(self, abs_path: str, start: Optional[int], end: Optional[int]) -> Optional[str]:
+        """ソースファイルの存在と行範囲を検証し、問題があれば説明を返す"""
+        if start is None:
+            if self.sources.resolve(abs_path) is None and not os.path.isdir(abs_path):
+                return f"ファイルが存在しない: {abs_path}"
+            return None
+        _, problem = self.sources.check(Citation(kind='link', path=abs_path, start=start, end=end or start, page_line=0))
+        return problem
+
+    def check_blob_url(self, url: str) -> Tuple[bool, Optional[str]]:
+        """GitHub/GitLab の blob URL を検証する。Returns: (対象リポジトリの URL か, 問題の説明 or None)"""
+        for remote in self.remotes():
+            for marker in ('/-/blob/', '/blob/'):
+                head = remote.remote_url + marker
+                if url.startswith(head):
+                    break
+            else:
+                continue
+
+            rest, _, fragment = url[len(head):].partition('#')
+            # ref にはスラッシュを含むブランチ名もあるため、ローカルの ref と一致すればそれを優先する
+            ref = next((r for r in remote.refs if rest.startswith(r + '/')), rest.split('/', 1)[0])
+            rel_path = unquote(rest[len(ref) + 1:])
+            start, end = parse_line_anchor(fragment)
+            return True, self.check_source(os.path.join(remote.toplevel, rel_path), start, end)
+        return False, None
+
+    def check_page_link(self, page_path: str, target: str) -> Optional[str]:
+        """ページ間リンク（相対パス）・ページ内アンカーを検証する"""
+        path_part, _, fragment = target.partition('#')
+        if path_part:
+            dest = os.path.normpath(os.path.join(os.path.dirname(page_path), unquote(path_part)))
+        else:
+            dest = page_path
+
+        if dest.endswith('.md'):
+            outline_entry = self.outline_pages.get(dest)
+            if dest not in self.pages:
+                if outline_entry:
+                    return f"未生成のページ: {path_part} (ページ {outline_entry[0]}, status={outline_entry[1] or '-'})"
+                return f"ページが存在しない: {path_part}"
+            if outline_entry and outline_entry[1] not in ('done', ''):
+                return f"生成が完了していないページ: {path_part} (ページ {outline_entry[0]}, status={outline_entry[1]})"
+            if fragment and not self.has_anchor(dest, unquote(fragment)):
+                return f"見出しが存在しない: {path_part}#{fragment}"
+            return None
+
+        if not os.path.exists(dest):
+            return f"ファイルが存在しない: {path_part}"
+        return None
+
+
+def parse_line_anchor(fragment: str) -> Tuple[Optional[int], Optional[int]]:
+    """#L10-L20 / #L10-20 / #L10 を (開始行, 終了行) にする。行番号がなければ (None, None)"""
+    m = LINE_ANCHOR_RE.match(fragment)
+    if not m:
+        return None, None
+    start = int(m.group(1))
+    return start, int(m.group(2)) if m.group(2) else start
+
+
+def check_link(index: LinkIndex, page_path: str, url: str) -> Tuple[str, Optional[str]]:
+    """1件のリンクを検証する。Returns: (リンクの種類, 問題の説明 or None)。種類 external は未検証"""
+    if url.startswith('file://'):
+        path, _, fragment = url[len('file://'):].partition('#')
+        start, end = parse_line_anchor(fragment)
+        return 'source', index.check_source(unquote(path), start, end)
+
+    if url.startswith('vscode://file/'):
+        m = VSCODE_LINE_RE.match(url[len('vscode://file/'):])
+        path = '/' + m.group(1).lstrip('/')
+        start = int(m.group(2)) if m.group(2) else None
+        return 'source', index.check_source(unquote(path), start, start)
+
+    if url.startswith(('http://', 'https://')):
+        if '/blob/' not in url:
+            return 'external', None
+        known, problem = index.check_blob_url(url)
+        return ('source' if known else 'external'), problem
+
+    if URL_SCHEME_RE.match(url):
+        return 'external', None
+
+    return 'page', index.check_page_link(page_path, url)
+
+
+def scan(outline_path: str) -> dict:
+    with open(outline_path, 'r', encoding='utf-8') as f:
+        outline = json.load(f)
+    wiki_dir = os.path.dirname(outline_path)
+    started = time.perf_counter()
+    index = LinkIndex(wiki_dir, outline)
+
+    # outline.json の順、その後に outline にないページ（index.md など）
+    ordered = [p for p in index.outline_pages if p in index.pages]
+    ordered += sorted(index.pages - set(ordered))
+
+    counts = {'page': 0, 'source': 0, 'external': 0}
+    pages = []
+    for page_path in ordered:
+        with open(page_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        index.anchors(page_path, text)
+        broken = []
+        for line_no, url in iter_page_links(text):
+            kind, problem = check_link(index, page_path, url)
+            counts[kind] += 1
+            if problem:
+                broken.append(BrokenLink(line_no, url, problem))
+        if broken:
+            pages.append({
+                'page': os.path.relpath(page_path, wiki_dir),
+                'broken': [asdict(b) for b in broken],
+            })
+
+    return {
+        'summary': {
+            'pages': len(ordered),
+            'page_links': counts['page'],
+            'source_links': counts['source'],
+            'external_links': counts['external'],
+            'broken': sum(len(p['broken']) for p in pages),
+            'pages_with_broken': len(pages),
+            'source_roots': index.roots,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        },
+        'pages': pages,
+    }
+
+
+def format_report(report: dict) -> str:
+    s = report['summary']
+    lines = [
+        "=" * 60,
+        "🔗 Wiki リンクチェック",
+        "=" * 60,
+        f"ページ: {s['pages']} 件 / ページ間リンク: {s['page_links']} 件 / 出典リンク: {s['source_links']} 件"
+        f" / 外部リンク（未検証）: {s['external_links']} 件",
+        f"リンク切れ: {s['broken']} 件（{s['pages_with_broken']} ページ） [{s['elapsed_ms']} ms]",
+    ]
+    if not s['source_roots']:
+        lines.append("⚠️  outline.json の targetDir が見つからないため、出典リンクはファイルが存在しないと判定されます")
+    for page in report['pages']:
+        lines += ["", f"## {page['page']}"]
+        for b in page['broken']:
+            lines.append(f"  L{b['line']}: {b['reason']}")
+            lines.append(f"      {b['url']}")
+    if not report['pages']:
+        lines += ["", "✅ リンク切れはありません"]
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="DeepWiki dead-link checker")
+    parser.add_argument("outline_json", help="Path to the outline.json file")
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="出力形式")
+    args = parser.parse_args()
+
+    outline_path = os.path.abspath(args.outline_json)
+    if not os.path.exists(outline_path):
+        print(f"Error: outline.json not found at {outline_path}")
+        sys.exit(1)
+
+    report = scan(outline_path)
+    if args.format == 'json':
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(report))
+    sys.exit(1 if report['summary']['broken'] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,11 @@
 #!/usr/bin/env python3
 """
 全WikiページのMermaidダイアグラムのルール違反を静的チェックし、
-違反があればGemini CLIで修正するスクリプト。
+機械的に直せる違反はローカルで修正したうえで、残った違反をGemini CLIで修正するスクリプト。
 generate_pages.py の全ページ生成完了後に呼び出す。
 
 使用方法:
-    python3 scripts/fix_mermaid.py $OUTPUT_DIR/outline.json
+    python3 scripts/fix_mermaid.py $OUTPUT_DIR/outline.json [--no-autofix] [--no-cache] [--concurrency N]
 """
 import os
 import sys
@@ -13,13 +13,30 @@ import json
 import re
 import asyncio
 import argparse
+import hashlib
+import tempfile
 from typing import List, Tuple, Optional
 
+import mermaid_parser
+
 # --- Configuration ---
 MAX_FIX_RETRIES = 1
+MAX_CONCURRENT_FIXES = 3
 GEMINI_TIMEOUT_SECONDS = 180
+# 1回の Gemini 呼び出しで修正を依頼するブロック数の上限
+MAX_BLOCKS_PER_REQUEST = 8
+# Gemini CLI の呼び出し自体が失敗したとき（タイムアウト・レート制限など）のリトライ待ち時間の基数（秒）
+RETRY_BACKOFF_SECONDS = 5
 
 MERMAID_BLOCK_RE = re.compile(r'```mermaid\n(.*?)```', re.DOTALL)
+# Gemini の応答中の修正済みブロック: "=== BLOCK n ===" の直後の mermaid コードブロック
+RESPONSE_BLOCK_RE = re.compile(r'^=== BLOCK (\d+) ===[ \t]*\n```mermaid\n(.*?)```', re.DOTALL | re.MULTILINE)
+
+# チェック結果のキャッシュ（Wiki ディレクトリに置く）
+CHECK_CACHE_FILENAME = '.mermaid_check_cache.json'
+
+# 違反のあるブロック: (コードの開始位置, 終了位置, コード, 違反メッセージ)
+ViolatingBlock = Tuple[int, int, str, List[str]]
 
 
 def extract_mermaid_blocks(content: str) -> List[str]:
@@ -27,111 +44,310 @@ def extract_mermaid_blocks(content: str) -> List[str]:
     return MERMAID_BLOCK_RE.findall(content)
 
 
-def check_violations(mermaid_code: str) -> List[str]:
+def find_violating_blocks(content: str) -> List[ViolatingBlock]:
+    """Markdown 内の違反のある Mermaid ブロックを、コードの文字位置と違反メッセージ付きで返す"""
+    found = []
+    for m in MERMAID_BLOCK_RE.finditer(content):
+        violations = check_violations(m.group(1))
+        if violations:
+            found.append((m.start(1), m.end(1), m.group(1), violations))
+    return found
+
+
+def write_atomic(file_path: str, content: str) -> None:
+    """同じディレクトリの一時ファイルに書いてから置き換え、途中で中断しても元の内容を壊さない"""
+    try:
+        mode = os.stat(file_path).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.chmod(tmp_path, mode)  # mkstemp は 0600 で作るため、元のファイルの権限に合わせる
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def splice_blocks(file_path: str, replacements: List[Tuple[int, int, str, str]]) -> int:
     """
-    Mermaidコードのルール違反を検出し、違反メッセージのリストを返す。
-    違反がなければ空リストを返す。
+    (開始位置, 終了位置, 元のコード, 新しいコード) の置き換えをファイルに適用し、適用した件数を返す。
+    読み込み時点から元のコードが変わっている置き換えは適用しない。
     """
-    violations = []
+    with open(file_path, "r", encoding="utf-8") as f:
+        content = f.read()
+    applied = 0
+    for start, end, old, new in sorted(replacements, reverse=True):
+        if content[start:end] != old:
+            continue
+        content = content[:start] + new + content[end:]
+        applied += 1
+    if applied:
+        write_atomic(file_path, content)
+    return applied
 
-    # ルール1: LRレイアウト禁止
-    if re.search(r'\b(?:graph|flowchart)\s+LR\b', mermaid_code):
-        violations.append(
-            "LRレイアウトが使用されています（graph LR / flowchart LR）。"
-            "必ず TD を使用してください。"
-        )
 
-    # ルール2: ノードIDにハイフンを含む
-    if re.search(r'\b[A-Za-z][A-Za-z0-9]*(?:-[A-Za-z0-9]+)+\s*[\[\({"\'`]', mermaid_code):
-        violations.append(
-            "ノードIDにハイフンが含まれています。"
-            "アンダースコアに置き換えてください（例: my-node → my_node）。"
-        )
+# --- チェック結果のキャッシュ ---
+# ブロック内容のハッシュ → 違反メッセージ。実行中はメモ化し、CHECK_CACHE_FILENAME で実行をまたいで再利用する。
+_check_cache: dict = {}
+_used_check_keys: set = set()
 
-    # ルール3: [] 内に () が含まれているのにクォートされていない
-    # 例: D[Data Pipeline (api/data.py)] → NG
-    unquoted_bracket_paren = re.findall(r'\[[^\]"]*\([^)]*\)[^\]"]*\]', mermaid_code)
-    if unquoted_bracket_paren:
-        violations.append(
-            f'ノード定義 [] 内に括弧 () が含まれているのに [""] でクォートされていません: '
-            f'{unquoted_bracket_paren[:2]}。必ず ["ラベル (補足)"] 形式を使用してください。'
-        )
 
-    # ルール4: () 内に [] が含まれているのにクォートされていない
-    # 例: cmd(CMD ["/app/start.sh"]) → NG
-    unquoted_paren_bracket = re.findall(r'\([^)"]*\[[^\]]*\][^)"]*\)', mermaid_code)
-    if unquoted_paren_bracket:
-        violations.append(
-            f'ノード定義 () 内に角括弧 [] が含まれているのにクォートされていません: '
-            f'{unquoted_paren_bracket[:2]}。クォートするか記号を削除してください。'
-        )
+def block_hash(mermaid_code: str) -> str:
+    return hashlib.sha256(mermaid_code.encode('utf-8')).hexdigest()
 
-    # ルール4b: {} 内に ()、[]、| などが含まれているのにクォートされていない
-    # 例: A{check (value)} → NG
-    unquoted_brace_special = re.findall(r'\{[^}"]*[(\[|][^}"]*\}', mermaid_code)
-    if unquoted_brace_special:
-        violations.append(
-            f'ひし形ノード {{}} 内に括弧や | が含まれているのにクォートされていません: '
-            f'{unquoted_brace_special[:2]}。必ず {{"ラベル"}} 形式を使用してください。'
-        )
 
-    # ルール4c: ラベル内に | パイプ文字が含まれているのにクォートされていない
-    # エッジラベル記法 -->|label| と混同されるため
-    # フローチャートのノード定義行のみ対象（シーケンス図のメッセージ行は除外）
-    if re.search(r'\b(?:graph|flowchart)\b', mermaid_code):
-        unquoted_pipe = re.findall(r'(?:\[|\()([^"()\[\]]*\|[^"()\[\]]*?)(?:\]|\))', mermaid_code)
-        if unquoted_pipe:
-            violations.append(
-                f'ノードラベル内に | パイプ文字が含まれているのにクォートされていません: '
-                f'{unquoted_pipe[:2]}。パイプ文字を含むラベルは必ずダブルクォートで囲んでください。'
-            )
+def checker_version() -> str:
+    """チェッカー（mermaid_parser と違反メッセージの整形）のソースからバージョンハッシュを計算"""
+    h = hashlib.sha256()
+    for source in (__file__, mermaid_parser.__file__):
+        with open(source, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
 
-    # ルール5: HTMLタグ（< > を含む記述）
-    if re.search(r'<[a-zA-Z][^>]*>', mermaid_code):
-        violations.append(
-            "HTMLタグが使用されています（< > 記号）。"
-            "Mermaidでは使用不可のため削除してください。"
-        )
 
-    # ルール6: シーケンス図でのフローチャート風記法
-    if 'sequenceDiagram' in mermaid_code:
-        if re.search(r'--\|[^|]*\|-->', mermaid_code):
-            violations.append(
-                "シーケンス図でフローチャート風の記法 A--|label|-->B が使われています。"
-                "コロン記法（A->>B: label）を使用してください。"
-            )
+def load_check_cache(cache_path: str) -> None:
+    """キャッシュファイルを読み込む。チェッカーのバージョンが異なる・壊れている場合は無視する"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    if isinstance(data, dict) and data.get('version') == checker_version():
+        _check_cache.update(data.get('blocks', {}))
 
-    # ルール7: シーケンス図でコロン後のラベルが空
-    if 'sequenceDiagram' in mermaid_code:
-        if re.search(r'(?:->>[+\-]?|-->>[+\-]?|-\)[+\-]?)\s*[\w]+\s*:\s*$', mermaid_code, re.MULTILINE):
-            violations.append(
-                "シーケンス図のメッセージ行でコロン（:）の後のラベルが空です（例: `A->>B:`）。"
-                "パースエラーの原因になります。"
-                "戻り値がない場合は `void`、成功応答は `OK` または `完了` などを記載してください。"
-            )
 
-    return violations
+def save_check_cache(cache_path: str) -> None:
+    """この実行で参照したブロックの結果だけをアトミックに書き込む（消えたブロックの結果は捨てる）"""
+    data = {
+        'version': checker_version(),
+        'blocks': {key: _check_cache[key] for key in sorted(_used_check_keys) if key in _check_cache},
+    }
+    try:
+        write_atomic(cache_path, json.dumps(data, ensure_ascii=False))
+    except OSError as e:
+        print(f"WARNING: Could not write Mermaid check cache: {e}", file=sys.stderr)
+
+
+def check_violations(mermaid_code: str) -> List[str]:
+    """
+    Mermaidコードを mermaid_parser で解析し、ルール違反・構文エラーのメッセージのリストを返す。
+    各メッセージの先頭にはブロック内の位置（N行M列）を付ける。
+    違反がなければ空リストを返す。結果はブロック内容のハッシュでキャッシュする。
+    """
+    key = block_hash(mermaid_code)
+    _used_check_keys.add(key)
+    cached = _check_cache.get(key)
+    if cached is None:
+        cached = _check_cache[key] = [
+            f"{d.line}行{d.column}列: {d.message}"
+            for d in mermaid_parser.parse(mermaid_code).diagnostics
+        ]
+    return list(cached)
+
+
+# --- 決定的な自動修正（Gemini を呼ばずに直せる違反） ---
+
+MAX_AUTOFIX_PASSES = 5
+# 許可されていないシェイプの置き換え先: 開き → (開き, 閉じ)
+SHAPE_REPLACEMENTS = {
+    '(((': ('(', ')'), '((': ('(', ')'), '([': ('(', ')'),
+    '[[': ('[', ']'), '[(': ('[', ']'), '[/': ('[', ']'), '[\\': ('[', ']'), '>': ('[', ']'),
+    '{{': ('{', '}'),
+}
+# シーケンス図のフローチャート風メッセージ: A--|label|-->B
+SEQUENCE_PIPE_MESSAGE_RE = re.compile(r'^(\s*)([^\s|:]+?)\s*--\|([^|]*)\|-->\s*([^\s|:]+)\s*$')
+# ハイフン付き ID を改名しない flowchart の行（ID のみを参照する行は改名する）
+FLOWCHART_REFERENCE_KEYWORDS = {'class', 'style', 'click', 'linkStyle'}
+# ハイフン付き参加者名を改名しないシーケンス図の行（表示テキストのみの行）
+SEQUENCE_TEXT_KEYWORDS = (
+    mermaid_parser.SEQUENCE_BLOCK_KEYWORDS | mermaid_parser.SEQUENCE_BRANCH_KEYWORDS
+    | {'end', 'autonumber', 'title', 'accTitle', 'accDescr'}
+)
+
+# 1件の編集: (行番号 0始まり, 開始列 0始まり, 終了列, 置き換え文字列, ルール名)
+Edit = Tuple[int, int, int, str, str]
+
+
+def _apply_edits(lines: List[str], edits: List[Edit]) -> List[Edit]:
+    """重ならない編集を後ろから適用し、適用した編集を返す。重なった編集は次のパスに回す"""
+    applied = []
+    last_start = {}
+    for edit in sorted(edits, key=lambda e: (e[0], e[1], e[2]), reverse=True):
+        line, start, end, replacement, _ = edit
+        if end > last_start.get(line, len(lines[line]) + 1):
+            continue
+        lines[line] = lines[line][:start] + replacement + lines[line][end:]
+        last_start[line] = start
+        applied.append(edit)
+    return applied
+
+
+def _rename_edits(diagram: mermaid_parser.MermaidDiagram, lines: List[str], ids: set) -> List[Edit]:
+    """ハイフンを含む ID / 参加者名を、ブロック内のすべての参照箇所でアンダースコアに置き換える"""
+    # ID 候補を字句単位で切り出して集合と照合する（ID の数によらず線形）
+    tokens = mermaid_parser.NODE_ID_RE
+    edits = []
+    if diagram.kind == 'flowchart':
+        # ラベルのないノードは ID がそのまま表示されるため、最初の出現に元の ID をラベルとして付ける
+        labeled = {n.id for n in diagram.nodes if n.shape}
+        seen = set()
+        for node in diagram.nodes:
+            if node.id not in ids:
+                continue
+            replacement = node.id.replace('-', '_')
+            if node.id not in labeled and node.id not in seen:
+                replacement += f'["{node.id}"]'
+            seen.add(node.id)
+            edits.append((node.line - 1, node.column - 1, node.column - 1 + len(node.id), replacement, 'hyphen_id'))
+        for index, line in enumerate(lines):
+            if line.strip().split(' ', 1)[0] in FLOWCHART_REFERENCE_KEYWORDS:
+                edits.extend(
+                    (index, m.start(), m.end(), m.group().replace('-', '_'), 'hyphen_id')
+                    for m in tokens.finditer(line) if m.group() in ids
+                )
+    elif diagram.kind == 'sequenceDiagram':
+        for index, line in enumerate(lines):
+            keyword = line.strip().split(' ', 1)[0]
+            if keyword in SEQUENCE_TEXT_KEYWORDS or line.strip().startswith('%%'):
+                continue
+            # コロン以降はメッセージ・Note の表示テキストなので改名しない
+            region_end = line.find(':') if ':' in line else len(line)
+            declaration = keyword in ('participant', 'actor', 'create')
+            if declaration and ' as ' in line:
+                region_end = line.index(' as ')
+            for m in tokens.finditer(line, 0, region_end):
+                if m.group() not in ids:
+                    continue
+                replacement = m.group().replace('-', '_')
+                if declaration and ' as ' not in line:
+                    # 別名がなければ元の名前を別名にして表示を保つ
+                    replacement += f' as {m.group()}'
+                edits.append((index, m.start(), m.end(), replacement, 'hyphen_id'))
+    return edits
+
+
+def _diagnostic_edit(diagram: mermaid_parser.MermaidDiagram, lines: List[str],
+                     d: mermaid_parser.Diagnostic) -> Optional[Edit]:
+    """1件の違反に対する機械的な修正を返す。機械的に直せない違反は None"""
+    index, start, end = d.line - 1, d.column - 1, d.end_column - 1
+    if d.rule == 'lr_layout':
+        return index, start, end, 'TD', d.rule
+    if d.rule == 'unquoted_label':
+        # ラベル内のダブルクォートはシングルクォートに置き換える
+        return index, start, end, '"' + d.text.strip().replace('"', "'") + '"', d.rule
+    if d.rule == 'shape':
+        for opener, closers, allowed in mermaid_parser.NODE_SHAPES:
+            if not allowed and d.text.startswith(opener):
+                closer = next(c for c in closers if d.text.endswith(c))
+                new_open, new_close = SHAPE_REPLACEMENTS[opener]
+                inner = d.text[len(opener):len(d.text) - len(closer)]
+                return index, start, end, new_open + inner + new_close, d.rule
+        return None
+    if d.rule == 'html_tag':
+        generic = re.fullmatch(r'<(\w+)>', d.text)
+        if diagram.kind == 'classDiagram' and generic:
+            # クラス図のジェネリクスは Mermaid の ~T~ 記法にする
+            return index, start, end, f'~{generic.group(1)}~', d.rule
+        return index, start, end, ' ' if re.match(r'<br\b', d.text, re.IGNORECASE) else '', d.rule
+    if d.rule == 'sequence_empty_label':
+        # 破線の矢印（-->>）は応答とみなして OK、それ以外は void を補う
+        arrow = mermaid_parser.find_sequence_arrow(lines[index])
+        label = 'OK' if arrow and '--' in arrow.group() else 'void'
+        return index, end, end, f' {label}', d.rule
+    if d.rule == 'sequence_pipe_label':
+        m = SEQUENCE_PIPE_MESSAGE_RE.match(lines[index])
+        if m:
+            indent, sender, label, target = m.groups()
+            return index, 0, len(lines[index]), f'{indent}{sender}->>{target}: {label.strip() or "void"}', d.rule
+    return None
+
+
+def autofix_block(mermaid_code: str) -> Tuple[str, List[str]]:
+    """
+    Mermaidコードの機械的に直せる違反（LR、ハイフン付きID、未クォートのラベル、禁止シェイプ、
+    HTMLタグ、シーケンス図の空ラベル・フローチャート風記法）を修正する。
+    修正後のコードと、適用した修正のルール名のリストを返す。
+    修正によって構文エラーが増える場合は元のコードを返す。
+    """
+    if not check_violations(mermaid_code):
+        return mermaid_code, []
+    lines = mermaid_code.split('\n')
+    applied: List[str] = []
+    for _ in range(MAX_AUTOFIX_PASSES):
+        diagram = mermaid_parser.parse('\n'.join(lines))
+        edits = []
+        hyphen_ids = set()
+        for d in diagram.diagnostics:
+            if d.rule == 'hyphen_id':
+                hyphen_ids.add(d.text)
+                continue
+            edit = _diagnostic_edit(diagram, lines, d)
+            if edit is not None:
+                edits.append(edit)
+        if hyphen_ids:
+            edits.extend(_rename_edits(diagram, lines, hyphen_ids))
+        done = _apply_edits(lines, edits)
+        if not done:
+            break
+        applied.extend(edit[4] for edit in done)
+
+    fixed = '\n'.join(lines)
+    if fixed == mermaid_code:
+        return mermaid_code, []
+
+    def syntax_errors(code: str) -> int:
+        return sum(1 for d in mermaid_parser.parse(code).diagnostics if d.rule == 'syntax')
+
+    if syntax_errors(fixed) > syntax_errors(mermaid_code):
+        return mermaid_code, []
+    return fixed, applied
+
+
+def autofix_content(content: str) -> Tuple[str, List[str]]:
+    """Markdown 内のすべての Mermaid ブロックに autofix_block を適用する"""
+    applied: List[str] = []
+
+    def replace(m: re.Match) -> str:
+        fixed, rules = autofix_block(m.group(1))
+        applied.extend(rules)
+        return f"```mermaid\n{fixed}```"
+
+    return MERMAID_BLOCK_RE.sub(replace, content), applied
+
+
+def summarize_fixes(rules: List[str]) -> str:
+    """適用した修正をルールごとの件数にまとめる（例: hyphen_id×3, lr_layout×1）"""
+    counts = {}
+    for rule in rules:
+        counts[rule] = counts.get(rule, 0) + 1
+    return ", ".join(f"{rule}×{n}" for rule, n in sorted(counts.items()))
 
 
 def build_fix_prompt(file_path: str, violations_by_block: List[Tuple[str, List[str]]]) -> str:
-    """Mermaid修正用のGeminiプロンプトを生成する"""
+    """
+    Mermaid修正用のGeminiプロンプトを生成する。
+    ファイルは編集させず、修正後のブロックだけを番号付きで標準出力に返させる。
+    """
     violations_text = ""
     for i, (block, viols) in enumerate(violations_by_block):
         violations_text += f"\n### 違反ブロック {i + 1}\n"
-        violations_text += f"```mermaid\n{block}\n```\n"
-        violations_text += "**違反内容:**\n"
+        violations_text += f"```mermaid\n{block.rstrip()}\n```\n"
+        violations_text += "**違反内容（行・列はブロック内の位置）:**\n"
         for v in viols:
             violations_text += f"- {v}\n"
 
-    return f"""以下のMarkdownファイルのMermaidダイアグラムにルール違反があります。
-違反のあるMermaidブロックのみを修正して、ファイルを上書き保存してください。
-**Mermaid以外の部分（テキスト、コードスニペット、Sources行など）は絶対に変更しないこと。**
-
-ファイルパス: `{file_path}`
+    return f"""Markdownファイル `{file_path}` 内の以下のMermaidダイアグラムにルール違反があります。
+各ブロックの違反を修正し、修正後のブロックを出力してください。
+**ファイルの読み込み・編集・保存は行わないこと。** 修正結果は出力として返すだけでよい。
 
 ## 検出された違反
 {violations_text}
-
 ## Mermaidダイアグラム修正ルール（必須・絶対厳守）
 
 MarkdownパーサーおよびMermaidレンダリングエンジンでの**パースエラー・描画不能を絶対に防ぐため、以下のルールを完全に遵守すること。**
@@ -151,32 +367,41 @@ MarkdownパーサーおよびMermaidレンダリングエンジンでの**パー
 以下のルールに違反すると、図がすべて表示されなくなる致命的なエラーを引き起こす。
 
 #### 3-A. 使用するノードシェイプは3種類のみ
-`A[ラベル]`（長方形）、`A(ラベル)`（角丸長方形）、`A{ラベル}`（ひし形）以外のシェイプ（`[[]]`・`[()]`・`{{}}` 等）は**使用禁止**。
+`A[ラベル]`（長方形）、`A(ラベル)`（角丸長方形）、`A{{ラベル}}`（ひし形）以外のシェイプ（`[[]]`・`[()]`・`{{{{}}}}` 等）は**使用禁止**。
 
 #### 3-B. 以下の文字がラベルに含まれる場合は必ずダブルクォートで囲む
-`()`、`[]`、`{}`、`|`（パイプ）、`/`・`\`（スラッシュ）、`<`・`>`（山括弧）、`#`、`:`、`%`。
+`()`、`[]`、`{{}}`、`|`（パイプ）、`/`・`\`（スラッシュ）、`<`・`>`（山括弧）、`#`、`:`、`%`。
 
 - **【頻出エラー1】** `D[Data Pipeline (api/data_pipeline.py)]` → 必ず `D["Data Pipeline (api/data_pipeline.py)"]`
 - **【頻出エラー2】** `cmd_start_sh(CMD ["/app/start.sh"])` → 必ず `cmd_start_sh("CMD '/app/start.sh'")`（入れ子括弧は削除）
-- **【頻出エラー3】** `A{is valid?}` → 必ず `A{"is valid?"}`
+- **【頻出エラー3】** `A{{is valid?}}` → 必ず `A{{"is valid?"}}`
 - **【頻出エラー4】** `A["read | write"]` ← パイプ文字はクォート内なら OK
 
 #### 3-C. ノード ID のルール
 - HTMLタグは使用不可（`<` や `>` などの記号もパースエラーの原因）。
 - ノード ID にハイフンを含めない（アンダースコアを使用すること）。
 
-修正後にファイルを保存し、修正した箇所を簡潔に報告してください。"""
+## 出力形式（厳守）
+違反ブロックごとに、番号の行に続けて修正後のブロック全体を mermaid コードブロックで出力すること。
+説明文は不要。ブロックの順番と番号は入力と同じにすること。
 
+=== BLOCK 1 ===
+```mermaid
+graph TD
+    ...
+```
+=== BLOCK 2 ===
+```mermaid
+...
+```"""
 
-async def run_gemini_fix(prompt: str, target_dir: str, output_dir: str) -> bool:
-    """Gemini CLIを呼び出してMermaid違反を修正する"""
-    include_dirs = ",".join(set([target_dir, output_dir]))
-    cmd = [
-        "gemini",
-        "-m", "gemini-2.5-flash",
-        "--approval-mode", "auto_edit",
-        "--include-directories", include_dirs,
-    ]
+
+async def run_gemini_fix(prompt: str, target_dir: str, log_prefix: str = "    ") -> Optional[str]:
+    """
+    Gemini CLIを呼び出してMermaid違反の修正結果を得る。成功すれば標準出力、失敗すれば None を返す。
+    並列実行時はログに log_prefix でページを示す。
+    """
+    cmd = ["gemini", "-m", "gemini-2.5-flash"]
 
     try:
         process = await asyncio.create_subprocess_exec(
@@ -194,58 +419,111 @@ async def run_gemini_fix(prompt: str, target_dir: str, output_dir: str) -> bool:
         except asyncio.TimeoutError:
             process.kill()
             await process.communicate()
-            print(f"    [Timeout] Gemini CLI timed out.")
-            return False
+            print(f"{log_prefix}[Timeout] Gemini CLI timed out.")
+            return None
 
         if process.returncode != 0:
-            print(f"    [Error] Gemini CLI failed: {stderr.decode('utf-8', errors='ignore')[:300]}")
-            return False
+            print(f"{log_prefix}[Error] Gemini CLI failed: {stderr.decode('utf-8', errors='ignore')[:300]}")
+            return None
 
-        return True
+        return stdout.decode("utf-8", errors="replace")
     except Exception as e:
-        print(f"    [Exception] {e}")
-        return False
+        print(f"{log_prefix}[Exception] {e}")
+        return None
+
+
+def parse_fixed_blocks(output: str) -> dict:
+    """Gemini の応答から {ブロック番号: 修正後のコード} を取り出す"""
+    return {int(m.group(1)): m.group(2) for m in RESPONSE_BLOCK_RE.finditer(output)}
 
 
 async def fix_file(
     file_path: str,
-    violations_by_block: List[Tuple[str, List[str]]],
     target_dir: str,
-    output_dir: str,
+    autofix: bool = True,
+    log_prefix: str = "    ",
 ) -> bool:
-    """単一ファイルのMermaid違反をGeminiで修正し、修正後に再チェックする"""
+    """
+    単一ファイルの違反のあるMermaidブロックだけをGeminiに送り、返ってきたブロックを
+    ローカルのチェッカーで確かめてから元の位置に差し替える。
+    違反が残るブロックや図の種類が変わったブロックは採用せず、次の試行に回す。ブロックは MAX_BLOCKS_PER_REQUEST 件ずつまとめて依頼する。
+    autofix が有効なら、Gemini の出力に残った機械的に直せる違反も採用前に修正する。
+    Gemini CLI の呼び出しが失敗した場合は、指数的に待ち時間を延ばしてからリトライする。
+    """
+    gemini_failed = False
     for attempt in range(MAX_FIX_RETRIES + 1):
-        if attempt > 0:
-            print(f"    Retry {attempt}/{MAX_FIX_RETRIES}...")
-
-        prompt = build_fix_prompt(file_path, violations_by_block)
-        success = await run_gemini_fix(prompt, target_dir, output_dir)
-
-        if not success:
-            continue
-
-        # 修正後に再チェック
         try:
             with open(file_path, "r", encoding="utf-8") as f:
                 content = f.read()
         except Exception as e:
-            print(f"    [Error] Could not re-read file: {e}")
+            print(f"{log_prefix}[Error] Could not read file: {e}")
             return False
-
-        blocks = extract_mermaid_blocks(content)
-        remaining = [(b, check_violations(b)) for b in blocks if check_violations(b)]
-
-        if not remaining:
+        targets = find_violating_blocks(content)
+        if not targets:
             return True
 
-        print(f"    {sum(len(v) for _, v in remaining)} violation(s) still remain after fix.")
-        violations_by_block = remaining  # 次のリトライ用に更新
-
-    return False
-
-
-async def scan_and_fix(outline_path: str) -> None:
-    """outline.json の全 done ページを走査してMermaid違反を検出・修正する"""
+        if attempt > 0:
+            if gemini_failed:
+                delay = RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+                print(f"{log_prefix}Retry {attempt}/{MAX_FIX_RETRIES} in {delay}s...")
+                await asyncio.sleep(delay)
+            else:
+                print(f"{log_prefix}Retry {attempt}/{MAX_FIX_RETRIES}...")
+
+        gemini_failed = False
+        replacements = []
+        for first in range(0, len(targets), MAX_BLOCKS_PER_REQUEST):
+            batch = targets[first:first + MAX_BLOCKS_PER_REQUEST]
+            prompt = build_fix_prompt(file_path, [(code, viols) for _, _, code, viols in batch])
+            output = await run_gemini_fix(prompt, target_dir, log_prefix)
+            if output is None:
+                gemini_failed = True
+                continue
+
+            fixed_blocks = parse_fixed_blocks(output)
+            for number, (start, end, code, viols) in enumerate(batch, 1):
+                label = f"Block {first + number}/{len(targets)}"
+                fixed = fixed_blocks.get(number)
+                if fixed is None or not fixed.strip():
+                    print(f"{log_prefix}{label}: no corrected block in Gemini output.")
+                    continue
+                fixed = fixed.rstrip("\n") + "\n"
+                if autofix:
+                    fixed, _ = autofix_block(fixed)
+                remaining = check_violations(fixed)
+                if remaining:
+                    print(f"{log_prefix}{label}: rejected ({len(remaining)} violation(s) remain).")
+                    continue
+                kind, fixed_kind = mermaid_parser.parse(code).kind, mermaid_parser.parse(fixed).kind
+                if fixed_kind != kind:
+                    print(f"{log_prefix}{label}: rejected (diagram type changed: {kind} -> {fixed_kind}).")
+                    continue
+                replacements.append((start, end, code, fixed))
+
+        if replacements:
+            applied = splice_blocks(file_path, replacements)
+            print(f"{log_prefix}Replaced {applied}/{len(targets)} block(s).")
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        remaining_blocks = find_violating_blocks(f.read())
+    if remaining_blocks:
+        print(f"{log_prefix}{sum(len(v) for *_, v in remaining_blocks)} violation(s) still remain after fix.")
+    return not remaining_blocks
+
+
+async def scan_and_fix(
+    outline_path: str,
+    autofix: bool = True,
+    concurrency: int = MAX_CONCURRENT_FIXES,
+    use_cache: bool = True,
+) -> None:
+    """
+    outline.json の全 done ページを走査してMermaid違反を検出・修正する。
+    autofix が有効なら機械的に直せる違反を先にローカルで修正し、残った違反だけを Gemini に渡す。
+    Gemini による修正はファイル単位で最大 concurrency 件まで並列に実行し、
+    すべて終わってからファイルごとの結果を表示する。
+    use_cache が有効なら、Wiki ディレクトリの CHECK_CACHE_FILENAME から前回のチェック結果を再利用する。
+    """
     with open(outline_path, "r", encoding="utf-8") as f:
         outline_data = json.load(f)
 
@@ -261,11 +539,15 @@ async def scan_and_fix(outline_path: str) -> None:
         print("No done pages found in outline.json.")
         return
 
+    cache_path = os.path.join(output_dir, CHECK_CACHE_FILENAME) if use_cache else None
+    if cache_path:
+        load_check_cache(cache_path)
+
     print(f"Scanning {len(done_pages)} pages for Mermaid violations...\n")
 
-    total_violations = 0
-    fixed_count = 0
-    failed_files = []
+    # ファイルごとの結果: status は ok / autofixed / fixed / failed
+    results = []
+    pending = []
 
     for page in done_pages:
         page_id = page.get("id", "?")
@@ -286,31 +568,61 @@ async def scan_and_fix(outline_path: str) -> None:
             print(f"  [{page_id}] -  No Mermaid blocks.")
             continue
 
-        violations_by_block = [(b, check_violations(b)) for b in blocks if check_violations(b)]
+        result = {"page_id": page_id, "filename": filename, "autofixed": 0, "sent": 0, "status": "ok"}
+        results.append(result)
 
-        if not violations_by_block:
+        if autofix:
+            content, fixes = autofix_content(content)
+            if fixes:
+                write_atomic(file_path, content)
+                result["autofixed"] = len(fixes)
+                result["status"] = "autofixed"
+                print(f"  [{page_id}] 🔧 Auto-fixed {len(fixes)} issue(s): {summarize_fixes(fixes)}")
+
+        violating = find_violating_blocks(content)
+
+        if not violating:
             print(f"  [{page_id}] ✅ {len(blocks)} block(s) — all OK")
             continue
 
-        violation_count = sum(len(v) for _, v in violations_by_block)
-        total_violations += violation_count
+        result["sent"] = sum(len(v) for *_, v in violating)
         print(
-            f"  [{page_id}] ❌ {violation_count} violation(s) in "
-            f"{len(violations_by_block)} block(s). Fixing..."
+            f"  [{page_id}] ❌ {result['sent']} violation(s) in "
+            f"{len(violating)} block(s) — queued for Gemini"
         )
+        pending.append((result, file_path))
+
+    if pending:
+        print(f"\nFixing {len(pending)} file(s) with Gemini (max {concurrency} concurrent)...")
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fix_with_semaphore(result, file_path):
+            async with semaphore:
+                prefix = f"  [{result['page_id']}] "
+                print(f"{prefix}Fixing...")
+                success = await fix_file(file_path, target_dir, autofix, prefix + "  ")
+                result["status"] = "fixed" if success else "failed"
+                print(f"{prefix}{'✅ Fixed.' if success else '🛑 Fix failed.'}")
 
-        success = await fix_file(file_path, violations_by_block, target_dir, output_dir)
-        if success:
-            print(f"  [{page_id}] ✅ Fixed.")
-            fixed_count += 1
-        else:
-            print(f"  [{page_id}] 🛑 Fix failed.")
-            failed_files.append(filename)
+        await asyncio.gather(*(fix_with_semaphore(*item) for item in pending))
 
+    if cache_path:
+        save_check_cache(cache_path)
+
+    changed = [r for r in results if r["status"] != "ok"]
+    icons = {"autofixed": "🔧", "fixed": "✅", "failed": "🛑"}
     print(f"\n{'=' * 50}")
     print(f"Mermaid scan complete.")
-    print(f"  Total violations detected : {total_violations}")
-    print(f"  Files fixed               : {fixed_count}")
+    if changed:
+        print(f"  {'File':<40} {'Auto':>5} {'Gemini':>7}  Result")
+        for r in changed:
+            print(f"  {r['filename']:<40} {r['autofixed']:>5} {r['sent']:>7}  {icons[r['status']]} {r['status']}")
+    failed_files = [r["filename"] for r in results if r["status"] == "failed"]
+    print(f"  Total violations detected : {sum(r['autofixed'] + r['sent'] for r in results)}")
+    if autofix:
+        autofixed = [r for r in results if r["autofixed"]]
+        print(f"  Auto-fixed without Gemini : {sum(r['autofixed'] for r in autofixed)} in {len(autofixed)} file(s)")
+    print(f"  Files fixed by Gemini     : {sum(1 for r in results if r['status'] == 'fixed')}")
     if failed_files:
         print(f"  Files failed to fix       : {len(failed_files)}")
         for f in failed_files:
@@ -322,6 +634,18 @@ async def main() -> None:
         description="DeepWiki Mermaid rule checker & fixer"
     )
     parser.add_argument("outline_json", help="Path to the outline.json file")
+    parser.add_argument(
+        "--no-autofix", action="store_true",
+        help="Disable local deterministic fixes and send every violation to Gemini",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help=f"Do not read or write the check result cache ({CHECK_CACHE_FILENAME})",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=MAX_CONCURRENT_FIXES,
+        help=f"Max number of files fixed by Gemini in parallel (default {MAX_CONCURRENT_FIXES})",
+    )
     args = parser.parse_args()
 
     outline_path = os.path.abspath(args.outline_json)
@@ -329,7 +653,8 @@ async def main() -> None:
         print(f"Error: outline.json not found at {outline_path}")
         sys.exit(1)
 
-    await scan_and_fix(outline_path)
+    await scan_and_fix(outline_path, autofix=not args.no_autofix, concurrency=max(1, args.concurrency),
+                      use_cache=not args.no_cache)
 
 
 if __name__ == "__main__":
@@ -9,16 +9,66 @@
     # GitHub/GitLab URL形式（URLを明示指定）
     python3 scripts/fix_sources.py $OUTPUT_DIR/outline.json --link-style github --remote-url https://github.com/org/repo
 
+    # GitHub/GitLab URL形式（ブランチではなく解決済みのコミット SHA に固定したパーマリンク）
+    python3 scripts/fix_sources.py $OUTPUT_DIR/outline.json --link-style github --pin-commit [REV]
+
     # vscode:// 形式（ローカルのVSCodeで直接開く）
     python3 scripts/fix_sources.py $OUTPUT_DIR/outline.json --link-style vscode
+
+    # 書き込まずに予定の変更を unified diff で表示する
+    python3 scripts/fix_sources.py $OUTPUT_DIR/outline.json --link-style github --dry-run
+
+    # 生成後にソースが変わった場合、生成時のリビジョンからの git diff で行番号を追従させる
+    python3 scripts/fix_sources.py $OUTPUT_DIR/outline.json --reanchor <生成時のコミット>
+
+--reanchor は file:/// リンクの #Lx-Ly、リンク文字列の path:Lx-Ly、スニペット先頭の
+出典コメントの行番号を、引用ファイルの差分ハンクに合わせてずらす。引用範囲の中身自体が
+変更・削除されている場合はずらした上で「再生成が必要」として一覧表示する。
+リンク形式の変換と同時に指定した場合は、行番号を直してから変換する。
+
+--pin-commit では、リンク先のパスがそのコミットに存在するかを常駐させた1つの
+git cat-file --batch-check プロセスにまとめて問い合わせ、存在しないもの（未コミットの
+ファイルなど）は file:/// のまま残して一覧表示する。
+
+outline.json の additionalDirs にある隣接リポジトリへのリンクも、ディレクトリごとに git remote と
+ブランチ（--pin-commit 時は HEAD のコミット SHA）を実行開始時に1回だけ求めて変換する。
+各リンクは最も長く一致するルートのリポジトリで変換する。
+
+ページはスレッドプールで並列に処理し（--jobs N）、一時ファイルに書いてから置き換えるため、
+途中で中断してもページが切り詰められることはない。
 """
 import os
 import sys
 import json
 import re
+import bisect
+import difflib
 import argparse
+import threading
 import subprocess
-from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from fix_mermaid import write_atomic
+from source_index import (
+    CODE_BLOCK_RE, FILE_LINK_HEAD_RE, FILE_LINK_TAIL_RE, SNIPPET_HEADER_RE, iter_file_links,
+    resolve_outline_dirs,
+)
+
+# ページを並列に処理するスレッド数の既定値
+DEFAULT_JOBS = 8
+
+# 変換対象リンクの #L アンカー（省略可）と閉じ括弧。パス部分は FILE_LINK_HEAD_RE で照合する
+FILE_LINK_ANCHOR_RE = re.compile(r'(#L[\d\-L]+)?\)')
+ANCHOR_START_LINE_RE = re.compile(r'L(\d+)')
+SSH_REMOTE_RE = re.compile(r'git@([^:]+):(.+?)(?:\.git)?$')
+
+# git diff -U0 のハンクヘッダ: @@ -旧開始[,旧行数] +新開始[,新行数] @@
+HUNK_HEADER_RE = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+# Sources 行のリンク文字列 [path/to/file.ts:L10-L20] の行番号部分
+LINK_LABEL_RANGE_RE = re.compile(r':\s*L(\d+)(?:\s*[-–]\s*L?(\d+))?\s*$')
 
 
 def get_git_remote_url(target_dir: str) -> Optional[str]:
@@ -40,7 +90,7 @@ def get_git_remote_url(target_dir: str) -> Optional[str]:
 
         # SSH形式を HTTPS に変換
         # git@github.com:org/repo.git → https://github.com/org/repo
-        ssh_match = re.match(r"git@([^:]+):(.+?)(?:\.git)?$", url)
+        ssh_match = SSH_REMOTE_RE.match(url)
         if ssh_match:
             host = ssh_match.group(1)
             path = ssh_match.group(2)
@@ -55,23 +105,87 @@ def get_git_remote_url(target_dir: str) -> Optional[str]:
         return None
 
 
-def get_git_branch(target_dir: str) -> str:
-    """現在のブランチ名を取得する。失敗した場合は 'main' を返す。"""
+def get_git_head(target_dir: str, rev: str = "HEAD") -> Tuple[str, Optional[str], str]:
+    """1回の git rev-parse で (ブランチ名, rev のコミット SHA, リポジトリルートからの target_dir のパス) を取得する。
+    ブランチ名が取れない場合は 'main'、SHA が解決できない場合は None、プレフィックスはルート直下なら ''。
+    """
+    branch, sha, prefix = "main", None, ""
     try:
         result = subprocess.run(
-            ["git", "rev-parse", "--abbrev-ref", "HEAD"],
+            ["git", "rev-parse", "--show-prefix", f"{rev}^{{commit}}", "--abbrev-ref", "HEAD"],
             cwd=target_dir,
             capture_output=True,
             text=True,
             timeout=10,
         )
         if result.returncode == 0:
-            branch = result.stdout.strip()
-            if branch and branch != "HEAD":
-                return branch
+            lines = result.stdout.split("\n")
+            if len(lines) >= 3:
+                prefix = lines[0].strip()
+                sha = lines[1].strip() or None
+                if lines[2].strip() and lines[2].strip() != "HEAD":
+                    branch = lines[2].strip()
     except Exception:
         pass
-    return "main"
+    return branch, sha, prefix
+
+
+class GitPathChecker:
+    """1つの git cat-file --batch-check プロセスを使い回して、コミット内のパスの存在を確認する。
+    問い合わせ結果はパスごとに覚えておき、同じパスで再びプロセスに問い合わせない。
+    """
+
+    def __init__(self, target_dir: str, commit: str, prefix: str = ""):
+        self.commit = commit
+        self.prefix = prefix
+        self.missing: Set[str] = set()
+        self._known: Dict[str, bool] = {}
+        # 問い合わせと応答の順序が対応している必要があるため、並列のページ処理から直列化する
+        self._lock = threading.Lock()
+        self._proc = subprocess.Popen(
+            ["git", "cat-file", "--batch-check"],
+            cwd=target_dir,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+
+    def prefetch(self, rel_paths: Iterable[str]) -> None:
+        """未確認のパスをまとめて書き込み、応答をまとめて読む。
+        書き込み側を別スレッドにして、パイプのバッファが詰まって互いに待ち続けるのを防ぐ。
+        """
+        with self._lock:
+            pending = [p for p in dict.fromkeys(rel_paths) if p not in self._known]
+            if not pending:
+                return
+
+            def write() -> None:
+                for rel_path in pending:
+                    self._proc.stdin.write(f"{self.commit}:{self.prefix}{rel_path}\n")
+                self._proc.stdin.flush()
+
+            writer = threading.Thread(target=write)
+            writer.start()
+            for rel_path in pending:
+                # 存在する: "<oid> <type> <size>"、存在しない: "<object> missing" / "<object> ambiguous"
+                reply = self._proc.stdout.readline().rstrip("\n")
+                exists = bool(reply) and not reply.endswith((" missing", " ambiguous"))
+                self._known[rel_path] = exists
+                if not exists:
+                    self.missing.add(rel_path)
+            writer.join()
+
+    def exists(self, rel_path: str) -> bool:
+        if rel_path not in self._known:
+            self.prefetch([rel_path])
+        return self._known[rel_path]
+
+    def close(self) -> None:
+        if self._proc.poll() is None:
+            self._proc.stdin.close()
+            self._proc.wait()
 
 
 def build_github_url(remote_url: str, branch: str, rel_path: str, anchor: str) -> str:
@@ -90,95 +204,429 @@ def build_vscode_url(abs_path: str, start_line: Optional[str]) -> str:
     return f"vscode://file/{abs_path}{line_suffix}"
 
 
-def convert_links_github(
-    content: str, target_dir: str, remote_url: str, branch: str
-) -> Tuple[str, int]:
-    """file:/// リンクを GitHub/GitLab URL に変換する。"""
-    target_dir = target_dir.rstrip("/")
+def sub_file_links(content: str, replace: Callable[[str, str], Optional[str]]) -> Tuple[str, int]:
+    """(file:///abs/path#Lx-Ly) リンクを replace(絶対パス, アンカー) の戻り値で置き換える。
+    replace が None を返したリンクはそのまま残す。アンカーはない場合 ''。
+    1つの正規表現で re.sub すると閉じないリンクの連続で二乗時間になるため、
+    iter_file_links と同じくパス部分とその後ろを分けて照合する。
+    Returns: (新しい本文, 置き換えた件数)
+    """
+    pieces = []
+    last = 0
+    pos = 0
     count = 0
+    while True:
+        head = FILE_LINK_HEAD_RE.search(content, pos)
+        if not head:
+            break
+        tail = FILE_LINK_ANCHOR_RE.match(content, head.end())
+        if not tail:
+            pos = head.end()
+            continue
+        new = replace(head.group(1), tail.group(1) or "")
+        if new is not None:
+            pieces.append(content[last:head.start()])
+            pieces.append(new)
+            last = tail.end()
+            count += 1
+        pos = tail.end()
 
-    def replace(m: re.Match) -> str:
-        nonlocal count
-        abs_path = m.group(1)
-        anchor = m.group(2) or ""
+    if count == 0:
+        return content, 0
+    pieces.append(content[last:])
+    return "".join(pieces), count
+
+
+@dataclass
+class RepoLink:
+    """リンクの変換先となる1リポジトリ（targetDir または additionalDirs の1つ）"""
+    root: str  # ローカルの絶対パス
+    remote_url: str
+    ref: str  # ブランチ名またはコミット SHA
+    prefix: str = ""  # リポジトリルートから root までのパス（root がサブディレクトリの場合）
+    checker: Optional[GitPathChecker] = None  # ref がコミット SHA のとき、パスの存在確認に使う
+
+
+class RepoIndex:
+    """ルートの絶対パス → RepoLink の索引。
+    リンクのパスから親ディレクトリへ辿って辞書を引くため、最も長く一致するルートが
+    リポジトリ数によらずパスの深さ分の参照で見つかる（ルートが入れ子でも内側が優先される）。
+    """
+
+    def __init__(self, repos: List[RepoLink]):
+        self.repos = repos
+        self._by_root = {repo.root.rstrip("/"): repo for repo in repos}
+
+    def lookup(self, abs_path: str) -> Optional[Tuple[RepoLink, str]]:
+        """絶対パスを含むリポジトリと、そのルートからの相対パスを返す。どのルートにも属さなければ None。"""
+        path = abs_path.rstrip("/")
+        while path:
+            repo = self._by_root.get(path)
+            if repo is not None:
+                return repo, abs_path[len(path):].lstrip("/")
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+        return None
 
-        if abs_path.startswith(target_dir + "/"):
-            rel_path = abs_path[len(target_dir) + 1:]
-        elif abs_path.startswith(target_dir):
-            rel_path = abs_path[len(target_dir):].lstrip("/")
-        else:
-            return m.group(0)
 
-        count += 1
-        return f"({build_github_url(remote_url, branch, rel_path, anchor)})"
+def convert_links_github(content: str, repo_index: RepoIndex) -> Tuple[str, int]:
+    """file:/// リンクを、パスを含むリポジトリの GitHub/GitLab URL に変換する。
+    リポジトリに checker がある場合は、そのコミットに存在しないパスへのリンクを変換せずに残す。
+    """
+    links: Dict[str, Optional[Tuple[RepoLink, str]]] = {}
+    for path, _, _, _ in iter_file_links(content):
+        if path not in links:
+            links[path] = repo_index.lookup(path)
+
+    # コミットへの存在確認はリポジトリごとにまとめて問い合わせる
+    for repo in repo_index.repos:
+        if repo.checker is not None:
+            repo.checker.prefetch(rel for found, rel in filter(None, links.values()) if found is repo)
 
-    # file:// の後の / をパスの先頭として含める → group(1) が /absolute/path 形式になる
-    pattern = r"\(file://(/[^#)\s]+)(#L[\d\-L]+)?\)"
-    return re.sub(pattern, replace, content), count
+    def replace(abs_path: str, anchor: str) -> Optional[str]:
+        found = links[abs_path] if abs_path in links else repo_index.lookup(abs_path)
+        if found is None:
+            return None
+        repo, rel_path = found
+
+        if repo.checker is not None and not repo.checker.exists(rel_path):
+            return None
+
+        return f"({build_github_url(repo.remote_url, repo.ref, repo.prefix + rel_path, anchor)})"
+
+    return sub_file_links(content, replace)
 
 
 def convert_links_vscode(content: str) -> Tuple[str, int]:
     """file:/// リンクを vscode://file/ 形式に変換する。"""
-    count = 0
-
-    def replace(m: re.Match) -> str:
-        nonlocal count
-        abs_path = m.group(1)
-        anchor = m.group(2) or ""
 
+    def replace(abs_path: str, anchor: str) -> str:
         # #L100-L200 から開始行番号を抽出
         start_line = None
         if anchor:
-            line_match = re.search(r"L(\d+)", anchor)
+            line_match = ANCHOR_START_LINE_RE.search(anchor)
             if line_match:
                 start_line = line_match.group(1)
 
-        count += 1
         return f"({build_vscode_url(abs_path, start_line)})"
 
-    # file:// の後の / をパスの先頭として含める → group(1) が /absolute/path 形式になる
-    pattern = r"\(file://(/[^#)\s]+)(#L[\d\-L]+)?\)"
-    return re.sub(pattern, replace, content), count
+    return sub_file_links(content, replace)
+
+
+class LineMap:
+    """1ファイル分の git diff -U0 のハンクから、旧リビジョンの行番号を現在の行番号に写す。"""
+
+    def __init__(self, hunks: List[Tuple[int, int, int, int]], deleted: bool = False):
+        # hunks: (旧開始, 旧行数, 新開始, 新行数) を旧開始の昇順で
+        self.hunks = hunks
+        self.deleted = deleted
+        # 各ハンクが影響する旧側の最終行（純粋な挿入は「この行の後ろに挿入」なので旧開始）
+        self._lasts = [old if old_len == 0 else old + old_len - 1 for old, old_len, _, _ in hunks]
+        # 先頭から k 個のハンクを通過したときの行数の増減
+        self._shifts = [0]
+        for _, old_len, _, new_len in hunks:
+            self._shifts.append(self._shifts[-1] + new_len - old_len)
+
+    def _map_line(self, line: int, is_end: bool) -> Tuple[int, bool]:
+        """旧行番号を新行番号に写す。Returns: (新行番号, その行自体が変更・削除されたか)"""
+        k = bisect.bisect_left(self._lasts, line)
+        if k < len(self.hunks):
+            old, old_len, new, new_len = self.hunks[k]
+            if old_len > 0 and old <= line:
+                # 変更されたハンクの中: 範囲の始点はハンクの先頭、終点はハンクの末尾に寄せる
+                if new_len == 0:
+                    return (new + 1 if not is_end else new), True
+                return (new + new_len - 1 if is_end else new), True
+        return line + self._shifts[k], False
+
+    def remap(self, start: int, end: int) -> Tuple[int, int, bool]:
+        """行範囲を写す。Returns: (新開始行, 新終了行, 範囲内の内容が変わったか)"""
+        new_start, start_changed = self._map_line(start, False)
+        new_end, end_changed = self._map_line(end, True)
+        changed = start_changed or end_changed
+        if not changed:
+            # 範囲の途中に変更・挿入のハンクがないか（末尾行の直後への挿入は範囲外）
+            k = bisect.bisect_left(self._lasts, start)
+            while k < len(self.hunks) and self.hunks[k][0] <= end:
+                old, old_len, _, _ = self.hunks[k]
+                if old_len > 0 or old < end:
+                    changed = True
+                    break
+                k += 1
+        new_start = max(new_start, 1)
+        return new_start, max(new_end, new_start), changed
+
+
+def resolve_revision(target_dir: str, rev: str) -> Optional[str]:
+    """リビジョン指定をコミット SHA に解決する。解決できなければ None。"""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}"],
+            cwd=target_dir,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+    except Exception:
+        return None
+    sha = result.stdout.strip()
+    return sha if result.returncode == 0 and sha else None
+
+
+def parse_diff_hunks(diff_text: str) -> Dict[str, LineMap]:
+    """git diff -U0 の出力を旧パス（target_dir からの相対パス）ごとの LineMap にまとめる。"""
+    maps: Dict[str, LineMap] = {}
+    old_path = None
+    hunks: List[Tuple[int, int, int, int]] = []
+    deleted = False
+
+    def flush() -> None:
+        if old_path is not None and (hunks or deleted):
+            maps[old_path] = LineMap(hunks, deleted)
+
+    for line in diff_text.split('\n'):
+        if line.startswith('diff --git '):
+            flush()
+            old_path, hunks, deleted = None, [], False
+        elif line.startswith('--- '):
+            # 追加されたファイル（--- /dev/null）は旧リビジョンで引用されようがないので対象外
+            old_path = line[6:] if line.startswith('--- a/') else None
+        elif line.startswith('+++ '):
+            deleted = line == '+++ /dev/null'
+        elif line.startswith('@@'):
+            m = HUNK_HEADER_RE.match(line)
+            if m:
+                hunks.append((
+                    int(m.group(1)), int(m.group(2) or 1),
+                    int(m.group(3)), int(m.group(4) or 1),
+                ))
+    flush()
+    return maps
+
+
+def get_line_maps(target_dir: str, from_rev: str) -> Optional[Dict[str, LineMap]]:
+    """from_rev から作業ツリーまでの差分を1回の git diff で取得し、ファイルごとの LineMap を返す。"""
+    try:
+        result = subprocess.run(
+            [
+                "git", "-c", "core.quotePath=false", "diff", "-U0", "--no-color",
+                "--no-ext-diff", "--no-renames", "--relative", from_rev, "--",
+            ],
+            cwd=target_dir,
+            capture_output=True,
+            text=True,
+            errors="replace",
+            timeout=300,
+        )
+    except Exception as e:
+        print(f"  [Error] git diff failed: {e}")
+        return None
+    if result.returncode != 0:
+        print(f"  [Error] git diff failed: {result.stderr.strip()}")
+        return None
+    return parse_diff_hunks(result.stdout)
+
+
+def _replace_numbers(m: re.Match, start: int, end: int) -> List[Tuple[int, int, str]]:
+    """m の group(1)（開始行）と group(2)（終了行、省略可）を置き換える編集を返す。"""
+    edits = [(m.start(1), m.end(1), str(start))]
+    if m.group(2) is not None:
+        edits.append((m.start(2), m.end(2), str(end)))
+    return edits
 
 
-def process_file(
+def reanchor_content(
+    content: str, target_dir: str, line_maps: Dict[str, LineMap]
+) -> Tuple[str, int, List[Tuple[int, str, int, int, str]]]:
+    """ページ内の出典の行番号を差分に合わせてずらす。
+    Returns: (新しい本文, 行番号を直した出典数, 再生成が必要な出典
+              [(ページ内の行, パス, 新開始行, 新終了行, 理由)])
+    """
+    target_dir = target_dir.rstrip("/")
+    edits: List[Tuple[int, int, str]] = []
+    stale: List[Tuple[int, str, int, int, str]] = []
+    moved = 0
+
+    def remap(rel_path: str, start: int, end: int, pos: int) -> Optional[Tuple[int, int]]:
+        nonlocal moved
+        line_map = line_maps.get(os.path.normpath(rel_path))
+        if line_map is None:
+            return None
+        if line_map.deleted:
+            stale.append((pos, rel_path, start, end, "ファイルが削除された"))
+            return None
+        new_start, new_end, changed = line_map.remap(start, end)
+        if changed:
+            stale.append((pos, rel_path, new_start, new_end, "引用範囲の内容が変更された"))
+        if (new_start, new_end) == (start, end):
+            return None
+        moved += 1
+        return new_start, new_end
+
+    for abs_path, start, end, pos in iter_file_links(content):
+        if not abs_path.startswith(target_dir + "/"):
+            continue
+        new_range = remap(abs_path[len(target_dir) + 1:], start, end, pos)
+        if new_range is None:
+            continue
+        head_end = pos + len("(file://") + len(abs_path)
+        edits.extend(_replace_numbers(FILE_LINK_TAIL_RE.match(content, head_end), *new_range))
+
+        # 直前のリンク文字列 [path:Lx-Ly] も同じ範囲に揃える
+        if pos > 0 and content[pos - 1] == "]":
+            open_pos = content.rfind("[", content.rfind("\n", 0, pos) + 1, pos - 1)
+            if open_pos != -1:
+                label = LINK_LABEL_RANGE_RE.search(content, open_pos + 1, pos - 1)
+                if label:
+                    edits.extend(_replace_numbers(label, *new_range))
+
+    for m in CODE_BLOCK_RE.finditer(content):
+        if m.group(1) == "mermaid":
+            continue
+        block = m.group(2)
+        lines = block.split("\n")
+        # 先頭の空行を飛ばした最初の行を出典コメントとして扱う（source_index と同じ規則）
+        idx = next((i for i, line in enumerate(lines) if line.strip()), None)
+        if idx is None:
+            continue
+        header = SNIPPET_HEADER_RE.match(lines[idx])
+        if not header:
+            continue
+        path = header.group(1)
+        if os.path.isabs(path):
+            if not path.startswith(target_dir + "/"):
+                continue
+            path = path[len(target_dir) + 1:]
+        elif path.startswith("./"):
+            path = path[2:]
+        start = int(header.group(2))
+        end = int(header.group(3)) if header.group(3) else start
+        offset = m.start(2) + sum(len(line) + 1 for line in lines[:idx])
+        new_range = remap(path, start, end, offset)
+        if new_range is None:
+            continue
+        new_start, new_end = new_range
+        edits.append((offset + header.start(2), offset + header.end(2), str(new_start)))
+        if header.group(3):
+            edits.append((offset + header.start(3), offset + header.end(3), str(new_end)))
+
+    # ページ内の位置を行番号に直す（出現順に並べて1回の走査で数える）
+    stale.sort()
+    line_no, counted = 1, 0
+    for i, (pos, *rest) in enumerate(stale):
+        line_no += content.count("\n", counted, pos)
+        counted = pos
+        stale[i] = (line_no, *rest)
+
+    if not edits:
+        return content, moved, stale
+
+    pieces = []
+    last = 0
+    for s, e, text in sorted(edits):
+        pieces.append(content[last:s])
+        pieces.append(text)
+        last = e
+    pieces.append(content[last:])
+    return "".join(pieces), moved, stale
+
+
+@dataclass
+class PageResult:
+    """1ページ分の書き換え結果"""
+    count: int = 0  # 書き換えたリンク・出典の数
+    changed: bool = False
+    error: Optional[str] = None
+    diff: str = ""  # dry_run のときの予定の変更（unified diff）
+    stale: list = field(default_factory=list)  # --reanchor で再生成が必要な出典
+
+
+def rewrite_page(
     file_path: str,
-    link_style: str,
-    target_dir: str,
-    remote_url: Optional[str],
-    branch: Optional[str],
-) -> Tuple[bool, int]:
-    """単一ファイルのリンクを変換して上書き保存する。"""
+    transform: Callable[[str], Tuple[str, int, list]],
+    dry_run: bool = False,
+) -> PageResult:
+    """ページに transform(本文) -> (新しい本文, 書き換え件数, 再生成が必要な出典) を適用して保存する。
+    一時ファイルに書いてから置き換えるため、途中で中断しても元のページが切り詰められることはない。
+    dry_run のときは書き込まず、予定の変更を unified diff で返す。
+    """
     try:
         with open(file_path, "r", encoding="utf-8") as f:
             content = f.read()
     except Exception as e:
-        print(f"    [Error] Could not read: {e}")
-        return False, 0
-
-    if "file:///" not in content:
-        return False, 0
-
-    if link_style == "github":
-        new_content, count = convert_links_github(content, target_dir, remote_url, branch)
-    else:  # vscode
-        new_content, count = convert_links_vscode(content)
-
-    if count == 0:
-        return False, 0
+        return PageResult(error=f"Could not read: {e}")
+
+    new_content, count, stale = transform(content)
+    result = PageResult(count=count, stale=stale)
+    if new_content == content:
+        return result
+    result.changed = True
+
+    if dry_run:
+        name = os.path.basename(file_path)
+        result.diff = "".join(difflib.unified_diff(
+            content.splitlines(keepends=True), new_content.splitlines(keepends=True),
+            fromfile=f"a/{name}", tofile=f"b/{name}",
+        ))
+        return result
 
     try:
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(new_content)
+        write_atomic(file_path, new_content)
     except Exception as e:
-        print(f"    [Error] Could not write: {e}")
-        return False, 0
-
-    return True, count
+        return PageResult(count=count, stale=stale, error=f"Could not write: {e}")
+    return result
+
+
+def map_pages(
+    done_pages: List[dict],
+    output_dir: str,
+    work: Callable[[str], PageResult],
+    jobs: int = DEFAULT_JOBS,
+) -> Iterator[Tuple[dict, str, Optional[PageResult]]]:
+    """done ページごとに work(ページのパス) をスレッドプールで並列に実行し、
+    outline.json の順に (ページ, ファイル名, 結果) を返す。ページのファイルがなければ結果は None。
+    """
+    targets = [(page, page["filename"]) for page in done_pages if page.get("filename")]
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(targets)))
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = []
+        for _, filename in targets:
+            file_path = os.path.join(output_dir, filename)
+            futures.append(executor.submit(work, file_path) if os.path.exists(file_path) else None)
+        for (page, filename), future in zip(targets, futures):
+            yield page, filename, future.result() if future is not None else None
+
+
+def print_page_result(result: PageResult) -> None:
+    """dry_run の差分またはエラーを表示する（ページの要約行の後に呼ぶ）。"""
+    if result.error:
+        print(f"    [Error] {result.error}")
+    if result.diff:
+        print(result.diff, end="" if result.diff.endswith("\n") else "\n")
+
+
+def resolve_repo_link(root: str, remote_url: Optional[str], pin_rev: Optional[str]) -> Optional[RepoLink]:
+    """ディレクトリのリモートURL（未指定なら git remote）とブランチまたはコミットを求める。
+    リモートURL がない、または pin_rev が解決できない場合は None。
+    """
+    remote_url = remote_url or get_git_remote_url(root)
+    if not remote_url:
+        return None
+    branch, sha, prefix = get_git_head(root, pin_rev or "HEAD")
+    if not pin_rev:
+        return RepoLink(root, remote_url, branch, prefix)
+    if not sha:
+        return None
+    return RepoLink(root, remote_url, sha, prefix, GitPathChecker(root, sha, prefix))
 
 
-def scan_and_fix(outline_path: str, link_style: str, remote_url_arg: Optional[str]) -> None:
-    """outline.json の全 done ページを走査してリンクを変換する。"""
+def load_outline(outline_path: str) -> Tuple[dict, str, str, List[dict]]:
+    """outline.json を読み、(outline, 出力ディレクトリ, 対象リポジトリの絶対パス, done ページ) を返す。"""
     with open(outline_path, "r", encoding="utf-8") as f:
         outline_data = json.load(f)
 
@@ -189,13 +637,84 @@ def scan_and_fix(outline_path: str, link_style: str, remote_url_arg: Optional[st
 
     pages = outline_data.get("pages", [])
     done_pages = [p for p in pages if p.get("status") == "done"]
+    return outline_data, output_dir, target_dir, done_pages
+
+
+def reanchor_pages(
+    outline_path: str, from_rev: str, jobs: int = DEFAULT_JOBS, dry_run: bool = False
+) -> None:
+    """from_rev 以降のソース変更に合わせて、全 done ページの出典の行番号をずらす。"""
+    _, output_dir, target_dir, done_pages = load_outline(outline_path)
+    if not done_pages:
+        print("No done pages found in outline.json.")
+        return
+
+    sha = resolve_revision(target_dir, from_rev)
+    if not sha:
+        print(f"  ❌ リビジョン {from_rev} を {target_dir} で解決できませんでした。")
+        sys.exit(1)
+
+    line_maps = get_line_maps(target_dir, sha)
+    if line_maps is None:
+        sys.exit(1)
+
+    print(f"  Reanchor   : {from_rev} ({sha[:12]}) → 作業ツリー  (変更ファイル {len(line_maps)} 件)")
+    print(f"\nRe-anchoring {len(done_pages)} pages...\n")
+
+    total_moved = 0
+    changed_files = 0
+    all_stale = []
+
+    def work(file_path: str) -> PageResult:
+        return rewrite_page(
+            file_path, lambda content: reanchor_content(content, target_dir, line_maps), dry_run
+        )
+
+    for page, filename, result in map_pages(done_pages, output_dir, work, jobs):
+        page_id = page.get("id", "?")
+        if result is None:
+            print(f"  [{page_id}] ⚠️  File not found: {filename}")
+            continue
+
+        all_stale.extend((filename, *item) for item in result.stale)
+        if result.changed and not result.error:
+            total_moved += result.count
+            changed_files += 1
+
+        if result.count or result.stale or result.error:
+            note = f", {len(result.stale)} 件は要再生成" if result.stale else ""
+            print(f"  [{page_id}] ✅ {result.count} citation(s) re-anchored{note}.")
+        print_page_result(result)
+
+    print(f"\n{'=' * 50}")
+    print(f"Sources re-anchoring complete.{' (dry-run: 書き込みなし)' if dry_run else ''}")
+    print(f"  Files modified        : {changed_files}")
+    print(f"  Citations re-anchored : {total_moved}")
+    print(f"  Needs regeneration    : {len(all_stale)}")
+    if all_stale:
+        print(f"\n⚠️  引用範囲の内容が変わったため、以下の出典を含むセクションは再生成が必要です:")
+        for filename, page_line, path, start, end, reason in all_stale:
+            print(f"  {filename}:{page_line}  {path}:L{start}-L{end}  ({reason})")
+
+
+def scan_and_fix(
+    outline_path: str,
+    link_style: str,
+    remote_url_arg: Optional[str],
+    pin_rev: Optional[str] = None,
+    jobs: int = DEFAULT_JOBS,
+    dry_run: bool = False,
+) -> None:
+    """outline.json の全 done ページを走査してリンクを変換する。
+    pin_rev を指定した場合は GitHub/GitLab URL をそのコミット SHA に固定する。
+    """
+    outline_data, output_dir, target_dir, done_pages = load_outline(outline_path)
 
     if not done_pages:
         print("No done pages found in outline.json.")
         return
 
-    remote_url = None
-    branch = None
+    repos: List[RepoLink] = []
 
     if link_style == "github":
         # リモートURL の解決（引数 → git remote → outline.json の順）
@@ -216,10 +735,35 @@ def scan_and_fix(outline_path: str, link_style: str, remote_url_arg: Optional[st
             print("       outline.json に \"remoteBaseUrl\": \"https://...\" を追加する")
             sys.exit(1)
 
-        branch = get_git_branch(target_dir)
+        target_repo = resolve_repo_link(target_dir, remote_url, pin_rev)
         print(f"  Remote URL : {remote_url}  (取得元: {source})")
-        print(f"  Branch     : {branch}")
-        print(f"  Style      : github → {build_github_url(remote_url, branch, 'path/file.ts', '#L1-L10')}")
+        if pin_rev:
+            if target_repo is None:
+                print(f"  ❌ リビジョン {pin_rev} を {target_dir} で解決できませんでした。")
+                sys.exit(1)
+            print(f"  Commit     : {target_repo.ref}  ({pin_rev} に固定)")
+        else:
+            print(f"  Branch     : {target_repo.ref}")
+        print(f"  Style      : github → {build_github_url(remote_url, target_repo.ref, 'path/file.ts', '#L1-L10')}")
+        repos.append(target_repo)
+
+        # additionalDirs はそれぞれのリポジトリの git remote と HEAD で変換する（並列に1回だけ求める）
+        additional_dirs = [
+            d for d in resolve_outline_dirs(outline_data.get("additionalDirs", []), output_dir) if d != target_dir
+        ]
+        if additional_dirs:
+            workers = min(jobs if jobs > 0 else (os.cpu_count() or 1), len(additional_dirs))
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                resolved = list(executor.map(
+                    lambda d: resolve_repo_link(d, None, "HEAD" if pin_rev else None), additional_dirs
+                ))
+            print(f"  Additional : {len(additional_dirs)} dir(s)")
+            for d, repo in zip(additional_dirs, resolved):
+                if repo is None:
+                    print(f"    ⚠️  {d}: git remote が取得できないため file:/// のまま残します")
+                else:
+                    print(f"    {d} → {repo.remote_url} @ {repo.ref}")
+                    repos.append(repo)
     else:
         print(f"  Style      : vscode → vscode://file//absolute/path.ts:LINE")
 
@@ -228,31 +772,52 @@ def scan_and_fix(outline_path: str, link_style: str, remote_url_arg: Optional[st
     total_converted = 0
     changed_files = 0
 
-    for page in done_pages:
-        page_id = page.get("id", "?")
-        filename = page.get("filename")
-        if not filename:
-            continue
+    repo_index = RepoIndex(repos)
+
+    def convert(content: str) -> Tuple[str, int, list]:
+        if "file:///" not in content:
+            return content, 0, []
+        if link_style == "github":
+            new_content, count = convert_links_github(content, repo_index)
+        else:  # vscode
+            new_content, count = convert_links_vscode(content)
+        return new_content, count, []
+
+    def work(file_path: str) -> PageResult:
+        return rewrite_page(file_path, convert, dry_run)
 
-        file_path = os.path.join(output_dir, filename)
-        if not os.path.exists(file_path):
+    for page, filename, result in map_pages(done_pages, output_dir, work, jobs):
+        page_id = page.get("id", "?")
+        if result is None:
             print(f"  [{page_id}] ⚠️  File not found: {filename}")
             continue
 
-        changed, count = process_file(file_path, link_style, target_dir, remote_url, branch)
-
-        if not changed:
+        if result.error:
+            print(f"  [{page_id}] ❌ {result.count} link(s) not converted.")
+        elif not result.changed:
             print(f"  [{page_id}] -  No file:/// links.")
         else:
-            print(f"  [{page_id}] ✅ {count} link(s) converted.")
-            total_converted += count
+            print(f"  [{page_id}] ✅ {result.count} link(s) converted.")
+            total_converted += result.count
             changed_files += 1
+        print_page_result(result)
 
     print(f"\n{'=' * 50}")
-    print(f"Sources link conversion complete.")
+    print(f"Sources link conversion complete.{' (dry-run: 書き込みなし)' if dry_run else ''}")
     print(f"  Files modified  : {changed_files}")
     print(f"  Links converted : {total_converted}")
 
+    for repo in repos:
+        checker = repo.checker
+        if checker is None:
+            continue
+        checker.close()
+        if checker.missing:
+            print(f"\n⚠️  {repo.root} のコミット {checker.commit[:12]} に存在しないため file:/// のまま残したファイル"
+                  f" ({len(checker.missing)} 件、未コミットの可能性):")
+            for rel_path in sorted(checker.missing):
+                print(f"  {rel_path}")
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="DeepWiki Sources link converter")
@@ -260,7 +825,6 @@ def main() -> None:
     parser.add_argument(
         "--link-style",
         choices=["github", "vscode"],
-        required=True,
         help="変換後のリンク形式: github（GitHub/GitLab URL）または vscode（vscode:// URL）",
     )
     parser.add_argument(
@@ -268,14 +832,50 @@ def main() -> None:
         help="GitHub/GitLab のリポジトリベースURL（例: https://github.com/org/repo）。"
              "省略時は git remote から自動取得する。--link-style github 時のみ使用。",
     )
+    parser.add_argument(
+        "--pin-commit",
+        nargs="?",
+        const="HEAD",
+        metavar="REV",
+        help="GitHub/GitLab URL をブランチ名ではなく REV（省略時は HEAD）のコミット SHA に固定する。"
+             "そのコミットに存在しないファイルへのリンクは変換しない。--link-style github 時のみ使用。",
+    )
+    parser.add_argument(
+        "--reanchor",
+        metavar="FROM_REV",
+        help="ページ生成時のリビジョン。そこから作業ツリーまでの git diff で出典の行番号をずらし、"
+             "内容が変わった引用範囲を再生成対象として一覧表示する。",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"ページを並列に処理するスレッド数（既定: {DEFAULT_JOBS}、0 で CPU 数）",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="ページを書き換えず、予定の変更を unified diff で表示する",
+    )
     args = parser.parse_args()
+    if not args.link_style and not args.reanchor:
+        parser.error("--link-style または --reanchor のいずれかを指定してください")
+    if args.pin_commit and args.link_style != "github":
+        parser.error("--pin-commit は --link-style github と組み合わせて指定してください")
 
     outline_path = os.path.abspath(args.outline_json)
     if not os.path.exists(outline_path):
         print(f"Error: outline.json not found at {outline_path}")
         sys.exit(1)
 
-    scan_and_fix(outline_path, args.link_style, args.remote_url)
+    if args.reanchor:
+        reanchor_pages(outline_path, args.reanchor, args.jobs, args.dry_run)
+        if args.link_style:
+            print()
+    if args.link_style:
+        scan_and_fix(
+            outline_path, args.link_style, args.remote_url, args.pin_commit, args.jobs, args.dry_run
+        )
 
 
 if __name__ == "__main__":
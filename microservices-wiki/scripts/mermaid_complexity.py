@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Mermaid ダイアグラムの規模・描画コストの分析。
+
+mermaid_parser の解析結果から、図ごとにノード数・エッジ数・最大ファンアウト・ラベル長と、
+TD レイアウトでの推定の段数（深さ）・最も広い段のノード数（幅）を計算する。
+ノードが 80 個を超える図や長いラベルの図は GitHub や IDE のプレビューで描画が遅く読みにくいため、
+予算（MERMAID_BUDGETS）を超えた図を分割案付きで報告する。
+
+validation_engine の mermaid_complexity ルールから使うほか、単体でも実行できる。
+このファイルは deepwiki/scripts と microservices-wiki/scripts に同一内容で置く。
+
+使用方法:
+  python mermaid_complexity.py <wikiディレクトリ | ページ.md> [--max-nodes N] [--max-edges N]
+      [--max-fan-out N] [--max-label-chars N] [--max-width N] [--max-depth N]
+      [--max-participants N] [--max-messages N] [--all] [--format text|json]
+
+  --all     予算内の図も表示する
+  --format  json の場合、図ごとの指標と超過内容を JSON で出力する
+"""
+import os
+import sys
+import json
+import argparse
+from collections import defaultdict
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import mermaid_parser
+
+# 1つの図の予算。validation_engine の品質基準（mermaid_budgets）の既定値でもある
+MERMAID_BUDGETS = {
+    'max_nodes': 30,  # flowchart のノード数
+    'max_edges': 40,  # flowchart のエッジ数
+    'max_fan_out': 6,  # 1つのノードから出るエッジ数
+    'max_label_chars': 40,  # ラベルの文字数（プロンプトの「1ノード3-4単語」に相当）
+    'max_width': 8,  # TD レイアウトで横に並ぶノード数
+    'max_depth': 12,  # TD レイアウトの段数
+    'max_participants': 8,  # sequenceDiagram の参加者数
+    'max_messages': 30,  # sequenceDiagram のメッセージ数
+}
+
+# 図の種類ごとに見る予算と、対応する DiagramMetrics の属性
+FLOWCHART_LIMITS = [
+    ('max_nodes', 'nodes', 'ノード'), ('max_edges', 'edges', 'エッジ'),
+    ('max_fan_out', 'max_fan_out', 'ファンアウト'), ('max_label_chars', 'max_label_chars', 'ラベル文字数'),
+    ('max_width', 'width', '幅'), ('max_depth', 'depth', '段数'),
+]
+SEQUENCE_LIMITS = [
+    ('max_participants', 'participants', '参加者'), ('max_messages', 'messages', 'メッセージ'),
+    ('max_label_chars', 'max_label_chars', 'ラベル文字数'),
+]
+
+
+@dataclass
+class DiagramMetrics:
+    """1つの Mermaid 図の規模"""
+    index: int  # ページ内で何番目の Mermaid ブロックか（1 始まり）
+    kind: str
+    nodes: int = 0
+    edges: int = 0
+    max_fan_out: int = 0
+    hub: str = ''  # ファンアウトが最大のノード
+    max_label_chars: int = 0
+    mean_label_chars: float = 0.0
+    longest_label: str = ''
+    width: int = 0  # 推定レイアウトで最も広い段のノード数
+    depth: int = 0  # 推定レイアウトの段数
+    participants: int = 0
+    messages: int = 0
+    over_budget: Dict[str, List[int]] = field(default_factory=dict)  # 予算名 → [実測, 予算]
+    suggestions: List[str] = field(default_factory=list)
+
+
+def _layout_ranks(order: List[str], edges: List[tuple]) -> Dict[str, int]:
+    """
+    TD レイアウトでの各ノードの段（0 始まり）を最長路で推定する。
+    出現順の DFS で後退辺を除いて閉路を切り、トポロジカル順に段を決める（ノード数・エッジ数に線形）。
+    """
+    children = defaultdict(list)
+    for a, b in edges:
+        children[a].append(b)
+    state = {}  # 1: 探索中, 2: 完了
+    postorder = []
+    forward = defaultdict(list)
+    for root in order:
+        if root in state:
+            continue
+        state[root] = 1
+        stack = [(root, iter(children[root]))]
+        while stack:
+            node, it = stack[-1]
+            child = next(it, None)
+            if child is None:
+                state[node] = 2
+                postorder.append(node)
+                stack.pop()
+                continue
+            if state.get(child) == 1:
+                continue  # 後退辺（閉路）は段の計算に使わない
+            forward[node].append(child)
+            if child not in state:
+                state[child] = 1
+                stack.append((child, iter(children[child])))
+
+    rank = dict.fromkeys(order, 0)
+    for node in reversed(postorder):
+        for child in forward[node]:
+            if rank[child] < rank[node] + 1:
+                rank[child] = rank[node] + 1
+    return rank
+
+
+def _label_stats(metrics: DiagramMetrics, labels: List[str]) -> None:
+    if not labels:
+        return
+    longest = max(labels, key=len)
+    metrics.max_label_chars = len(longest)
+    metrics.longest_label = longest
+    metrics.mean_label_chars = round(sum(len(label) for label in labels) / len(labels), 1)
+
+
+def _flowchart_metrics(metrics: DiagramMetrics, diagram: mermaid_parser.MermaidDiagram) -> Dict[int, List[str]]:
+    """flowchart の指標を metrics に記録し、推定レイアウトの段 → ノード ID の一覧を返す"""
+    labels = {}
+    for node in diagram.nodes:
+        if node.label is not None and node.id not in labels:
+            labels[node.id] = node.label.strip()
+    order = list(dict.fromkeys(node.id for node in diagram.nodes))
+    for node_id in order:
+        labels.setdefault(node_id, node_id)
+    edges = list(dict.fromkeys(diagram.edges))
+
+    metrics.nodes = len(order)
+    metrics.edges = len(edges)
+    fan_out = defaultdict(int)
+    for a, _ in edges:
+        fan_out[a] += 1
+    if fan_out:
+        metrics.hub, metrics.max_fan_out = max(fan_out.items(), key=lambda item: item[1])
+    _label_stats(metrics, list(labels.values()))
+
+    rank = _layout_ranks(order, edges)
+    per_rank = defaultdict(list)
+    for node_id, r in rank.items():
+        per_rank[r].append(node_id)
+    metrics.depth = len(per_rank)
+    metrics.width = max((len(nodes) for nodes in per_rank.values()), default=0)
+    return per_rank
+
+
+def _sequence_metrics(metrics: DiagramMetrics, diagram: mermaid_parser.MermaidDiagram) -> None:
+    names = list(diagram.participants)
+    for sender, target, _ in diagram.messages:
+        names.extend((sender, target))
+    metrics.participants = len(dict.fromkeys(names))
+    metrics.messages = len(diagram.messages)
+    metrics.width = metrics.participants
+    metrics.depth = metrics.messages
+    _label_stats(metrics, [label for *_, label in diagram.messages if label])
+
+
+def _top_level_subgraphs(diagram: mermaid_parser.MermaidDiagram) -> list:
+    """他の subgraph に含まれない subgraph（開始行順に並んでいる前提で線形に判定）"""
+    top_level = []
+    outer_end = 0
+    for subgraph in diagram.subgraphs:
+        if subgraph.start_line > outer_end:
+            top_level.append(subgraph)
+            outer_end = subgraph.end_line or float('inf')
+    return top_level
+
+
+def _suggest_splits(metrics: DiagramMetrics, diagram: mermaid_parser.MermaidDiagram, budgets: dict,
+                    ranks: Dict[int, List[str]]) -> List[str]:
+    """超過した予算に応じた分割・簡略化の案"""
+    over = metrics.over_budget
+    suggestions = []
+    if diagram.kind == 'flowchart':
+        top_level = _top_level_subgraphs(diagram)
+        if ('max_nodes' in over or 'max_edges' in over) and len(top_level) >= 2:
+            names = '、'.join(g.name for g in top_level[:4])
+            suggestions.append(f"subgraph 単位（{names}）で図を分け、全体図には subgraph 間の関係だけを残す")
+        elif 'max_nodes' in over or 'max_edges' in over:
+            parts = -(-metrics.nodes // budgets['max_nodes'])
+            suggestions.append(f"概要図と詳細図 {parts} 枚に分け、概要図では関連するノードをまとめて1ノードにする")
+        if 'max_fan_out' in over:
+            suggestions.append(f"{metrics.hub} から出る {metrics.max_fan_out} 本のエッジの先を subgraph でまとめるか、"
+                               f"{metrics.hub} を起点とする図を別に作る")
+        if 'max_depth' in over:
+            cut = '、'.join(ranks[sorted(ranks)[metrics.depth // 2]][:3])
+            suggestions.append(f"{metrics.depth} 段の処理を {cut} の段で前半・後半の2つの図に分ける")
+        if 'max_width' in over:
+            suggestions.append(f"横に並ぶ {metrics.width} 個のノードを subgraph でまとめるか、代表的なものに絞る")
+    elif diagram.kind == 'sequenceDiagram':
+        if 'max_participants' in over:
+            suggestions.append(f"参加者を {budgets['max_participants']} 個以下に絞り、シナリオごとに図を分ける")
+        if 'max_messages' in over:
+            suggestions.append("正常系・異常系や alt / loop の単位で図を分ける")
+    if 'max_label_chars' in over:
+        suggestions.append(f"ラベル「{metrics.longest_label[:30]}…」を3-4語に短縮し、詳細は本文に書く")
+    return suggestions
+
+
+def analyze_block(block: str, index: int = 1, budgets: Optional[dict] = None) -> DiagramMetrics:
+    """Mermaid ブロック1つの規模を計算し、予算を超えた項目と分割案を付けて返す"""
+    budgets = {**MERMAID_BUDGETS, **(budgets or {})}
+    diagram = mermaid_parser.parse(block)
+    metrics = DiagramMetrics(index=index, kind=diagram.kind)
+    ranks = {}
+    if diagram.kind == 'flowchart':
+        ranks = _flowchart_metrics(metrics, diagram)
+        limits = FLOWCHART_LIMITS
+    elif diagram.kind == 'sequenceDiagram':
+        _sequence_metrics(metrics, diagram)
+        limits = SEQUENCE_LIMITS
+    else:
+        return metrics
+    for budget, attr, _ in limits:
+        value = getattr(metrics, attr)
+        if value > budgets[budget]:
+            metrics.over_budget[budget] = [value, budgets[budget]]
+    if metrics.over_budget:
+        metrics.suggestions = _suggest_splits(metrics, diagram, budgets, ranks)
+    return metrics
+
+
+def describe_overage(metrics: DiagramMetrics) -> str:
+    """超過内容の説明（例: ノード 45/30, 段数 15/12）"""
+    names = {budget: label for budget, _, label in FLOWCHART_LIMITS + SEQUENCE_LIMITS}
+    return ', '.join(f"{names[b]} {value}/{limit}" for b, (value, limit) in metrics.over_budget.items())
+
+
+def metrics_to_dict(metrics: DiagramMetrics) -> dict:
+    return asdict(metrics)
+
+
+# --- 単体実行 ---
+
+def _collect_pages(target: str) -> List[Path]:
+    path = Path(target)
+    if path.is_file():
+        return [path]
+    return sorted(p for p in path.rglob('*.md') if not p.name.startswith('.'))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mermaid 図の規模・描画コストを分析し、予算を超えた図を報告する")
+    parser.add_argument('target', help="Wiki ディレクトリまたはページ (.md)")
+    for budget, default in MERMAID_BUDGETS.items():
+        parser.add_argument(f"--{budget.replace('_', '-')}", type=int, default=default, dest=budget,
+                            help=f"予算（既定 {default}）")
+    parser.add_argument('--all', action='store_true', help="予算内の図も表示する")
+    parser.add_argument('--format', choices=('text', 'json'), default='text')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.target):
+        print(f"Error: {args.target} が見つかりません", file=sys.stderr)
+        sys.exit(1)
+    budgets = {budget: getattr(args, budget) for budget in MERMAID_BUDGETS}
+
+    # 循環 import を避けるため、ブロック抽出はここで読み込む
+    from validation_engine import MERMAID_BLOCK_RE
+
+    report = []
+    for page in _collect_pages(args.target):
+        blocks = MERMAID_BLOCK_RE.findall(page.read_text(encoding='utf-8', errors='replace'))
+        for index, block in enumerate(blocks, 1):
+            metrics = analyze_block(block, index, budgets)
+            if metrics.over_budget or args.all:
+                report.append((str(page), metrics))
+
+    if args.format == 'json':
+        print(json.dumps({
+            'budgets': budgets,
+            'diagrams': [{'file': file, **metrics_to_dict(m)} for file, m in report],
+        }, ensure_ascii=False, indent=2))
+        return
+
+    over = [item for item in report if item[1].over_budget]
+    for file, m in report:
+        mark = '⚠️ ' if m.over_budget else '✅'
+        size = (f"ノード {m.nodes} / エッジ {m.edges} / 幅 {m.width} / 段数 {m.depth}"
+                if m.kind == 'flowchart' else f"参加者 {m.participants} / メッセージ {m.messages}")
+        print(f"{mark} {file} 図{m.index} ({m.kind}): {size} / 最長ラベル {m.max_label_chars} 文字")
+        if m.over_budget:
+            print(f"     超過: {describe_overage(m)}")
+            for suggestion in m.suggestions:
+                print(f"     → {suggestion}")
+    print(f"\n予算超過の図: {len(over)} 件")
+
+
+if __name__ == '__main__':
+    main()
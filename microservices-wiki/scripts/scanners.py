@@ -0,0 +1,207 @@
+r"""
+生成ページの検査に使う線形時間の走査関数。
+
+モデルが生成したテキストは長さも形も保証されないため、`\[[^\]"]*\([^)]*\)[^\]"]*\]` のように
+開始位置ごとに末尾まで走査し直す正規表現は、閉じ括弧のない入力で O(n^2)〜O(n^3) の
+バックトラッキングを起こしうる。ここでは同じ判定を「文字列を先頭から1回だけ走査する」
+形に書き直している。各関数は入力長に対して線形時間で終わる（str.find / 1文字ずつのループ /
+バックトラッキングの起きない正規表現のみを使う）。
+
+bench_rules.py が旧正規表現との一致と、入力サイズに対する実行時間の伸びを検証する。
+validation_engine.py と fix_mermaid.py から import して使う。
+このファイルは deepwiki/scripts と microservices-wiki/scripts に同一内容で置く。
+"""
+import re
+from typing import List, Optional, Tuple
+
+# バックトラッキングの起きない（各位置で高々1通りしか進めない）正規表現のみ
+_HTML_TAG_START_RE = re.compile(r'<[a-zA-Z]')
+_HYPHEN_RUN_RE = re.compile(r'[A-Za-z0-9]+(?:-[A-Za-z0-9]+)*')
+_WORD_CHAR_RE = re.compile(r'\w')
+_MERMAID_OPENERS = '(["\'`{'
+
+
+def find_delimited(text: str, opener: str, closer: str) -> List[str]:
+    r"""opener と次の closer の間の空でない文字列を左から順に返す。
+    re.findall(r'\[([^\]]+)\]') と同じ結果（opener='[', closer=']'）。
+    """
+    found = []
+    pos = 0
+    while True:
+        start = text.find(opener, pos)
+        if start == -1:
+            return found
+        end = text.find(closer, start + 1)
+        if end == -1:
+            # この先に closer がないので、より後ろの opener も閉じられない
+            return found
+        if end == start + 1:
+            pos = start + 1
+            continue
+        found.append(text[start + 1:end])
+        pos = end + 1
+
+
+def find_chain(text: str, states: List[Tuple[str, str]], accept: str,
+               limit: Optional[int] = None) -> List[Tuple[int, int]]:
+    r"""「開始文字 → ループ → 区切り文字 → ループ … → 終了文字」形の正規表現を NFA として
+    1回の走査でシミュレートし、一致した範囲 (start, end) を返す。
+
+    states: 状態ごとの (その状態に入る文字の集合, その状態に留まれない文字の集合)。
+    例えば r'\[[^\]"]*\([^)]*\)[^\]"]*\]' は
+    [('[', ']"'), ('(', ')'), (')', ']"')] と accept=']' で表す。
+    一致の有無は正規表現と同じになる。一致範囲は最初に終了文字に達した位置で確定するため、
+    貪欲マッチの正規表現とは範囲が異なることがある（表示用の例示にのみ使う）。
+    """
+    # 各状態の入口になる文字が1つも現れなければ一致しない
+    for enter, _ in states:
+        if not any(ch in text for ch in enter):
+            return []
+    if not any(ch in text for ch in accept):
+        return []
+
+    found = []
+    n = len(states)
+    active = [-1] * n  # 状態ごとに生きているスレッドの最も左の開始位置
+    for i, ch in enumerate(text):
+        if active[-1] != -1 and ch in accept:
+            found.append((active[-1], i + 1))
+            if limit is not None and len(found) >= limit:
+                return found
+            active = [-1] * n  # findall と同様に、一致の後ろから探索を続ける
+            continue
+        nxt = [-1] * n
+        for k, (enter, stop) in enumerate(states):
+            candidates = []
+            if active[k] != -1 and ch not in stop:
+                candidates.append(active[k])
+            if ch in enter:
+                if k == 0:
+                    candidates.append(i)
+                elif active[k - 1] != -1:
+                    candidates.append(active[k - 1])
+            if candidates:
+                nxt[k] = min(candidates)
+        active = nxt
+    return found
+
+
+def find_unquoted_nested(text: str, opener: str, closer: str, inner: str,
+                         inner_closer: Optional[str] = None, limit: Optional[int] = None) -> List[str]:
+    r"""クォートされていない opener...closer の中に inner の文字が含まれる箇所を返す。
+
+    inner_closer を指定した場合は inner の後に inner_closer も必要で、その間は closer や
+    クォートも含んでよい（旧正規表現 r'\[[^\]"]*\([^)]*\)[^\]"]*\]' と同じ判定）。
+    """
+    outer_stop = closer + '"'
+    if inner_closer:
+        states = [(opener, outer_stop), (inner, inner_closer), (inner_closer, outer_stop)]
+    else:
+        states = [(opener, outer_stop), (inner, outer_stop)]
+    return [text[start:end] for start, end in find_chain(text, states, closer, limit)]
+
+
+def find_unquoted_pipes(text: str, limit: Optional[int] = None) -> List[str]:
+    r"""[ または ( から次の括弧までの間に | を含むラベルを返す（クォートを含むものは除く）。
+    re.findall(r'(?:\[|\()([^"()\[\]]*\|[^"()\[\]]*?)(?:\]|\))') と同じ判定。
+    """
+    stop = '"()[]'
+    spans = find_chain(text, [('[(', stop), ('|', stop)], '])', limit)
+    return [text[start + 1:end - 1] for start, end in spans]
+
+
+def has_html_tag(text: str) -> bool:
+    """re.search(r'<[a-zA-Z][^>]*>') と同じ判定"""
+    m = _HTML_TAG_START_RE.search(text)
+    return bool(m) and text.find('>', m.end()) != -1
+
+
+def has_hyphenated_node_id(text: str) -> bool:
+    r"""ハイフンを含むノード ID の直後にノード定義の括弧・クォートが続く箇所があるか。
+    re.search(r'\b[A-Za-z][A-Za-z0-9]*(?:-[A-Za-z0-9]+)+\s*[\[\({"\'`]') と同じ判定。
+    """
+    for m in _HYPHEN_RUN_RE.finditer(text):
+        start, end = m.span()
+        run = m.group()
+        if '-' not in run:
+            continue
+        # ID の開始位置: 単語境界にある英字。run の先頭か、ハイフンの直後
+        if run[0].isascii() and run[0].isalpha() and \
+           (start == 0 or not _WORD_CHAR_RE.match(text[start - 1])):
+            first = 0
+        else:
+            first = next((i + 1 for i, ch in enumerate(run[:-1])
+                          if ch == '-' and run[i + 1].isascii() and run[i + 1].isalpha()), -1)
+        if first == -1 or '-' not in run[first:]:
+            continue
+        pos = end
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+        if pos < len(text) and text[pos] in _MERMAID_OPENERS:
+            return True
+    return False
+
+
+def has_pattern_on_same_line(text: str, first: re.Pattern, second: re.Pattern) -> bool:
+    """first の一致の後ろ（同じ行内）に second が一致するか。
+    re.search(first + '.*' + second) を、行ごとに最初の first だけを起点にして線形時間で判定する。
+    """
+    pos = 0
+    while True:
+        m = first.search(text, pos)
+        if not m:
+            return False
+        line_end = text.find('\n', m.end())
+        if line_end == -1:
+            line_end = len(text)
+        if second.search(text, m.end(), line_end):
+            return True
+        pos = line_end + 1
+
+
+def has_marked_path(text: str, markers: Tuple[str, ...], tail: re.Pattern) -> bool:
+    r"""コメント記号 + 任意の空白 + 空白を含まないパス + tail が連続する箇所があるか。
+    re.search('(?:markers)\s*\S+' + tail) を、tail の一致位置ごとに直前の非空白の塊を
+    1回の前進走査で追跡して判定する（tail は '\.' で始まるパターン）。
+    """
+    run_start = 0         # 現在の非空白の塊の開始位置
+    first_marker = -1     # 塊の中で最初にコメント記号が終わる位置
+    leading_marker = False  # 塊の直前が「コメント記号 + 空白」か
+    marker_before_space = False
+    pos = 0
+    for m in tail.finditer(text):
+        dot = m.start()
+        while pos < dot:
+            ch = text[pos]
+            if ch.isspace():
+                if pos == 0 or not text[pos - 1].isspace():
+                    marker_before_space = any(
+                        text.endswith(mk, run_start, pos) for mk in markers
+                    )
+                run_start, first_marker = pos + 1, -1
+                leading_marker = marker_before_space
+            elif first_marker == -1 and any(
+                pos + 1 - len(mk) >= run_start and text.startswith(mk, pos + 1 - len(mk))
+                for mk in markers
+            ):
+                first_marker = pos + 1
+            pos += 1
+        if dot > run_start and ((first_marker != -1 and first_marker < dot) or leading_marker):
+            return True
+    return False
+
+
+def is_table_row(line: str) -> bool:
+    r"""re.match(r'\s*\|.*\|.*\|', line) と同じ判定（| が3つ以上で、先頭が | ）"""
+    return line.lstrip().startswith('|') and line.count('|') >= 3
+
+
+def is_table_separator(line: str) -> bool:
+    r"""re.match(r'\s*\|[\s\-:]+\|[\s\-:]+\|', line) と同じ判定"""
+    stripped = line.lstrip()
+    if not stripped.startswith('|'):
+        return False
+    cells = stripped[1:].split('|', 2)
+    return len(cells) == 3 and all(
+        cell and all(ch.isspace() or ch in '-:' for ch in cell) for cell in cells[:2]
+    )